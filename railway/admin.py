@@ -9,7 +9,9 @@ from railway.models import (
     Station,
     Route,
     Order,
-    Ticket
+    Ticket,
+    SeatHold,
+    HeldSeat,
 )
 
 
@@ -23,6 +25,27 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = [TicketInline,]
 
 
+class HeldSeatInline(admin.TabularInline):
+    model = HeldSeat
+    extra = 0
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    """Holds are read-only here: seat counters are kept by booking code."""
+    inlines = [HeldSeatInline,]
+    list_display = ("id", "journey", "user", "expires_at")
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 models = [Journey, Crew, TrainType, Train, Station, Route, Ticket]
 for model in models:
     admin.site.register(model)
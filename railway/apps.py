@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class StationConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "railway"
+
+    def ready(self):
+        import railway.signals  # noqa: F401
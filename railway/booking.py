@@ -0,0 +1,343 @@
+import random
+import time
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from railway.models import HeldSeat, Journey, Order, SeatHold, Ticket
+
+
+class SeatsConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken."
+    default_code = "seats_conflict"
+
+    def __init__(self, seats, detail=None):
+        super().__init__(detail)
+        # Seat numbers are kept as integers instead of error strings.
+        self.detail = {
+            "detail": self.detail,
+            "seats": [
+                {"journey": journey_id, "cargo": cargo, "seat": seat}
+                for journey_id, cargo, seat in sorted(seats)
+            ],
+        }
+
+
+def _seat_label(cargo: int, seat: int) -> str:
+    return f"Cargo {cargo}, Seat {seat}"
+
+
+def _group_by_journey(
+    seats_data, field: str = "tickets"
+) -> dict[Journey, dict]:
+    """Group requested (cargo, seat) pairs by journey, rejecting repeats."""
+    seats_by_journey = defaultdict(dict)
+    repeated = []
+    for seat_data in seats_data:
+        journey = seat_data["journey"]
+        seat = (seat_data["cargo"], seat_data["seat"])
+        if seat in seats_by_journey[journey]:
+            repeated.append(_seat_label(*seat))
+        seats_by_journey[journey][seat] = None
+    if repeated:
+        raise ValidationError(
+            {field: [f"Seats requested more than once: {repeated}"]}
+        )
+    return seats_by_journey
+
+
+def _taken_seats(journey: Journey, seats) -> list[tuple]:
+    """Return the requested seats that are sold or held, in one query."""
+    query = reduce(or_, (Q(cargo=cargo, seat=seat) for cargo, seat in seats))
+    return list(
+        Ticket.objects
+        .filter(query, journey=journey)
+        .order_by()
+        .values_list("cargo", "seat")
+        .union(
+            HeldSeat.objects
+            .filter(query, journey=journey)
+            .order_by()
+            .values_list("cargo", "seat")
+        )
+    )
+
+
+def _check_seats(seats_by_journey: dict[Journey, dict]) -> None:
+    """Validate seat numbers in memory and reject seats already taken."""
+    conflicts = []
+    for journey, seats in seats_by_journey.items():
+        for cargo, seat in seats:
+            Ticket.validate_ticket(cargo, seat, journey.train, ValidationError)
+        conflicts.extend(
+            (journey.id, cargo, seat)
+            for cargo, seat in _taken_seats(journey, seats)
+        )
+    if conflicts:
+        raise SeatsConflict(conflicts)
+
+
+def book_tickets(order, tickets_data: list[dict]) -> list[Ticket]:
+    """Create all tickets of an order with set-based validation.
+
+    Every ticket is checked in memory with ``Ticket.validate_ticket``
+    against its already loaded journey train, collisions with sold and
+    held seats are looked up with one query per journey and the tickets
+    are inserted with a single ``bulk_create``. Must be called inside a
+    transaction holding the journey locks (see ``lock_journeys``).
+    """
+    seats_by_journey = _group_by_journey(tickets_data)
+    _check_seats(seats_by_journey)
+
+    tickets = Ticket.objects.bulk_create(
+        Ticket(order=order, journey=journey, cargo=cargo, seat=seat)
+        for journey, seats in seats_by_journey.items()
+        for cargo, seat in seats
+    )
+    for journey, seats in seats_by_journey.items():
+        Journey.add_tickets_sold(journey.id, len(seats))
+    return tickets
+
+
+def hold_seats(hold: SeatHold, seats_data: list[dict]) -> list[HeldSeat]:
+    """Reserve seats for a hold; same rules and locking as book_tickets."""
+    seats_by_journey = _group_by_journey(
+        ({"journey": hold.journey, **seat_data} for seat_data in seats_data),
+        field="seats",
+    )
+    _check_seats(seats_by_journey)
+
+    held_seats = HeldSeat.objects.bulk_create(
+        HeldSeat(hold=hold, journey=hold.journey, cargo=cargo, seat=seat)
+        for seats in seats_by_journey.values()
+        for cargo, seat in seats
+    )
+    Journey.add_seats_held(hold.journey_id, len(held_seats))
+    return held_seats
+
+
+def lock_journeys(journey_ids) -> None:
+    """Serialize bookings per journey by locking the journey rows.
+
+    Rows are locked in primary key order so that two orders sharing
+    several journeys cannot deadlock each other.
+    """
+    list(
+        Journey.objects
+        .select_for_update()
+        .filter(pk__in=journey_ids)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def release_holds(holds) -> int:
+    """Delete holds; journeys must be locked.
+
+    ``SeatHoldQuerySet.delete`` frees their seats with one UPDATE per
+    journey.
+    """
+    _, deleted = SeatHold.objects.filter(pk__in=holds).delete()
+    return deleted.get(SeatHold._meta.label, 0)
+
+
+def release_expired_holds(journey_ids) -> int:
+    """Free the expired holds of journeys locked by the caller."""
+    return release_holds(
+        SeatHold.objects
+        .filter(journey_id__in=journey_ids, expires_at__lte=timezone.now())
+        .values("pk")
+    )
+
+
+def _run_booking(book, seats):
+    """Run ``book`` in a transaction, retrying on write contention.
+
+    Database errors caused by contention (unique violations, deadlocks,
+    lock timeouts) roll the attempt back and it is retried up to
+    ``BOOKING_MAX_ATTEMPTS`` times before ``seats`` are reported as a
+    conflict.
+    """
+    max_attempts = settings.BOOKING_MAX_ATTEMPTS
+    for attempt in range(1, max_attempts + 1):
+        try:
+            with transaction.atomic():
+                return book()
+        except (IntegrityError, OperationalError):
+            if attempt == max_attempts:
+                raise SeatsConflict(
+                    seats,
+                    detail="The requested seats are being booked "
+                    "concurrently, please try again.",
+                )
+            time.sleep(random.uniform(0, settings.BOOKING_RETRY_BACKOFF))
+
+
+def allocate_seats(
+    cargo_num: int, places_in_cargo: int, taken, count: int
+) -> list[tuple] | None:
+    """Pick ``count`` free seats, keeping the party as close as possible.
+
+    The smallest run of adjacent free seats in one cargo that fits the
+    whole party wins. Otherwise cargos with the most free seats are
+    filled first, which spreads the party over the fewest cargos, taking
+    the longest runs inside each cargo first. Returns ``None`` when not
+    enough seats are free.
+    """
+    occupancy = [bytearray(places_in_cargo + 2) for _ in range(cargo_num)]
+    for cargo, seat in taken:
+        if cargo <= cargo_num and seat <= places_in_cargo:
+            occupancy[cargo - 1][seat] = 1
+
+    runs = []
+    for cargo, seats in enumerate(occupancy, start=1):
+        seats[0] = seats[-1] = 1
+        start = None
+        for seat in range(1, places_in_cargo + 2):
+            if not seats[seat] and start is None:
+                start = seat
+            elif seats[seat] and start is not None:
+                runs.append((seat - start, cargo, start))
+                start = None
+
+    fitting = [run for run in runs if run[0] >= count]
+    if fitting:
+        _, cargo, start = min(fitting)
+        return [(cargo, seat) for seat in range(start, start + count)]
+
+    free_in_cargo = defaultdict(int)
+    for length, cargo, _ in runs:
+        free_in_cargo[cargo] += length
+    if sum(free_in_cargo.values()) < count:
+        return None
+
+    cargo_rank = {
+        cargo: rank
+        for rank, cargo in enumerate(
+            sorted(free_in_cargo, key=lambda cargo: -free_in_cargo[cargo])
+        )
+    }
+    allocated = []
+    for length, cargo, start in sorted(
+        runs, key=lambda run: (cargo_rank[run[1]], -run[0], run[2])
+    ):
+        take = min(length, count - len(allocated))
+        allocated.extend((cargo, seat) for seat in range(start, start + take))
+        if len(allocated) == count:
+            return allocated
+
+
+def _allocate(allocations: list[dict], tickets_data: list[dict]) -> list:
+    """Turn seat-count requests into tickets; journeys must be locked.
+
+    Occupancy of every journey is read with a single query and includes
+    the seats explicitly requested in the same order.
+    """
+    requested = defaultdict(set)
+    for ticket in tickets_data:
+        requested[ticket["journey"]].add((ticket["cargo"], ticket["seat"]))
+
+    taken_by_journey = {}
+    allocated = []
+    for allocation in allocations:
+        journey = allocation["journey"]
+        if journey not in taken_by_journey:
+            taken_by_journey[journey] = (
+                set(journey.taken_seats()) | requested[journey]
+            )
+        taken = taken_by_journey[journey]
+        seats = allocate_seats(
+            journey.train.cargo_num,
+            journey.train.places_in_cargo,
+            taken,
+            allocation["seats"],
+        )
+        if seats is None:
+            raise SeatsConflict(
+                [],
+                detail=f"Journey {journey.id} has fewer than "
+                f"{allocation['seats']} free seats.",
+            )
+        taken.update(seats)
+        allocated.extend(
+            {"journey": journey, "cargo": cargo, "seat": seat}
+            for cargo, seat in seats
+        )
+    return allocated
+
+
+def place_order(
+    order_data: dict, tickets_data: list[dict], holds=(), allocations=()
+) -> Order:
+    """Create an order with its tickets, converting the given holds.
+
+    ``allocations`` ask for a number of seats on a journey; the seats are
+    picked by ``allocate_seats`` inside the booking transaction, so they
+    are never taken by a concurrent order. Seats taken by a concurrent
+    order or held by someone else are reported as ``SeatsConflict``
+    (HTTP 409).
+    """
+    tickets_data = list(tickets_data) + [
+        {"journey": hold.journey, "cargo": seat.cargo, "seat": seat.seat}
+        for hold in holds
+        for seat in hold.seats.all()
+    ]
+    journey_ids = {
+        item["journey"].id for item in [*tickets_data, *allocations]
+    }
+
+    def book():
+        order = Order.objects.create(**order_data)
+        if journey_ids:
+            lock_journeys(journey_ids)
+            release_holds([hold.pk for hold in holds])
+            release_expired_holds(journey_ids)
+            book_tickets(
+                order, tickets_data + _allocate(allocations, tickets_data)
+            )
+        return order
+
+    return _run_booking(
+        book,
+        [
+            (ticket["journey"].id, ticket["cargo"], ticket["seat"])
+            for ticket in tickets_data
+        ],
+    )
+
+
+def create_hold(user, journey: Journey, seats_data: list[dict]) -> SeatHold:
+    """Reserve seats on a journey for ``SEAT_HOLD_TTL``."""
+
+    def book():
+        hold = SeatHold.objects.create(
+            journey=journey,
+            user=user,
+            expires_at=timezone.now() + settings.SEAT_HOLD_TTL,
+        )
+        lock_journeys([journey.id])
+        release_expired_holds([journey.id])
+        hold_seats(hold, seats_data)
+        return hold
+
+    return _run_booking(
+        book,
+        [
+            (journey.id, seat_data["cargo"], seat_data["seat"])
+            for seat_data in seats_data
+        ],
+    )
+
+
+def cancel_hold(hold: SeatHold) -> None:
+    with transaction.atomic():
+        lock_journeys([hold.journey_id])
+        release_holds([hold.pk])
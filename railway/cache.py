@@ -0,0 +1,292 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def version_key(model, pk=None) -> str:
+    """Cache key of the version stamp of a model or of one of its rows."""
+    key = f"railway:version:{model._meta.label_lower}"
+    return key if pk is None else f"{key}:{pk}"
+
+
+def get_versions(keys) -> tuple:
+    """Current version stamps stored under ``keys``, in the same order.
+
+    A missing stamp is created, so entries cached before the stamp was
+    lost can never be matched again.
+    """
+    keys = list(keys)
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return tuple(versions[key] for key in keys)
+
+
+def _bump(keys) -> None:
+    """Change stamps now and again after the transaction commits.
+
+    A concurrent request that read the rows before the commit could
+    otherwise cache them under the first new stamp.
+    """
+    def bump():
+        now = time.time_ns()
+        cache.set_many({key: now for key in keys}, timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def bump_version(model, *pks) -> None:
+    """Invalidate everything cached from ``model`` and its rows ``pks``."""
+    _bump([version_key(model), *(version_key(model, pk) for pk in pks)])
+
+
+def bump_all_versions(model) -> None:
+    """Invalidate ``model`` after a bulk update of an unknown set of rows."""
+    _bump([version_key(model), version_key(model, "*")])
+
+
+def evict_local_versions(model, pks=None) -> None:
+    """Drop version stamps of ``model`` from this process's local tier.
+
+    Called for changes made by other workers, so the next read gets the
+    stamps from the shared cache. ``pks`` None means all rows.
+    """
+    evict = getattr(cache, "invalidate_local", None)
+    if evict is None:
+        return
+    if pks is None:
+        cache.clear_local()
+        return
+    evict([
+        version_key(model),
+        version_key(model, "*"),
+        *(version_key(model, pk) for pk in pks),
+    ])
+
+
+# Keys being computed by this process, and the events their waiters
+# block on.
+_filling = {}
+_filling_lock = threading.Lock()
+
+# Pause (seconds) between checks for a value another process computes.
+_FILL_POLL_INTERVAL = 0.02
+
+
+def _fill_across_processes(key: str, compute, timeout):
+    """Compute ``key`` unless another process already holds its lock.
+
+    The lock is a ``cache.add`` entry, so only one worker sharing the
+    cache computes a missing value while the others poll for it. When
+    the lock holder does not deliver within ``CACHE_FILL_WAIT`` (it
+    failed, or the value is not cacheable) the waiter computes itself.
+    """
+    lock_key = f"filling:{key}"
+    deadline = time.monotonic() + settings.CACHE_FILL_WAIT
+    while not cache.add(lock_key, 1, settings.CACHE_FILL_LOCK_TIMEOUT):
+        time.sleep(_FILL_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+        if time.monotonic() >= deadline:
+            return compute()
+    try:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, timeout)
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+def get_or_fill(key: str, compute, timeout):
+    """Cached value of ``key``, computed by a single caller on a miss.
+
+    Concurrent misses of the same key are coalesced: threads of this
+    process wait on the thread computing it, and processes wait on the
+    one holding the fill lock in the shared cache. ``compute`` returns
+    the value, or None for a result that must not be cached; a waiter
+    that then finds nothing in the cache computes its own result.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    with _filling_lock:
+        filled = _filling.get(key)
+        leader = filled is None
+        if leader:
+            filled = _filling[key] = threading.Event()
+    if not leader:
+        filled.wait(settings.CACHE_FILL_WAIT)
+        value = cache.get(key)
+        return compute() if value is None else value
+    try:
+        return _fill_across_processes(key, compute, timeout)
+    finally:
+        with _filling_lock:
+            del _filling[key]
+        filled.set()
+
+
+class CachedResponseMixin:
+    """Cache the serialized data of ``list`` and ``retrieve`` responses.
+
+    Cache keys are built from the absolute URL with its query parameters
+    (``get_cache_params``, so filters and the page are part of the key)
+    and the version stamps of ``version_models``, the models the
+    response is serialized from. Saving or deleting any of them bumps
+    its stamp, which makes every dependent entry unreachable at once.
+    Identical concurrent misses are computed once (see ``get_or_fill``).
+    """
+    version_models = ()
+
+    def get_cache_params(self, request) -> list:
+        """Query parameters that select the cached response, sorted.
+
+        The renderer (``?format=``) is left out: the data is cached
+        before rendering.
+        """
+        return sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            if key != api_settings.URL_FORMAT_OVERRIDE
+            for value in values
+        )
+
+    def get_cache_timeout(self) -> int:
+        return settings.RESPONSE_CACHE_TIMEOUT
+
+    def get_cache_key(self, request) -> str:
+        raw = repr((
+            self.action,
+            request.build_absolute_uri(request.path),
+            self.get_cache_params(request),
+            get_versions(version_key(model) for model in self.version_models),
+        ))
+        digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+        return f"railway:response:{self.basename}:{digest}"
+
+    def _cached_response(self, view, request, *args, **kwargs):
+        response = None
+
+        def compute():
+            nonlocal response
+            response = view(request, *args, **kwargs)
+            return response.data if response.status_code == 200 else None
+
+        data = get_or_fill(
+            self.get_cache_key(request), compute, self.get_cache_timeout()
+        )
+        return response if response is not None else Response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified support for ``list`` and ``retrieve``.
+
+    The validators are derived from version stamps only: the collection
+    stamps of ``version_models`` for lists, and for ``retrieve`` the
+    stamps of the requested row of the first model (and of its bulk
+    updates) plus the collection stamps of the others. A matching
+    ``If-None-Match`` or ``If-Modified-Since`` gets a 304 before the
+    list queryset is evaluated or anything is serialized. ``retrieve``
+    first checks with a pk-only query that the row is in the user's
+    queryset, so that a 304 never reveals rows the user may not see and
+    no stamp is created for missing rows; the full object is only loaded
+    when the body is rendered. Set ``vary_on_user`` when the response
+    depends on the requesting user.
+    """
+    version_models = ()
+    vary_on_user = False
+
+    def get_version_keys(self) -> list[str]:
+        model, *related = self.version_models
+        keys = [version_key(related_model) for related_model in related]
+        if self.action == "retrieve":
+            lookup = self.lookup_url_kwarg or self.lookup_field
+            keys.append(version_key(model, self.kwargs[lookup]))
+            keys.append(version_key(model, "*"))
+        else:
+            keys.append(version_key(model))
+        return keys
+
+    def get_validators(self, request) -> tuple[str, int]:
+        versions = get_versions(self.get_version_keys())
+        query = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        raw = repr((
+            self.basename,
+            self.action,
+            request.build_absolute_uri(request.path),
+            query,
+            request.accepted_renderer.format,
+            request.user.pk if self.vary_on_user else None,
+            versions,
+        ))
+        etag = quote_etag(
+            hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+        )
+        return etag, max(versions) // 1_000_000_000
+
+    def _conditional_response(self, view, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def check_object_exists(self) -> None:
+        """Raise ``Http404`` unless the requested row is visible."""
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            exists = (
+                queryset
+                .prefetch_related(None)
+                .filter(**{self.lookup_field: self.kwargs[lookup]})
+                .exists()
+            )
+        except (TypeError, ValueError, ValidationError):
+            exists = False
+        if not exists:
+            raise Http404
+
+    def retrieve(self, request, *args, **kwargs):
+        self.check_object_exists()
+        return self._conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,199 @@
+from dataclasses import dataclass, field
+
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.exceptions import ParseError
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+@dataclass(frozen=True)
+class FieldQuery:
+    """What a queryset must load to serialize one field.
+
+    ``only`` lists the model fields read (including those of related
+    rows, e.g. ``route__name``) and is applied with ``.only()`` when
+    the client asked for a subset of the fields.
+    """
+    only: tuple = ()
+    select_related: tuple = ()
+    prefetch_related: tuple = ()
+    annotate: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Expansion:
+    """Nested serializer rendered in place of a field on ``?expand=``."""
+    serializer: type
+    query: FieldQuery
+    source: str | None = None
+    many: bool = False
+
+
+def parse_names(value: str) -> list[str]:
+    """Comma-separated names, stripped, without blanks and duplicates."""
+    names = (name.strip() for name in value.split(","))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+class SparseFieldsetSerializerMixin:
+    """Serializer taking ``fields`` and ``expand`` keyword arguments.
+
+    ``fields`` keeps only the named fields. Every field named in
+    ``expand`` is replaced by the nested serializer of its
+    ``Meta.expandable`` entry (an ``Expansion``).
+
+    ``Meta.field_queries`` maps fields to the ``FieldQuery`` they need;
+    a field without an entry only reads the model field of its name.
+    ``get_field_queries`` collects them for viewsets.
+    """
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in expand:
+            expansion = self.Meta.expandable[name]
+            options = {"many": expansion.many, "read_only": True}
+            if expansion.source:
+                options["source"] = expansion.source
+            self.fields[name] = expansion.serializer(**options)
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - set(expand):
+                self.fields.pop(name)
+
+    @classmethod
+    def readable_field_names(cls) -> tuple:
+        if "_readable_field_names" not in cls.__dict__:
+            cls._readable_field_names = tuple(
+                name
+                for name, serializer_field in cls().fields.items()
+                if not serializer_field.write_only
+            )
+        return cls._readable_field_names
+
+    @classmethod
+    def expandable_field_names(cls) -> tuple:
+        return tuple(getattr(cls.Meta, "expandable", {}))
+
+    @classmethod
+    def get_field_queries(cls, fields=None, expand=()) -> list[FieldQuery]:
+        field_queries = getattr(cls.Meta, "field_queries", {})
+        expandable = getattr(cls.Meta, "expandable", {})
+        return [
+            expandable[name].query
+            if name in expand
+            else field_queries.get(name, FieldQuery(only=(name,)))
+            for name in cls.readable_field_names()
+            if fields is None or name in fields or name in expand
+        ]
+
+
+def sparse_fieldset_parameters(serializer_class) -> list[OpenApiParameter]:
+    """``fields`` / ``expand`` query parameters for the API schema."""
+    fields = serializer_class.readable_field_names()
+    parameters = [
+        OpenApiParameter(
+            name=FIELDS_PARAM,
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description=(
+                "Comma-separated fields to return, of: "
+                f"`{','.join(fields)}`. Unrequested relations are not "
+                "queried."
+            ),
+        ),
+    ]
+    expandable = serializer_class.expandable_field_names()
+    if expandable:
+        parameters.append(
+            OpenApiParameter(
+                name=EXPAND_PARAM,
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "Comma-separated fields to return as nested objects, "
+                    f"of: `{','.join(expandable)}`."
+                ),
+            )
+        )
+    return parameters
+
+
+class SparseFieldsetMixin:
+    """``?fields=`` and ``?expand=`` for the ``sparse_actions``.
+
+    Both take comma-separated field names of the action serializer, a
+    ``SparseFieldsetSerializerMixin``; expanded fields are returned even
+    when ``fields`` leaves them out. ``get_sparse_queryset`` joins,
+    prefetches and annotates only what the requested fields need, and
+    defers every other column when ``fields`` is given.
+
+    Comes before ``CachedResponseMixin`` among the bases, so that cache
+    keys ignore the order of the names.
+    """
+    sparse_actions = ("list",)
+
+    def _params_to_names(self, param: str, allowed: tuple) -> list[str]:
+        names = parse_names(self.request.query_params.get(param, ""))
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise ParseError(
+                f"{param} query parameter must contain only "
+                f"{', '.join(allowed)} separated by commas. "
+                f"exm:({','.join(allowed[:2])})"
+            )
+        return names
+
+    def get_sparse_params(self) -> tuple:
+        """Requested ``fields`` (None for all) and ``expand`` names."""
+        if self.action not in self.sparse_actions:
+            return None, ()
+        serializer_class = self.get_serializer_class()
+        fields = self._params_to_names(
+            FIELDS_PARAM, serializer_class.readable_field_names()
+        )
+        expand = self._params_to_names(
+            EXPAND_PARAM, serializer_class.expandable_field_names()
+        )
+        return fields or None, tuple(expand)
+
+    def get_sparse_queryset(self, queryset):
+        fields, expand = self.get_sparse_params()
+        select_related, prefetch_related, only = [], [], []
+        annotations = {}
+        for query in self.get_serializer_class().get_field_queries(
+            fields, expand
+        ):
+            select_related.extend(query.select_related)
+            prefetch_related.extend(query.prefetch_related)
+            only.extend(query.only)
+            annotations.update(query.annotate)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        if fields is not None:
+            queryset = queryset.only(*self.get_required_fields(), *only)
+        return queryset
+
+    def get_required_fields(self) -> list[str]:
+        """Model fields loaded whatever was requested: the pagination keys."""
+        return ["id", *getattr(self.paginator, "ordering", ())]
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_sparse_params()
+        if fields is not None:
+            kwargs.setdefault("fields", fields)
+        if expand:
+            kwargs.setdefault("expand", expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_cache_params(self, request) -> list:
+        params = []
+        for key, value in super().get_cache_params(request):
+            if key in (FIELDS_PARAM, EXPAND_PARAM):
+                value = ",".join(sorted(parse_names(value)))
+            params.append((key, value))
+        return sorted(params)
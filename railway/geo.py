@@ -0,0 +1,226 @@
+import math
+import threading
+
+import numpy as np
+
+from railway.models import Station
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Size of a grid cell in degrees of latitude and longitude.
+GRID_DEGREES = 1.0
+_ROWS = math.ceil(180 / GRID_DEGREES)
+_COLUMNS = math.ceil(360 / GRID_DEGREES)
+
+
+def haversine_km(lat, lon, lats, lons) -> np.ndarray:
+    """Great-circle distances (km) from one point to arrays of points."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + math.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _row(lat: float) -> int:
+    return min(max(int((lat + 90) // GRID_DEGREES), 0), _ROWS - 1)
+
+
+def _column(lon: float) -> int:
+    return int((lon + 180) // GRID_DEGREES) % _COLUMNS
+
+
+class StationIndex:
+    """In-memory grid hash of station coordinates.
+
+    Stations are bucketed into GRID_DEGREES cells and stored sorted by
+    cell, so every row of cells in a query box is one ``searchsorted``
+    slice. Candidates are then ranked with a vectorized haversine.
+    The index is rebuilt lazily, on the first query after ``invalidate``
+    (called by the Station signals once a change is committed); an index
+    built while ``invalidate`` ran serves the current query only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._data = None
+
+    def _build(self) -> dict:
+        rows = list(
+            Station.objects
+            .order_by()
+            .values_list("id", "name", "latitude", "longitude")
+        )
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        names = np.array([row[1] for row in rows], dtype=object)
+        lats = np.array([row[2] for row in rows], dtype=np.float64)
+        lons = np.array([row[3] for row in rows], dtype=np.float64)
+        cells = (
+            np.clip((lats + 90) // GRID_DEGREES, 0, _ROWS - 1) * _COLUMNS
+            + (lons + 180) // GRID_DEGREES % _COLUMNS
+        ).astype(np.int64)
+        order = np.argsort(cells, kind="stable")
+        return {
+            "ids": ids[order],
+            "names": names[order],
+            "lats": lats[order],
+            "lons": lons[order],
+            "cells": cells[order],
+        }
+
+    def _get_data(self) -> dict:
+        data = self._data
+        if data is None:
+            with self._lock:
+                data = self._data
+                if data is None:
+                    generation = self._generation
+                    data = self._data = self._build()
+                    # Checked after storing, as invalidate() takes no lock.
+                    if self._generation != generation:
+                        self._data = None
+        return data
+
+    @staticmethod
+    def _column_ranges(first: int, last: int) -> list[tuple]:
+        """Inclusive column ranges from ``first`` to ``last`` eastwards."""
+        if last - first + 1 >= _COLUMNS:
+            return [(0, _COLUMNS - 1)]
+        first, last = first % _COLUMNS, last % _COLUMNS
+        if first <= last:
+            return [(first, last)]
+        return [(first, _COLUMNS - 1), (0, last)]
+
+    @staticmethod
+    def _candidates(data, rows, column_ranges) -> np.ndarray:
+        cells = data["cells"]
+        slices = []
+        for row in rows:
+            for first, last in column_ranges:
+                start, end = np.searchsorted(
+                    cells,
+                    [row * _COLUMNS + first, row * _COLUMNS + last + 1],
+                )
+                if start < end:
+                    slices.append(np.arange(start, end))
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
+
+    @staticmethod
+    def _rows(data, positions, distances=None) -> list[dict]:
+        stations = []
+        for number, position in enumerate(positions):
+            station = {
+                "id": int(data["ids"][position]),
+                "name": data["names"][position],
+                "latitude": float(data["lats"][position]),
+                "longitude": float(data["lons"][position]),
+            }
+            if distances is not None:
+                station["distance"] = round(float(distances[number]), 3)
+            stations.append(station)
+        return stations
+
+    def nearest(
+        self, lat: float, lon: float, limit: int, radius: float = None
+    ) -> list[dict]:
+        """Up to ``limit`` stations closest to a point, nearest first.
+
+        The searched box of cells grows until the ``limit``-th distance
+        is inside the circle the box is guaranteed to cover. ``radius``
+        (km) drops stations further away.
+        """
+        data = self._get_data()
+        if not len(data["ids"]) or limit <= 0:
+            return []
+        row, column = _row(lat), _column(lon)
+        reach = 1
+        while True:
+            rows = range(max(row - reach, 0), min(row + reach, _ROWS - 1) + 1)
+            columns = self._column_ranges(column - reach, column + reach)
+            candidates = self._candidates(data, rows, columns)
+            distances = haversine_km(
+                lat, lon, data["lats"][candidates], data["lons"][candidates]
+            )
+            covered = self._covered_km(lat, lon, rows, columns)
+            if radius is not None:
+                keep = distances <= radius
+                candidates, distances = candidates[keep], distances[keep]
+            enough = len(distances) >= limit
+            if enough:
+                order = np.argpartition(distances, limit - 1)[:limit]
+                order = order[np.argsort(distances[order], kind="stable")]
+            else:
+                order = np.argsort(distances, kind="stable")
+            bound = distances[order[-1]] if enough else radius
+            if (bound is not None and bound <= covered) or covered == math.inf:
+                return self._rows(
+                    data, candidates[order], distances[order]
+                )
+            reach *= 2
+
+    @staticmethod
+    def _covered_km(lat, lon, rows, columns) -> float:
+        """Radius (km) around the point that the searched cells cover."""
+        gaps = []
+        if rows.start > 0:
+            gaps.append(math.radians(lat - (rows.start * GRID_DEGREES - 90)))
+        if rows.stop < _ROWS:
+            gaps.append(math.radians(rows.stop * GRID_DEGREES - 90 - lat))
+        if columns != [(0, _COLUMNS - 1)]:
+            west = columns[0][0] * GRID_DEGREES - 180
+            east = (columns[-1][1] + 1) * GRID_DEGREES - 180
+            lon_gap = min((lon - west) % 360, (east - lon) % 360)
+            # Closest approach to a meridian lon_gap degrees away.
+            gaps.append(math.asin(min(
+                1.0,
+                math.cos(math.radians(lat))
+                * math.sin(math.radians(min(lon_gap, 90))),
+            )))
+        return min(gaps) * EARTH_RADIUS_KM if gaps else math.inf
+
+    def within(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        limit: int,
+    ) -> list[dict]:
+        """Stations inside a bounding box, by id.
+
+        ``west`` greater than ``east`` means the box crosses the
+        antimeridian.
+        """
+        data = self._get_data()
+        if not len(data["ids"]) or south > north:
+            return []
+        rows = range(_row(south), _row(north) + 1)
+        first = _column(max(west, -180))
+        last = min(int((min(east, 180) + 180) // GRID_DEGREES), _COLUMNS - 1)
+        if west <= east:
+            columns = [(first, last)]
+        else:
+            columns = [(first, _COLUMNS - 1), (0, last)]
+        candidates = self._candidates(data, rows, columns)
+        lats = data["lats"][candidates]
+        lons = data["lons"][candidates]
+        inside = (lats >= south) & (lats <= north)
+        if west <= east:
+            inside &= (lons >= west) & (lons <= east)
+        else:
+            inside &= (lons >= west) | (lons <= east)
+        candidates = candidates[inside]
+        candidates = candidates[np.argsort(data["ids"][candidates])][:limit]
+        return self._rows(data, candidates)
+
+
+station_index = StationIndex()
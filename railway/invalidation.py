@@ -0,0 +1,242 @@
+import logging
+import os
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Max, Q
+from django.utils import timezone
+from psycopg import sql
+
+from railway.models import InvalidationEvent
+
+logger = logging.getLogger(__name__)
+
+# Tags the events of this process, which applies its own changes
+# directly and ignores them when they come back from the bus.
+ORIGIN = uuid.uuid4().hex[:12]
+
+
+def _new_origin() -> None:
+    """Give a forked worker its own ORIGIN, or it ignores its siblings."""
+    global ORIGIN
+    ORIGIN = uuid.uuid4().hex[:12]
+
+
+os.register_at_fork(after_in_child=_new_origin)
+
+# Stands for "every row" in an event.
+ALL = "*"
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more.
+MAX_PAYLOAD = 7999
+
+# Table events are pruned every this many polls.
+_PRUNE_EVERY = 60
+
+
+def encode(model, pks) -> str:
+    """``"<origin> <app_label.model> <pk,pk,...>"``, or ``*`` for all rows."""
+    label = model._meta.label_lower
+    payload = f"{ORIGIN} {label} {','.join(map(str, pks)) or ALL}"
+    if len(payload) > MAX_PAYLOAD:
+        payload = f"{ORIGIN} {label} {ALL}"
+    return payload
+
+
+def decode(payload: str) -> tuple:
+    """Return (origin, model label, primary keys or None for all rows)."""
+    origin, label, pks = payload.split(" ", 2)
+    return origin, label, None if pks == ALL else pks.split(",")
+
+
+class InvalidationBus:
+    """Cross-process invalidation of in-process caches.
+
+    Model signals ``publish`` compact events naming the changed rows. On
+    PostgreSQL they are sent with NOTIFY on ``INVALIDATION_CHANNEL``, so
+    they are delivered when (and only if) the transaction commits. Other
+    databases get an ``InvalidationEvent`` row instead.
+
+    ``start`` runs a daemon thread in each worker that LISTENs on the
+    channel (or polls the table every ``INVALIDATION_POLL_INTERVAL``)
+    and calls the handlers ``subscribe``d for the model with the
+    changed primary keys (None meaning all rows). After the listener
+    reconnects every handler is called with None, since events may have
+    been missed in between.
+
+    Threads do not survive a fork, so the listener must be started in
+    the worker processes, not in a parent that imports the application
+    before forking them (``gunicorn --preload``). ``start_on_request``
+    starts it on the first request of every process.
+    """
+
+    def __init__(self):
+        self._handlers = defaultdict(list)
+        self._thread = None
+        self._starting = threading.Lock()
+        self._stopping = threading.Event()
+
+    def subscribe(self, model, handler) -> None:
+        self._handlers[model._meta.label_lower].append(handler)
+
+    @staticmethod
+    def _uses_notify() -> bool:
+        return connections[DEFAULT_DB_ALIAS].vendor == "postgresql"
+
+    def publish(self, model, *pks) -> None:
+        payload = encode(model, pks)
+        if self._uses_notify():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_notify(%s, %s)",
+                    [settings.INVALIDATION_CHANNEL, payload],
+                )
+        else:
+            InvalidationEvent.objects.create(payload=payload)
+
+    def dispatch(self, payload: str) -> None:
+        """Apply an event received from the bus."""
+        try:
+            origin, label, pks = decode(payload)
+        except ValueError:
+            logger.warning("Malformed invalidation event %r", payload)
+            return
+        if origin != ORIGIN:
+            self._apply(label, pks)
+
+    def _apply(self, label: str, pks) -> None:
+        for handler in self._handlers.get(label, ()):
+            try:
+                handler(pks)
+            except Exception:
+                logger.exception("Invalidation handler %r failed", handler)
+
+    def apply_all(self) -> None:
+        """Invalidate everything, e.g. after events may have been lost."""
+        for label in list(self._handlers):
+            self._apply(label, None)
+
+    # Listener
+
+    def start(self) -> None:
+        """Start the listener thread of this process (once)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._starting:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._listen,
+                name="invalidation-listener",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def start_on_request(self) -> None:
+        """Start the listener when a process serves its first request."""
+        request_started.connect(
+            self._start_for_request, dispatch_uid="invalidation-bus-start"
+        )
+
+    def _start_for_request(self, **kwargs) -> None:
+        self.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _listen(self) -> None:
+        reconnecting = False
+        while not self._stopping.is_set():
+            try:
+                if self._uses_notify():
+                    self._listen_notify(reconnecting)
+                else:
+                    self._poll_table(reconnecting)
+            except Exception:
+                logger.exception("Invalidation listener failed, restarting")
+                reconnecting = True
+                self._stopping.wait(settings.INVALIDATION_POLL_INTERVAL)
+            finally:
+                connection.close()
+
+    def _listen_notify(self, reconnecting: bool) -> None:
+        wrapper = connections[DEFAULT_DB_ALIAS]
+        listener = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            listener.autocommit = True
+            listener.execute(
+                sql.SQL("LISTEN {}").format(
+                    sql.Identifier(settings.INVALIDATION_CHANNEL)
+                )
+            )
+            if reconnecting:
+                self.apply_all()
+            while not self._stopping.is_set():
+                for notify in listener.notifies(
+                    timeout=settings.INVALIDATION_POLL_INTERVAL
+                ):
+                    self.dispatch(notify.payload)
+        finally:
+            listener.close()
+
+    def _poll_table(self, reconnecting: bool) -> None:
+        last_id = (
+            InvalidationEvent.objects.aggregate(last_id=Max("id"))["last_id"]
+            or 0
+        )
+        seen = set(
+            InvalidationEvent.objects
+            .filter(
+                created_at__gte=(
+                    timezone.now() - settings.INVALIDATION_EVENT_LOOKBACK
+                )
+            )
+            .values_list("id", flat=True)
+        )
+        if reconnecting:
+            self.apply_all()
+        polls = 0
+        while not self._stopping.wait(settings.INVALIDATION_POLL_INTERVAL):
+            last_id = self.read_events(last_id, seen)
+            polls += 1
+            if polls % _PRUNE_EVERY == 0:
+                self.prune_events()
+
+    def read_events(self, after_id: int, seen: set[int]) -> int:
+        """Dispatch unseen table events; return the highest id read.
+
+        Transactions commit out of id order, so an event may become
+        visible after higher ids were read. Besides the events above
+        ``after_id``, every poll reads again the events created within
+        ``INVALIDATION_EVENT_LOOKBACK`` and skips the ids in ``seen``,
+        which is replaced by the ids read.
+        """
+        recent = timezone.now() - settings.INVALIDATION_EVENT_LOOKBACK
+        events = list(
+            InvalidationEvent.objects
+            .filter(Q(id__gt=after_id) | Q(created_at__gte=recent))
+            .values_list("id", "payload")
+        )
+        for event_id, payload in events:
+            if event_id not in seen:
+                self.dispatch(payload)
+        seen.clear()
+        seen.update(event_id for event_id, _ in events)
+        return max(seen, default=after_id)
+
+    @staticmethod
+    def prune_events() -> None:
+        InvalidationEvent.objects.filter(
+            created_at__lt=timezone.now() - settings.INVALIDATION_EVENT_TTL
+        ).delete()
+
+
+bus = InvalidationBus()
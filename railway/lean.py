@@ -0,0 +1,108 @@
+from operator import itemgetter
+
+from django.conf import settings
+from rest_framework.response import Response
+
+
+class LeanListSerializer:
+    """Serialize list rows from ``values()`` dicts.
+
+    A ModelSerializer builds a field tree and calls a related or method
+    field for every value of every row. Subclasses instead read the
+    ``values()`` of a page in one query and build each output dict
+    directly. The output must stay identical to that of the
+    ModelSerializer they stand in for.
+
+    ``values`` maps every output field to the ``values()`` lookups it is
+    built from. A field is its (only) lookup unless the class defines
+    ``get_<field>(row)``, as with SerializerMethodField. ``fields``
+    restricts the output, like that of a SparseFieldsetSerializerMixin.
+    """
+    values = {}
+
+    def __init__(self, rows, context=None, fields=None):
+        self.rows = rows
+        self.context = context or {}
+        self.fields = [
+            name for name in self.values if fields is None or name in fields
+        ]
+        self._getters = [
+            (
+                name,
+                getattr(self, f"get_{name}", None)
+                or itemgetter(self.values[name][0]),
+            )
+            for name in self.fields
+        ]
+
+    @classmethod
+    def get_lookups(cls, fields=None) -> list[str]:
+        """``values()`` lookups read to render ``fields`` (None for all)."""
+        lookups = {}
+        for name, field_lookups in cls.values.items():
+            if fields is None or name in fields:
+                lookups.update(dict.fromkeys(field_lookups))
+        return list(lookups)
+
+    def prepare(self, rows: list) -> None:
+        """Load whatever the page needs besides its rows (many-to-many)."""
+
+    def to_representation(self, row: dict) -> dict:
+        return {name: get(row) for name, get in self._getters}
+
+    @property
+    def data(self) -> list[dict]:
+        rows = list(self.rows)
+        self.prepare(rows)
+        return [self.to_representation(row) for row in rows]
+
+
+class LeanListMixin:
+    """Serve ``list`` through ``lean_serializer_class``.
+
+    The viewset queryset is kept (filters, joins and annotations apply)
+    but read with ``values()``; prefetches are left to the lean
+    serializer. Sparse fieldsets (``get_sparse_params`` of
+    SparseFieldsetMixin) restrict the values read; expanded fields
+    need the regular serializers. ``LEAN_LIST_SERIALIZATION = False``
+    falls back to the regular serializers too.
+    """
+    lean_serializer_class = None
+
+    def use_lean_serializer(self) -> bool:
+        return (
+            self.lean_serializer_class is not None
+            and settings.LEAN_LIST_SERIALIZATION
+            and not self.get_sparse_params()[1]
+        )
+
+    def get_lean_queryset(self, queryset):
+        fields = self.get_sparse_params()[0]
+        lookups = self.lean_serializer_class.get_lookups(fields)
+        if fields is not None:
+            lookups += [
+                name for name in self.get_required_fields()
+                if name not in lookups
+            ]
+        return queryset.prefetch_related(None).values(*lookups)
+
+    def get_lean_serializer(self, rows):
+        return self.lean_serializer_class(
+            rows,
+            context=self.get_serializer_context(),
+            fields=self.get_sparse_params()[0],
+        )
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_lean_serializer():
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.get_lean_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                self.get_lean_serializer(page).data
+            )
+        return Response(self.get_lean_serializer(queryset).data)
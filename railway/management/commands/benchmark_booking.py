@@ -0,0 +1,171 @@
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from railway.booking import SeatsConflict, place_order
+from railway.models import Journey, Route, Station, Train, TrainType
+
+
+class Command(BaseCommand):
+    help = (
+        "Book seats on one journey from many threads at once and report "
+        "throughput and whether every seat was sold at most once. Runs "
+        "against a throwaway test database (the database user needs to "
+        "be allowed to create it), as the threads must see each other's "
+        "commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--orders",
+            type=int,
+            default=50,
+            help="Orders placed by every thread.",
+        )
+        parser.add_argument(
+            "--seats",
+            type=int,
+            default=2,
+            help="Seats requested by every order.",
+        )
+
+    def handle(self, *args, **options):
+        database_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        # The route signals must not add the benchmark route to the
+        # network of the real database.
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            ROUTE_NETWORK_FILE=os.path.join(directory, "network.npy")
+        ):
+            try:
+                journey, user = self.create_fixtures()
+                results = self.run_threads(journey, user, options)
+                self.report(journey, results)
+            finally:
+                connection.creation.destroy_test_db(
+                    database_name, verbosity=0
+                )
+
+    @staticmethod
+    def create_fixtures():
+        train_type = TrainType.objects.create(
+            name=f"Benchmark {time.time_ns()}"
+        )
+        train = Train.objects.create(
+            name="Benchmark train",
+            cargo_num=20,
+            places_in_cargo=100,
+            train_type=train_type,
+        )
+        source = Station.objects.create(
+            name="Benchmark A", latitude=0, longitude=0
+        )
+        destination = Station.objects.create(
+            name="Benchmark B", latitude=1, longitude=1
+        )
+        route = Route.objects.create(
+            name="Benchmark A-B",
+            source=source,
+            destination=destination,
+            distance=100,
+        )
+        departure_time = timezone.now() + timedelta(days=1)
+        journey = Journey.objects.create(
+            route=route,
+            train=train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=2),
+        )
+        user = get_user_model().objects.create_user(
+            email=f"benchmark-{time.time_ns()}@example.com"
+        )
+        return journey, user
+
+    @staticmethod
+    def run_threads(journey, user, options):
+        train = journey.train
+        all_seats = [
+            (cargo, seat)
+            for cargo in range(1, train.cargo_num + 1)
+            for seat in range(1, train.places_in_cargo + 1)
+        ]
+        results = {"booked": 0, "orders": 0, "conflicts": 0}
+        results_lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            booked = orders = conflicts = 0
+            try:
+                for _ in range(options["orders"]):
+                    tickets_data = [
+                        {"journey": journey, "cargo": cargo, "seat": seat}
+                        for cargo, seat in rng.sample(
+                            all_seats, options["seats"]
+                        )
+                    ]
+                    try:
+                        place_order({"user": user}, tickets_data)
+                    except SeatsConflict:
+                        conflicts += 1
+                    else:
+                        orders += 1
+                        booked += len(tickets_data)
+            finally:
+                connection.close()
+            with results_lock:
+                results["booked"] += booked
+                results["orders"] += orders
+                results["conflicts"] += conflicts
+
+        threads = [
+            threading.Thread(target=worker, args=(seed,))
+            for seed in range(options["threads"])
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results["elapsed"] = time.perf_counter() - start
+        return results
+
+    def report(self, journey, results):
+        attempts = results["orders"] + results["conflicts"]
+        self.stdout.write(
+            f"{attempts} orders in {results['elapsed']:.2f}s "
+            f"({attempts / results['elapsed']:.1f} orders/s): "
+            f"{results['orders']} placed, "
+            f"{results['conflicts']} rejected with 409."
+        )
+
+        journey.refresh_from_db()
+        tickets = journey.tickets.count()
+        distinct_seats = (
+            journey.tickets.values("cargo", "seat").distinct().count()
+        )
+        if not (
+            tickets == distinct_seats
+            == results["booked"]
+            == journey.tickets_sold
+        ):
+            raise CommandError(
+                f"Inconsistent booking: {tickets} tickets, "
+                f"{distinct_seats} distinct seats, "
+                f"{results['booked']} seats reported as booked, "
+                f"tickets_sold={journey.tickets_sold}."
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{tickets} seats sold, each exactly once."
+        ))
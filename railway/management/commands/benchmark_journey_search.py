@@ -0,0 +1,172 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import QueryDict
+from django.test import override_settings
+from django.utils import timezone
+
+from railway.models import Journey, Route, Station, Train, TrainType
+from railway.views import JourneyViewSet
+
+BENCHMARK_NAME = "Benchmark search"
+INDEX_MARKERS = ("Index Scan", "Index Only Scan", "USING INDEX")
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill a throwaway test database with --rows journeys and show the "
+        "plans and timings of date-window journey searches (the database "
+        "user needs to be allowed to create the database)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--routes", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        database_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        # The route signals must not add the benchmark routes to the
+        # network of the real database.
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            ROUTE_NETWORK_FILE=os.path.join(directory, "network.npy")
+        ):
+            try:
+                self.benchmark(options)
+            finally:
+                connection.creation.destroy_test_db(
+                    database_name, verbosity=0
+                )
+
+    def benchmark(self, options):
+        routes, trains, start = self.create_fixtures(options)
+        self.fill_journeys(routes, trains, start, options)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Journey._meta.db_table}")
+
+        day = (start + timedelta(days=options["days"] // 2)).date()
+        week_end = day + timedelta(days=6)
+        searches = {
+            "departure on one day": {
+                "departure_after": day.isoformat(),
+                "departure_before": day.isoformat(),
+            },
+            "arrival within a week": {
+                "arrival_after": day.isoformat(),
+                "arrival_before": week_end.isoformat(),
+            },
+        }
+        all_use_index = True
+        for name, params in searches.items():
+            query_params = QueryDict(mutable=True)
+            query_params.update(params)
+            base = JourneyViewSet.filter_by_params(
+                Journey.objects.all(), query_params
+            )
+            for label, queryset in [
+                (name, base),
+                (f"{name}, one route", base.filter(route=routes[0])),
+                (f"{name}, one train", base.filter(train=trains[0])),
+            ]:
+                all_use_index &= self.measure(
+                    label, queryset.order_by("departure_time", "id")[:10],
+                    options["repeat"],
+                )
+
+        if all_use_index:
+            self.stdout.write(self.style.SUCCESS(
+                "All date-window searches use index scans."
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                "Some date-window searches do not use an index."
+            ))
+
+    @staticmethod
+    def create_fixtures(options):
+        train_type = TrainType.objects.create(name=BENCHMARK_NAME)
+        trains = [
+            Train.objects.create(
+                name=f"{BENCHMARK_NAME} {number}",
+                train_type=train_type,
+                cargo_num=10,
+                places_in_cargo=50,
+            )
+            for number in range(10)
+        ]
+        routes = [
+            Route.objects.create(
+                name=f"{BENCHMARK_NAME} {number}",
+                source=Station.objects.create(
+                    name=f"{BENCHMARK_NAME} {number} A",
+                    latitude=0,
+                    longitude=0,
+                ),
+                destination=Station.objects.create(
+                    name=f"{BENCHMARK_NAME} {number} B",
+                    latitude=1,
+                    longitude=1,
+                ),
+                distance=100,
+            )
+            for number in range(options["routes"])
+        ]
+        start = timezone.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        return routes, trains, start
+
+    def fill_journeys(self, routes, trains, start, options):
+        missing = options["rows"]
+        minutes = options["days"] * 24 * 60
+        rng = random.Random(0)
+        while missing > 0:
+            batch = []
+            for _ in range(min(missing, options["batch_size"])):
+                departure_time = start + timedelta(
+                    minutes=rng.randrange(minutes)
+                )
+                route = rng.choice(routes)
+                batch.append(Journey(
+                    route=route,
+                    source_station_id=route.source_id,
+                    destination_station_id=route.destination_id,
+                    train=rng.choice(trains),
+                    departure_time=departure_time,
+                    arrival_time=departure_time + timedelta(
+                        minutes=rng.randrange(30, 24 * 60)
+                    ),
+                ))
+            Journey.objects.bulk_create(batch)
+            missing -= len(batch)
+            self.stdout.write(f"{missing} journeys left to create...")
+
+    def measure(self, label, queryset, repeat) -> bool:
+        plan = queryset.explain()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        uses_index = any(marker in plan for marker in INDEX_MARKERS)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(label))
+        self.stdout.write(plan)
+        self.stdout.write(
+            f"median {statistics.median(timings):.2f} ms, "
+            f"max {max(timings):.2f} ms, "
+            f"index scan: {'yes' if uses_index else 'NO'}\n"
+        )
+        return uses_index
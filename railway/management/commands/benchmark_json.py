@@ -0,0 +1,123 @@
+import io
+import json
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from railway.parsers import ORJSONParser
+from railway.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF's JSONRenderer/JSONParser with the orjson renderer "
+        "and parser on a journey detail page and a bulk ticket order."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100)
+        parser.add_argument("--tickets", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        journeys = self.journey_page(options["rows"])
+        order = json.dumps({
+            "tickets": [
+                {"journey": 1, "cargo": 1 + seat // 100, "seat": seat}
+                for seat in range(options["tickets"])
+            ]
+        }).encode()
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Render {options['rows']} journeys"
+        ))
+        regular = self.measure(
+            "json", lambda: JSONRenderer().render(journeys), options
+        )
+        fast = self.measure(
+            "orjson", lambda: ORJSONRenderer().render(journeys), options
+        )
+        self.compare(
+            json.loads(regular[1]), json.loads(fast[1]), regular, fast
+        )
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Parse an order of {options['tickets']} tickets"
+        ))
+        regular = self.measure(
+            "json", lambda: JSONParser().parse(io.BytesIO(order)), options
+        )
+        fast = self.measure(
+            "orjson", lambda: ORJSONParser().parse(io.BytesIO(order)), options
+        )
+        self.compare(regular[1], fast[1], regular, fast)
+
+    @staticmethod
+    def journey_page(rows) -> dict:
+        """A page shaped like journey detail output.
+
+        Datetimes, ``travel_time`` (a timedelta) and a Decimal are left
+        for the renderers to encode.
+        """
+        start = timezone.now().replace(microsecond=0)
+        return {
+            "next": None,
+            "previous": None,
+            "results": [
+                {
+                    "id": number,
+                    "route": {
+                        "id": number % 20,
+                        "name": f"Route {number % 20}",
+                        "source": "Kyiv-Pasazhyrskyi",
+                        "destination": "Lviv",
+                        "distance": 540,
+                    },
+                    "train": {
+                        "id": number % 30,
+                        "name": f"Intercity {number % 30}",
+                        "train_type": "Intercity+",
+                        "cargo_num": 10,
+                        "places_in_cargo": 60,
+                    },
+                    "departure_time": start + timedelta(hours=number),
+                    "arrival_time": start + timedelta(hours=number + 5),
+                    "travel_time": timedelta(hours=5, minutes=number % 60),
+                    "travel_time_pretty": f"5h {number % 60}m",
+                    "average_price": Decimal("412.50"),
+                    "tickets": [
+                        f"{1 + seat // 60}-{seat}" for seat in range(60)
+                    ],
+                    "crew": [
+                        {"id": crew, "full_name": f"Member {crew}"}
+                        for crew in range(3)
+                    ],
+                }
+                for number in range(rows)
+            ],
+        }
+
+    def compare(self, regular_data, fast_data, regular, fast) -> None:
+        if regular_data != fast_data:
+            raise CommandError("orjson output differs.")
+        self.stdout.write(
+            f"{regular[0] / fast[0]:.1f}x faster, same data\n"
+        )
+
+    def measure(self, label, run, options) -> tuple:
+        timings = []
+        for _ in range(options["repeat"]):
+            start = time.perf_counter()
+            result = run()
+            timings.append((time.perf_counter() - start) * 1000)
+        median = statistics.median(timings)
+        self.stdout.write(
+            f"{label:>10}: median {median:.2f} ms, max {max(timings):.2f} ms"
+        )
+        return median, result
@@ -0,0 +1,138 @@
+import json
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.utils.encoders import JSONEncoder
+
+from railway.models import Crew, Journey, Route, Station, Train, TrainType
+from railway.views import JourneyViewSet, RouteViewSet, TrainViewSet
+
+BENCHMARK_NAME = "Benchmark serializers"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare list pages of --page-size rows built by the regular "
+        "list serializers with the lean values()-based serializers. The "
+        "generated rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        # Rolled back, so neither the rows nor the on-commit work of
+        # their signals (route network, timetable) outlive the run.
+        with transaction.atomic():
+            self.benchmark(options)
+            transaction.set_rollback(True)
+
+    def benchmark(self, options):
+        self.create_fixtures(options["page_size"])
+        request = Request(APIRequestFactory().get("/"))
+
+        for viewset_class in (JourneyViewSet, TrainViewSet, RouteViewSet):
+            view = viewset_class(
+                action="list", request=request, format_kwarg=None, kwargs={}
+            )
+            page = view.get_queryset().order_by("id")[:options["page_size"]]
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(viewset_class.__name__)
+            )
+            regular = self.measure(
+                "serializer",
+                lambda: view.get_serializer(page.all(), many=True).data,
+                options["repeat"],
+            )
+            lean = self.measure(
+                "lean",
+                lambda: view.get_lean_serializer(
+                    view.get_lean_queryset(page.all())
+                ).data,
+                options["repeat"],
+            )
+            if self.encode(regular[1]) != self.encode(lean[1]):
+                raise CommandError(
+                    f"{viewset_class.__name__}: lean output differs."
+                )
+            self.stdout.write(
+                f"{regular[0] / lean[0]:.1f}x faster, identical output\n"
+            )
+
+    @staticmethod
+    def encode(data) -> str:
+        return json.dumps(data, cls=JSONEncoder)
+
+    @staticmethod
+    def create_fixtures(rows):
+        train_type, _ = TrainType.objects.get_or_create(name=BENCHMARK_NAME)
+        for model, create in [
+            (Train, lambda number: Train.objects.create(
+                name=f"{BENCHMARK_NAME} {number}",
+                train_type=train_type,
+                cargo_num=10,
+                places_in_cargo=50,
+            )),
+            (Route, lambda number: Route.objects.create(
+                name=f"{BENCHMARK_NAME} {number}",
+                source=Station.objects.create(
+                    name=f"{BENCHMARK_NAME} {number} A",
+                    latitude=0,
+                    longitude=0,
+                ),
+                destination=Station.objects.create(
+                    name=f"{BENCHMARK_NAME} {number} B",
+                    latitude=1,
+                    longitude=1,
+                ),
+                distance=100,
+            )),
+        ]:
+            for number in range(model.objects.count(), rows):
+                create(number)
+
+        missing = rows - Journey.objects.count()
+        if missing <= 0:
+            return
+        crew = [
+            Crew.objects.get_or_create(
+                first_name=f"Member {number}", last_name=BENCHMARK_NAME
+            )[0]
+            for number in range(10)
+        ]
+        routes, trains = list(Route.objects.all()), list(Train.objects.all())
+        rng = random.Random(0)
+        start = timezone.now()
+        for _ in range(missing):
+            route = rng.choice(routes)
+            departure_time = start + timedelta(minutes=rng.randrange(10_000))
+            journey = Journey.objects.create(
+                route=route,
+                train=rng.choice(trains),
+                departure_time=departure_time,
+                arrival_time=departure_time + timedelta(
+                    minutes=rng.randrange(30, 24 * 60)
+                ),
+            )
+            journey.crew.set(rng.sample(crew, 2))
+
+    def measure(self, label, serialize, repeat) -> tuple:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = serialize()
+            timings.append((time.perf_counter() - start) * 1000)
+        median = statistics.median(timings)
+        self.stdout.write(
+            f"{label:>10}: median {median:.2f} ms, "
+            f"max {max(timings):.2f} ms, {len(data)} rows"
+        )
+        return median, data
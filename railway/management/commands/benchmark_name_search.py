@@ -0,0 +1,99 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from railway.models import Station
+from railway.search import search_by_name
+
+BENCHMARK_PREFIX = "Benchmark"
+SYLLABLES = [
+    "ky", "iv", "lviv", "od", "esa", "khar", "kiv", "dni", "pro",
+    "zap", "or", "izh", "ter", "no", "pil", "uzh", "hor", "od", "vin",
+    "ny", "tsia", "chern", "ihiv", "sum", "y", "pol", "tava", "rivne",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare station name search through plain icontains with the "
+        "trigram-indexed search_by_name on --rows stations of a throwaway "
+        "test database (the database user needs to be allowed to create "
+        "it)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--terms",
+            nargs="+",
+            default=["lviv", "lviw", "kharkiv", "kharkov", "tava"],
+        )
+
+    def handle(self, *args, **options):
+        database_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            self.benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(database_name, verbosity=0)
+
+    def benchmark(self, options):
+        self.fill_stations(options["rows"])
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Station._meta.db_table}")
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{connection.vendor} has no trigram support: "
+                "search_by_name falls back to icontains."
+            ))
+
+        for term in options["terms"]:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"term: {term!r}"))
+            self.measure(
+                "icontains",
+                Station.objects.filter(name__icontains=term)[:10],
+                options["repeat"],
+            )
+            self.measure(
+                "trigram",
+                search_by_name(Station.objects.all(), term, rank=True)[:10],
+                options["repeat"],
+            )
+
+    def fill_stations(self, rows):
+        missing = rows
+        rng = random.Random(0)
+        while missing > 0:
+            batch = [
+                Station(
+                    name=f"{BENCHMARK_PREFIX} " + "".join(
+                        rng.choice(SYLLABLES)
+                        for _ in range(rng.randint(2, 4))
+                    ).capitalize(),
+                    latitude=rng.uniform(44, 52),
+                    longitude=rng.uniform(22, 40),
+                )
+                for _ in range(min(missing, 10_000))
+            ]
+            Station.objects.bulk_create(batch)
+            missing -= len(batch)
+
+    def measure(self, label, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(
+            f"{label:>10}: median {statistics.median(timings):.2f} ms, "
+            f"{len(results)} results, "
+            f"first: {[station.name for station in results[:3]]}"
+        )
+        self.stdout.write(queryset.explain())
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from railway.network import route_network
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the all-pairs shortest-distance matrix of the route "
+        "network and store it at ROUTE_NETWORK_FILE. Deleted or longer "
+        "routes only mark the matrix stale, so run this with --interval "
+        "alongside the server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help=(
+                "Keep running, rebuilding the matrix when it is missing "
+                "or stale, checked every N seconds."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["interval"] is None:
+            self.build()
+            return
+        while True:
+            if route_network.is_stale():
+                self.build()
+            time.sleep(options["interval"])
+
+    def build(self) -> None:
+        start = time.perf_counter()
+        route_network.rebuild()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Built the route network in {elapsed:.2f}s "
+            f"({route_network.path})."
+        ))
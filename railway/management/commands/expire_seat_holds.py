@@ -0,0 +1,65 @@
+import time
+
+from django.db import transaction
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from railway.booking import lock_journeys, release_holds
+from railway.models import SeatHold
+
+
+class Command(BaseCommand):
+    help = (
+        "Release expired seat holds in batches. Expired holds keep "
+        "counting against tickets_available until they are released, so "
+        "run this with --interval (or from cron) alongside the server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Holds released per transaction.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Keep running, releasing expired holds every N seconds.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = self.release_expired(options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(
+                f"Released {released} expired seat holds."
+            ))
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
+
+    @staticmethod
+    def release_expired(batch_size: int) -> int:
+        now = timezone.now()
+        expired = SeatHold.objects.filter(expires_at__lte=now)
+        released = 0
+
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    expired
+                    .order_by("expires_at")
+                    .values_list("pk", "journey_id")[:batch_size]
+                )
+                if not batch:
+                    break
+                lock_journeys({journey_id for _, journey_id in batch})
+                released += release_holds(
+                    expired
+                    .filter(pk__in=[pk for pk, _ in batch])
+                    .values("pk")
+                )
+            if len(batch) < batch_size:
+                break
+        return released
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.core.management.base import BaseCommand
+
+from railway.cache import bump_all_versions
+from railway.models import HeldSeat, Journey, Ticket
+
+
+def count_per_journey(model) -> Subquery:
+    return Subquery(
+        model.objects
+        .filter(journey=OuterRef("pk"))
+        .order_by()
+        .values("journey")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the stored seats-sold and seats-held counters "
+        "of every journey from the Ticket and HeldSeat tables."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Journey.objects.update(
+                tickets_sold=Coalesce(count_per_journey(Ticket), 0),
+                seats_held=Coalesce(count_per_journey(HeldSeat), 0),
+            )
+            bump_all_versions(Journey)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt seat counters for {updated} journeys."
+        ))
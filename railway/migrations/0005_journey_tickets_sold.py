@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-17 05:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_tickets_sold(apps, schema_editor):
+    Journey = apps.get_model("railway", "Journey")
+    Ticket = apps.get_model("railway", "Ticket")
+    sold = (
+        Ticket.objects
+        .filter(journey=OuterRef("pk"))
+        .order_by()
+        .values("journey")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    Journey.objects.update(tickets_sold=Coalesce(Subquery(sold), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railway", "0004_train_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journey",
+            name="tickets_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_tickets_sold, migrations.RunPython.noop),
+    ]
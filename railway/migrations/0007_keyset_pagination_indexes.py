@@ -0,0 +1,42 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railway", "0006_seat_holds"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="journey",
+            options={"ordering": ["departure_time", "id"]},
+        ),
+        migrations.AlterModelOptions(
+            name="order",
+            options={"ordering": ["created_at", "id"]},
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["departure_time", "id"], name="railway_jou_departu_454423_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["created_at", "id"], name="railway_ord_created_a23540_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["user", "created_at", "id"],
+                name="railway_ord_user_id_862e60_idx",
+            ),
+        ),
+    ]
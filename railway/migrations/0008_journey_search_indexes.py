@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railway", "0007_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["route", "departure_time"],
+                name="railway_jou_route_i_78ce70_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["train", "departure_time"],
+                name="railway_jou_train_i_28a29e_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["arrival_time"], name="railway_jou_arrival_f14ac8_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-17 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railway", "0009_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="route",
+            index=models.Index(
+                fields=["source", "destination"], name="railway_rou_source__9b1b4f_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.3 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_station_columns(apps, schema_editor):
+    Journey = apps.get_model("railway", "Journey")
+    Route = apps.get_model("railway", "Route")
+    route = Route.objects.filter(pk=OuterRef("route_id"))
+    Journey.objects.update(
+        source_station_id=Subquery(route.values("source_id")),
+        destination_station_id=Subquery(route.values("destination_id")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railway", "0010_route_source_destination_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="journey",
+            name="source_station",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="departures",
+                to="railway.station",
+            ),
+        ),
+        migrations.AddField(
+            model_name="journey",
+            name="destination_station",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="arrivals",
+                to="railway.station",
+            ),
+        ),
+        migrations.RunPython(fill_station_columns, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="journey",
+            name="source_station",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="departures",
+                to="railway.station",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="journey",
+            name="destination_station",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="arrivals",
+                to="railway.station",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["source_station", "departure_time"],
+                include=("arrival_time", "destination_station", "train"),
+                name="journey_departures_board_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["destination_station", "arrival_time"],
+                include=("departure_time", "source_station", "train"),
+                name="journey_arrivals_board_idx",
+            ),
+        ),
+    ]
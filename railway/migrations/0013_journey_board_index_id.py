@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-17 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railway", "0012_invalidationevent"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="journey",
+            name="journey_departures_board_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="journey",
+            name="journey_arrivals_board_idx",
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["source_station", "departure_time", "id"],
+                include=("arrival_time", "destination_station", "train"),
+                name="journey_departures_board_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["destination_station", "arrival_time", "id"],
+                include=("departure_time", "source_station", "train"),
+                name="journey_arrivals_board_idx",
+            ),
+        ),
+    ]
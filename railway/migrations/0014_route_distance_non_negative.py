@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3 on 2026-10-17 08:17
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("railway", "0013_journey_board_index_id"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="route",
+            name="distance",
+            field=models.IntegerField(
+                validators=[django.core.validators.MinValueValidator(0)]
+            ),
+        ),
+    ]
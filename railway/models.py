@@ -3,10 +3,12 @@ import uuid
 from datetime import timedelta
 
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.utils.text import slugify
 
+from railway.cache import bump_version
 from train_station import settings
 
 MAX_CARGO_NUM = 20
@@ -94,7 +96,26 @@ class Route(models.Model):
         on_delete=models.CASCADE,
         related_name="routes_to",
     )
-    distance = models.IntegerField()
+    distance = models.IntegerField(validators=[MinValueValidator(0)])
+
+    def save(self, *args, **kwargs):
+        # One transaction, so that the on-commit work of the post_save
+        # signals (timetable, invalidation) sees the synced journeys.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            # Keep the station columns copied onto journeys in sync.
+            self.journeys.exclude(
+                source_station_id=self.source_id,
+                destination_station_id=self.destination_id,
+            ).update(
+                source_station_id=self.source_id,
+                destination_station_id=self.destination_id,
+            )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["source", "destination"]),
+        ]
 
     def __str__(self):
         return self.name
@@ -114,11 +135,60 @@ class Journey(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
     crew = models.ManyToManyField(Crew, related_name="journeys")
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    seats_held = models.PositiveIntegerField(default=0, editable=False)
+    # Copies of route.source / route.destination for the station boards.
+    source_station = models.ForeignKey(
+        Station,
+        on_delete=models.CASCADE,
+        related_name="departures",
+        editable=False,
+        db_index=False,
+    )
+    destination_station = models.ForeignKey(
+        Station,
+        on_delete=models.CASCADE,
+        related_name="arrivals",
+        editable=False,
+        db_index=False,
+    )
 
     @property
     def travel_time(self) -> timedelta:
         return self.arrival_time - self.departure_time
 
+    @staticmethod
+    def tickets_available_expression() -> models.Expression:
+        """Seats neither sold nor held, to annotate journeys with."""
+        return (
+            models.F("train__cargo_num") * models.F("train__places_in_cargo")
+            - models.F("tickets_sold")
+            - models.F("seats_held")
+        )
+
+    @staticmethod
+    def add_tickets_sold(journey_id: int, delta: int) -> None:
+        """Atomically shift the stored seats-sold counter of a journey."""
+        Journey.objects.filter(pk=journey_id).update(
+            tickets_sold=models.F("tickets_sold") + delta
+        )
+        bump_version(Journey, journey_id)
+
+    @staticmethod
+    def add_seats_held(journey_id: int, delta: int) -> None:
+        """Atomically shift the stored seats-held counter of a journey."""
+        Journey.objects.filter(pk=journey_id).update(
+            seats_held=models.F("seats_held") + delta
+        )
+        bump_version(Journey, journey_id)
+
+    def taken_seats(self) -> models.QuerySet:
+        """(cargo, seat) pairs that are sold or held."""
+        return (
+            self.tickets.order_by().values_list("cargo", "seat")
+            .union(self.held_seats.order_by().values_list("cargo", "seat"))
+        )
+
     def clean(self):
         if self.arrival_time <= self.departure_time:
             raise ValidationError({
@@ -126,11 +196,32 @@ class Journey(models.Model):
             })
 
     def save(self, *args, **kwargs):
+        if self.route_id is not None:
+            self.source_station_id = self.route.source_id
+            self.destination_station_id = self.route.destination_id
         self.full_clean()
         super().save(*args, **kwargs)
 
     class Meta:
-        ordering = ["departure_time"]
+        ordering = ["departure_time", "id"]
+        indexes = [
+            models.Index(fields=["departure_time", "id"]),
+            models.Index(fields=["route", "departure_time"]),
+            models.Index(fields=["train", "departure_time"]),
+            models.Index(fields=["arrival_time"]),
+            # Station boards, ordered by (time, id); the included columns
+            # make them index-only.
+            models.Index(
+                fields=["source_station", "departure_time", "id"],
+                include=["arrival_time", "destination_station", "train"],
+                name="journey_departures_board_idx",
+            ),
+            models.Index(
+                fields=["destination_station", "arrival_time", "id"],
+                include=["departure_time", "source_station", "train"],
+                name="journey_arrivals_board_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Route: {self.route.name} Train: {self.train.name}"
@@ -145,7 +236,11 @@ class Order(models.Model):
     )
 
     class Meta:
-        ordering = ['created_at']
+        ordering = ["created_at", "id"]
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["user", "created_at", "id"]),
+        ]
 
     def __str__(self):
         user_name = f"{self.user.first_name} {self.user.last_name}"
@@ -214,3 +309,118 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ("journey", "cargo", "seat")
         ordering = ["cargo", "seat"]
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def delete(self):
+        """Delete the holds and free their seats, one UPDATE per journey.
+
+        Held seats send no ``post_delete``, so that the cascade removes
+        them in one query.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            # Count and delete the same rows, whatever commits meanwhile.
+            holds = self.model.objects.filter(
+                pk__in=list(self.values_list("pk", flat=True))
+            )
+            HeldSeat.objects.filter(hold__in=holds).free_seats()
+            return super(SeatHoldQuerySet, holds).delete()
+
+
+class SeatHold(models.Model):
+    journey = models.ForeignKey(
+        Journey,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at <= timezone.now()
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using, savepoint=False):
+            self.seats.all().free_seats()
+            return super().delete(using, keep_parents)
+
+    class Meta:
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"Hold(№{self.id}) {self.journey} until {self.expires_at}"
+
+
+class HeldSeatQuerySet(models.QuerySet):
+    def free_seats(self) -> None:
+        """Take the seats off the seats-held counters of their journeys."""
+        counts = (
+            self.order_by()
+            .values("journey_id")
+            .annotate(count=models.Count("pk"))
+            .values_list("journey_id", "count")
+        )
+        for journey_id, count in counts:
+            Journey.add_seats_held(journey_id, -count)
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            seats = self.model.objects.filter(
+                pk__in=list(self.values_list("pk", flat=True))
+            )
+            seats.free_seats()
+            return super(HeldSeatQuerySet, seats).delete()
+
+
+class HeldSeat(models.Model):
+    cargo = models.IntegerField()
+    seat = models.IntegerField()
+    journey = models.ForeignKey(
+        Journey,
+        on_delete=models.CASCADE,
+        related_name="held_seats",
+    )
+    hold = models.ForeignKey(
+        SeatHold,
+        on_delete=models.CASCADE,
+        related_name="seats",
+    )
+
+    objects = HeldSeatQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.journey} (cargo: {self.cargo} seat: {self.seat})"
+
+    def delete(self, using=None, keep_parents=False):
+        with transaction.atomic(using=using, savepoint=False):
+            Journey.add_seats_held(self.journey_id, -1)
+            return super().delete(using, keep_parents)
+
+    class Meta:
+        unique_together = ("journey", "cargo", "seat")
+        ordering = ["cargo", "seat"]
+
+
+class InvalidationEvent(models.Model):
+    """Cache invalidation event for databases without LISTEN/NOTIFY.
+
+    Workers poll this table instead of listening for notifications when
+    the database is not PostgreSQL (e.g. SQLite test runs); see
+    railway/invalidation.py.
+    """
+    payload = models.CharField(max_length=8000)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return self.payload
@@ -0,0 +1,249 @@
+import fcntl
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from railway.models import Route, Station
+
+# Marks "no path" in the stored int32 matrices; route distances are
+# validated to be non-negative, so it is never a real distance.
+UNREACHABLE = -1
+
+
+class NetworkNotBuilt(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = (
+        "The route network is being built, please try again later."
+    )
+    default_code = "network_not_built"
+
+
+def floyd_warshall(distance: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """All-pairs shortest distances and next hops of a weighted digraph.
+
+    ``distance`` is an (n, n) float matrix of direct edge weights with
+    ``inf`` where there is no edge. Each of the n relaxation steps is one
+    vectorized pass over the whole matrix. Returns the distances and the
+    index of the first station after ``i`` on the path ``i -> j`` (-1 if
+    there is none).
+    """
+    distance = distance.astype(np.float64, copy=True)
+    n = len(distance)
+    np.fill_diagonal(distance, 0)
+    next_hop = np.where(
+        np.isfinite(distance), np.arange(n)[None, :], UNREACHABLE
+    ).astype(np.int32)
+    for k in range(n):
+        through_k = distance[:, k, None] + distance[None, k, :]
+        improved = through_k < distance
+        np.copyto(distance, through_k, where=improved)
+        np.copyto(
+            next_hop,
+            np.broadcast_to(next_hop[:, k, None], next_hop.shape),
+            where=improved,
+        )
+    return distance, next_hop
+
+
+class RouteNetwork:
+    """Shortest rail distances between all pairs of stations.
+
+    The matrices are stored in one int32 ``.npy`` file at
+    ``ROUTE_NETWORK_FILE`` and memory-mapped by every process:
+
+    * row 0 holds the station ids of the matrix rows/columns,
+    * rows 1..n the distances (``UNREACHABLE`` when there is no path),
+    * rows n+1..2n the next-hop station indexes.
+
+    Routes are one-way, from ``source`` to ``destination``, as for
+    journeys. A new route or a shorter distance is applied in O(n^2).
+    Deleting a route or making it longer needs an O(n^3) recomputation:
+    it only marks the matrix stale, and the ``build_route_network``
+    command rebuilds it outside of requests; lookups serve the previous
+    matrix meanwhile. The file is replaced atomically, and other
+    processes pick up the new file on their next lookup.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = None
+        self._file_id = None
+
+    @property
+    def path(self) -> Path:
+        return Path(settings.ROUTE_NETWORK_FILE)
+
+    @property
+    def stale_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.stale")
+
+    @contextmanager
+    def _writing(self):
+        """Serialize writers across threads and processes."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _save(self, station_ids, distance, next_hop) -> None:
+        n = len(station_ids)
+        distance = np.where(np.isfinite(distance), distance, UNREACHABLE)
+        data = np.empty((2 * n + 1, n), dtype=np.int32)
+        data[0] = station_ids
+        data[1:n + 1] = distance
+        data[n + 1:] = next_hop
+        temporary = self.path.with_name(f"{self.path.name}.{os.getpid()}")
+        with open(temporary, "wb") as file:
+            np.save(file, data)
+        os.replace(temporary, self.path)
+
+    def _read(self):
+        """Return (station ids, index by id, distances, next hops)."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        file_id = (str(self.path), stat.st_ino, stat.st_mtime_ns)
+        if file_id != self._file_id:
+            data = np.load(self.path, mmap_mode="r")
+            n = data.shape[1]
+            station_ids = np.asarray(data[0])
+            self._loaded = (
+                station_ids,
+                {int(station_id): index
+                 for index, station_id in enumerate(station_ids)},
+                data[1:n + 1],
+                data[n + 1:],
+            )
+            self._file_id = file_id
+        return self._loaded
+
+    def _load(self):
+        loaded = self._read()
+        if loaded is None:
+            raise NetworkNotBuilt()
+        return loaded
+
+    @staticmethod
+    def _edges() -> tuple[np.ndarray, np.ndarray]:
+        station_ids = np.array(
+            Station.objects.order_by("id").values_list("id", flat=True),
+            dtype=np.int32,
+        )
+        index = {
+            int(station_id): i for i, station_id in enumerate(station_ids)
+        }
+        distance = np.full((len(station_ids),) * 2, np.inf)
+        for source, destination, length in Route.objects.values_list(
+            "source_id", "destination_id", "distance"
+        ):
+            i, j = index[source], index[destination]
+            distance[i, j] = min(distance[i, j], length)
+        return station_ids, distance
+
+    def rebuild(self) -> None:
+        """Recompute the whole matrix from the database."""
+        with self._writing():
+            # Cleared before the routes are read: routes changed from
+            # now on mark the rebuilt matrix stale again.
+            self.stale_path.unlink(missing_ok=True)
+            station_ids, distance = self._edges()
+            self._save(station_ids, *floyd_warshall(distance))
+
+    def is_stale(self) -> bool:
+        """Whether the matrix is missing or needs a rebuild."""
+        return self.stale_path.exists() or not self.path.exists()
+
+    def mark_stale(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.stale_path.touch()
+
+    def schedule_rebuild(self) -> None:
+        """Mark the matrix stale once the current transaction commits."""
+        transaction.on_commit(self.mark_stale)
+
+    def add_route(self, source: int, destination: int, length: int) -> None:
+        """Apply a new or shortened route to the matrix in O(n^2)."""
+        with self._writing():
+            loaded = self._read()
+            if loaded is None:
+                return
+            station_ids, index, stored_distance, stored_next = loaded
+            station_ids = np.asarray(station_ids)
+            distance = np.where(
+                stored_distance == UNREACHABLE, np.inf, stored_distance
+            )
+            next_hop = np.array(stored_next)
+
+            missing = [
+                station_id
+                for station_id in (source, destination)
+                if station_id not in index
+            ]
+            if missing:
+                station_ids, distance, next_hop = self._grow(
+                    station_ids, distance, next_hop, sorted(set(missing))
+                )
+                index = {
+                    int(station_id): i
+                    for i, station_id in enumerate(station_ids)
+                }
+
+            u, v = index[source], index[destination]
+            through = distance[:, u, None] + length + distance[None, v, :]
+            improved = through < distance
+            if improved.any():
+                first_hop = next_hop[:, u].copy()
+                first_hop[u] = v
+                np.copyto(distance, through, where=improved)
+                np.copyto(
+                    next_hop,
+                    np.broadcast_to(first_hop[:, None], next_hop.shape),
+                    where=improved,
+                )
+            if missing or improved.any():
+                self._save(station_ids, distance, next_hop)
+
+    @staticmethod
+    def _grow(station_ids, distance, next_hop, new_ids):
+        n, extra = len(station_ids), len(new_ids)
+        size = n + extra
+        grown_distance = np.full((size, size), np.inf)
+        grown_distance[:n, :n] = distance
+        grown_next = np.full((size, size), UNREACHABLE, dtype=np.int32)
+        grown_next[:n, :n] = next_hop
+        for i in range(n, size):
+            grown_distance[i, i] = 0
+            grown_next[i, i] = i
+        return (
+            np.concatenate([station_ids, np.array(new_ids, dtype=np.int32)]),
+            grown_distance,
+            grown_next,
+        )
+
+    def shortest(self, source: int, destination: int):
+        """Return (distance, station ids on the path), or (None, [])."""
+        if source == destination:
+            return 0, [source]
+        station_ids, index, distance, next_hop = self._load()
+        i, j = index.get(source), index.get(destination)
+        if i is None or j is None or distance[i, j] == UNREACHABLE:
+            return None, []
+        path = [source]
+        while i != j:
+            i = int(next_hop[i, j])
+            path.append(int(station_ids[i]))
+        return int(distance[index[source], j]), path
+
+
+route_network = RouteNetwork()
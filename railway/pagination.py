@@ -0,0 +1,112 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination keyed on a unique ``(ordering field, id)`` pair.
+
+    DRF's CursorPagination positions the cursor on the first ordering
+    field only and skips rows sharing that value with an OFFSET. Keying
+    on the full pair keeps every page a range scan over the matching
+    ``(field, id)`` index and never needs a ``COUNT(*)``.
+    """
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+    @property
+    def key_field(self) -> str:
+        return self.ordering[0]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        field = self.key_field
+        if reverse:
+            queryset = queryset.order_by(f"-{field}", "-id")
+        else:
+            queryset = queryset.order_by(field, "id")
+
+        if position is not None:
+            value, pk = self._parse_position(queryset.model, position)
+            if reverse:
+                queryset = queryset.filter(
+                    Q(**{f"{field}__lt": value})
+                    | Q(**{field: value, "id__lt": pk}),
+                    **{f"{field}__lte": value},
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f"{field}__gt": value})
+                    | Q(**{field: value, "id__gt": pk}),
+                    **{f"{field}__gte": value},
+                )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if (self.has_next or self.has_previous) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _parse_position(self, model, position: str) -> tuple:
+        field = model._meta.get_field(self.key_field)
+        try:
+            value, pk = position.rsplit("|", 1)
+            return field.to_python(value), int(pk)
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            value, pk = instance[self.key_field], instance["id"]
+        else:
+            value, pk = getattr(instance, self.key_field), instance.id
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        return f"{value}|{pk}"
+
+    def _link(self, instance, reverse: bool):
+        position = (
+            self._get_position_from_instance(instance, self.ordering)
+            if instance is not None
+            else self.cursor.position
+        )
+        return self.encode_cursor(
+            Cursor(offset=0, reverse=reverse, position=position)
+        )
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(self.page[-1] if self.page else None, False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._link(self.page[0] if self.page else None, True)
+
+
+class JourneyPagination(KeysetPagination):
+    ordering = ("departure_time", "id")
+
+
+class OrderPagination(KeysetPagination):
+    ordering = ("created_at", "id")
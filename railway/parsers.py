@@ -0,0 +1,30 @@
+import codecs
+
+import orjson
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from railway.renderers import ORJSONRenderer
+
+
+class ORJSONParser(BaseParser):
+    """JSON parser on top of orjson.
+
+    Like ``rest_framework.parsers.JSONParser`` with ``STRICT_JSON``:
+    ``NaN`` and ``Infinity`` are rejected. UTF-8 bodies are decoded
+    straight from bytes.
+    """
+    media_type = "application/json"
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        body = stream.read()
+        try:
+            if codecs.lookup(encoding).name != "utf-8":
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (orjson.JSONDecodeError, UnicodeDecodeError) as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,99 @@
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Types orjson does not encode itself (timedelta, Decimal, querysets,
+# generators, ...) are converted the way DRF's JSONRenderer does.
+_default = JSONEncoder().default
+
+
+class ORJSONRenderer(BaseRenderer):
+    """JSON renderer on top of orjson.
+
+    A drop-in replacement for ``rest_framework.renderers.JSONRenderer``:
+    datetimes are encoded by orjson itself (UTC as ``Z``, with full
+    microseconds), ``timedelta`` as seconds (``Journey.travel_time``)
+    and ``Decimal`` as a number, like DRF does. ``indent`` (from the
+    Accept header or the browsable API) gives two-space indentation.
+    """
+    media_type = "application/json"
+    format = "json"
+    charset = None
+    options = orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY
+
+    def get_indent(self, accepted_media_type, renderer_context) -> bool:
+        if accepted_media_type:
+            params = accepted_media_type.split(";")[1:]
+            if any(
+                param.strip().startswith("indent=") for param in params
+            ):
+                return True
+        return bool(renderer_context.get("indent"))
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        options = self.options
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        ret = orjson.dumps(data, default=_default, option=options)
+        # Escaped by JSONRenderer too: valid JSON, but not valid JavaScript.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+def columnar(items: list) -> dict:
+    """Turn a list of dicts into ``columns``, ``dictionaries`` and ``rows``.
+
+    String columns with repeated values are dictionary-encoded: each
+    distinct value is listed once in ``dictionaries[column]`` and the
+    rows hold its index there (nulls stay null).
+    """
+    columns = list(items[0]) if items else []
+    rows = [[item[column] for column in columns] for item in items]
+    dictionaries = {}
+    for index, column in enumerate(columns):
+        values = [row[index] for row in rows if row[index] is not None]
+        if not all(isinstance(value, str) for value in values):
+            continue
+        codes = {}
+        for value in values:
+            codes.setdefault(value, len(codes))
+        if len(codes) == len(values):
+            continue
+        for row in rows:
+            if row[index] is not None:
+                row[index] = codes[row[index]]
+        dictionaries[column] = list(codes)
+    return {"columns": columns, "dictionaries": dictionaries, "rows": rows}
+
+
+class CompactJSONRenderer(ORJSONRenderer):
+    """Columnar JSON for list responses.
+
+    Opted into with ``Accept: application/vnd.railway.compact+json`` or
+    ``?format=compact``. A list of objects, or the ``results`` of a
+    page, is rendered by ``columnar``, so field names are sent once per
+    page instead of once per row; pagination keys are kept. Any other
+    response (details, errors) is rendered as plain JSON.
+    """
+    media_type = "application/vnd.railway.compact+json"
+    format = "compact"
+
+    @staticmethod
+    def _is_objects(items) -> bool:
+        return isinstance(items, list) and all(
+            isinstance(item, dict) for item in items
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if self._is_objects(data):
+            data = columnar(data)
+        elif isinstance(data, dict) and self._is_objects(data.get("results")):
+            data = {
+                **{key: value for key, value in data.items()
+                   if key != "results"},
+                **columnar(data["results"]),
+            }
+        return super().render(data, accepted_media_type, renderer_context)
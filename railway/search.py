@@ -0,0 +1,132 @@
+import threading
+import unicodedata
+from bisect import bisect_left
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.db.models.functions import Upper
+
+from railway.models import Station
+
+
+def search_by_name(
+    queryset: QuerySet, term: str, field: str = "name", rank: bool = False
+) -> QuerySet:
+    """Filter a queryset by a fuzzy, typo-tolerant match on a name column.
+
+    On PostgreSQL the filter is ``UPPER(field) %> term`` (word
+    similarity of at least ``pg_trgm.word_similarity_threshold``, set
+    per connection in ``DATABASES``) or Django's
+    ``UPPER(field) LIKE UPPER('%term%')``; both are served by the pg_trgm
+    GIN index on ``UPPER(field)`` (see migration 0009), so no sequential
+    scan is needed. With
+    ``rank=True`` results are ordered by word similarity to the term.
+    Other databases (SQLite test runs) fall back to ``icontains``.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.filter(**{f"{field}__icontains": term})
+
+    queryset = queryset.alias(search_name=Upper(field)).filter(
+        Q(search_name__trigram_word_similar=term)
+        | Q(**{f"{field}__icontains": term})
+    )
+    if rank:
+        queryset = queryset.annotate(
+            similarity=TrigramWordSimilarity(term, field)
+        ).order_by("-similarity", field, "pk")
+    return queryset
+
+
+# Latin letters that Unicode does not decompose into base + accent.
+_UNDECOMPOSED = str.maketrans({"ł": "l", "đ": "d", "ø": "o"})
+
+
+def normalize_name(name: str) -> str:
+    """Case- and accent-insensitive form of a name for prefix matching."""
+    decomposed = unicodedata.normalize(
+        "NFKD", name.casefold().translate(_UNDECOMPOSED)
+    )
+    return " ".join(
+        "".join(
+            char for char in decomposed if not unicodedata.combining(char)
+        ).replace("-", " ").split()
+    )
+
+
+class NameAutocomplete:
+    """In-memory prefix index of station names for typeahead.
+
+    Every word start of a normalized name is a key in one sorted list,
+    so the stations matching a prefix are a contiguous slice found with
+    ``bisect``. The index is loaded with one query on first use and
+    dropped by ``invalidate`` (Station signals, after commit). An index
+    built while ``invalidate`` ran serves the current call only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._index = None
+
+    @staticmethod
+    def _build() -> tuple:
+        names, inner_words = [], []
+        for station_id, name in Station.objects.values_list("id", "name"):
+            words = normalize_name(name).split(" ")
+            names.append((" ".join(words), station_id, name))
+            inner_words.extend(
+                (" ".join(words[start:]), station_id, name)
+                for start in range(1, len(words))
+            )
+        names.sort()
+        inner_words.sort()
+        return (
+            ([entry[0] for entry in names], names),
+            ([entry[0] for entry in inner_words], inner_words),
+        )
+
+    def _get_index(self) -> tuple:
+        index = self._index
+        if index is None:
+            with self._lock:
+                index = self._index
+                if index is None:
+                    generation = self._generation
+                    index = self._index = self._build()
+                    # Checked after storing, as invalidate() takes no lock.
+                    if self._generation != generation:
+                        self._index = None
+        return index
+
+    def complete(self, prefix: str, limit: int) -> list[dict]:
+        """Stations whose name or a word of it starts with ``prefix``.
+
+        Names starting with the prefix come first, then names with an
+        inner word starting with it, each group in normalized name
+        order. Costs one ``bisect`` per group plus ``limit`` steps.
+        """
+        prefix = normalize_name(prefix)
+        if not prefix:
+            return []
+        stations, seen = [], set()
+        for keys, entries in self._get_index():
+            position = bisect_left(keys, prefix)
+            while (
+                len(stations) < limit
+                and position < len(keys)
+                and keys[position].startswith(prefix)
+            ):
+                _, station_id, name = entries[position]
+                if station_id not in seen:
+                    seen.add(station_id)
+                    stations.append({"id": station_id, "name": name})
+                position += 1
+        return stations
+
+
+station_autocomplete = NameAutocomplete()
@@ -1,7 +1,18 @@
-from django.db import transaction
+import base64
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Prefetch
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from railway.booking import create_hold, place_order
+from railway.fieldsets import (
+    Expansion,
+    FieldQuery,
+    SparseFieldsetSerializerMixin,
+)
+from railway.lean import LeanListSerializer
 from railway.models import (
     Crew,
     TrainType,
@@ -10,7 +21,9 @@ from railway.models import (
     Route,
     Journey,
     Order,
-    Ticket
+    Ticket,
+    SeatHold,
+    HeldSeat,
 )
 
 
@@ -70,7 +83,7 @@ class TrainSerializer(serializers.ModelSerializer):
         ]
 
 
-class TrainListSerializer(TrainSerializer):
+class TrainListSerializer(SparseFieldsetSerializerMixin, TrainSerializer):
     type = serializers.SlugRelatedField(
         source="train_type",
         slug_field="name",
@@ -88,6 +101,22 @@ class TrainListSerializer(TrainSerializer):
             "capacity",
             "image"
         ]
+        field_queries = {
+            "type": FieldQuery(
+                only=("train_type__name",), select_related=("train_type",)
+            ),
+            "capacity": FieldQuery(only=("cargo_num", "places_in_cargo")),
+        }
+        expandable = {
+            "type": Expansion(
+                TrainTypeSerializer,
+                FieldQuery(
+                    only=("train_type__name",),
+                    select_related=("train_type",),
+                ),
+                source="train_type",
+            ),
+        }
 
 
 class TrainDetailSerializer(TrainSerializer):
@@ -115,6 +144,22 @@ class StationListSerializer(StationSerializer):
         ]
 
 
+class StationDistanceSerializer(StationSerializer):
+    distance = serializers.FloatField(
+        read_only=True, help_text="Great-circle distance in km."
+    )
+
+    class Meta:
+        model = Station
+        fields = [
+            "id",
+            "name",
+            "latitude",
+            "longitude",
+            "distance",
+        ]
+
+
 class StationDetailSerializer(StationSerializer):
     routes_from = serializers.SlugRelatedField(
         many=True,
@@ -152,7 +197,7 @@ class RouteSerializer(serializers.ModelSerializer):
         ]
 
 
-class RouteListSerializer(RouteSerializer):
+class RouteListSerializer(SparseFieldsetSerializerMixin, RouteSerializer):
     source = serializers.StringRelatedField()
     destination = serializers.StringRelatedField()
 
@@ -165,6 +210,28 @@ class RouteListSerializer(RouteSerializer):
             "destination",
             "distance"
         ]
+        field_queries = {
+            "source": FieldQuery(
+                only=("source__name",), select_related=("source",)
+            ),
+            "destination": FieldQuery(
+                only=("destination__name",), select_related=("destination",)
+            ),
+        }
+        expandable = {
+            station: Expansion(
+                StationSerializer,
+                FieldQuery(
+                    only=(
+                        f"{station}__name",
+                        f"{station}__latitude",
+                        f"{station}__longitude",
+                    ),
+                    select_related=(station,),
+                ),
+            )
+            for station in ("source", "destination")
+        }
 
 
 class RouteDetailSerializer(RouteSerializer):
@@ -172,7 +239,27 @@ class RouteDetailSerializer(RouteSerializer):
     destination = StationSerializer()
 
 
+class ShortestRouteSerializer(serializers.Serializer):
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    distance = serializers.IntegerField(allow_null=True)
+    path = serializers.ListField(
+        child=serializers.IntegerField(),
+        help_text="Station ids from source to destination.",
+    )
+
+
 # Journey Serializers
+CREW_PREFETCH = Prefetch("crew", queryset=Crew.objects.order_by("id"))
+
+
+def pretty_travel_time(td: timedelta) -> str:
+    total_minutes = int(td.total_seconds() // 60)
+    hours = total_minutes // 60
+    minutes = total_minutes % 60
+    return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+
+
 class JourneySerializer(serializers.ModelSerializer):
     class Meta:
         model = Journey
@@ -187,14 +274,10 @@ class JourneySerializer(serializers.ModelSerializer):
         ]
 
     def get_travel_time_pretty(self, obj):
-        td = obj.travel_time
-        total_minutes = int(td.total_seconds() // 60)
-        hours = total_minutes // 60
-        minutes = total_minutes % 60
-        return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+        return pretty_travel_time(obj.travel_time)
 
 
-class JourneyListSerializer(JourneySerializer):
+class JourneyListSerializer(SparseFieldsetSerializerMixin, JourneySerializer):
     route = serializers.SlugRelatedField(read_only=True, slug_field="name")
     train = serializers.SlugRelatedField(read_only=True, slug_field="name")
     train_type = serializers.CharField(
@@ -218,6 +301,63 @@ class JourneyListSerializer(JourneySerializer):
             "tickets_available",
             "crew",
         ]
+        field_queries = {
+            "route": FieldQuery(
+                only=("route__name",), select_related=("route",)
+            ),
+            "train": FieldQuery(
+                only=("train__name",), select_related=("train",)
+            ),
+            "train_type": FieldQuery(
+                only=("train__train_type__name",),
+                select_related=("train__train_type",),
+            ),
+            "travel_time_pretty": FieldQuery(
+                only=("departure_time", "arrival_time")
+            ),
+            "tickets_available": FieldQuery(
+                annotate={
+                    "tickets_available": (
+                        Journey.tickets_available_expression()
+                    ),
+                },
+            ),
+            "crew": FieldQuery(prefetch_related=(CREW_PREFETCH,)),
+        }
+        expandable = {
+            "route": Expansion(
+                RouteListSerializer,
+                FieldQuery(
+                    only=(
+                        "route__name",
+                        "route__source__name",
+                        "route__destination__name",
+                        "route__distance",
+                    ),
+                    select_related=(
+                        "route__source", "route__destination"
+                    ),
+                ),
+            ),
+            "train": Expansion(
+                TrainListSerializer,
+                FieldQuery(
+                    only=(
+                        "train__name",
+                        "train__train_type__name",
+                        "train__cargo_num",
+                        "train__places_in_cargo",
+                        "train__image",
+                    ),
+                    select_related=("train__train_type",),
+                ),
+            ),
+            "crew": Expansion(
+                CrewListSerializer,
+                FieldQuery(prefetch_related=(CREW_PREFETCH,)),
+                many=True,
+            ),
+        }
 
 
 class JourneyDetailSerializer(JourneySerializer):
@@ -244,8 +384,103 @@ class JourneyDetailSerializer(JourneySerializer):
         ]
 
 
+class JourneyBoardSerializer(serializers.ModelSerializer):
+    """Row of a station departures/arrivals board."""
+    train = serializers.SlugRelatedField(slug_field="name", read_only=True)
+    source = serializers.SlugRelatedField(
+        source="source_station", slug_field="name", read_only=True
+    )
+    destination = serializers.SlugRelatedField(
+        source="destination_station", slug_field="name", read_only=True
+    )
+
+    class Meta:
+        model = Journey
+        fields = [
+            "id",
+            "train",
+            "source",
+            "destination",
+            "departure_time",
+            "arrival_time",
+        ]
+
+
+class JourneySeatMapSerializer(serializers.ModelSerializer):
+    """Seat occupancy of a journey as one base64 bitmap per cargo.
+
+    Bit ``seat - 1`` of a cargo bitmap (most significant bit of the first
+    byte first) is set when that seat is taken.
+    """
+    cargo_num = serializers.IntegerField(
+        source="train.cargo_num", read_only=True
+    )
+    places_in_cargo = serializers.IntegerField(
+        source="train.places_in_cargo", read_only=True
+    )
+    taken = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Journey
+        fields = [
+            "id",
+            "cargo_num",
+            "places_in_cargo",
+            "taken",
+        ]
+
+    def get_taken(self, obj) -> list[str]:
+        train = obj.train
+        bytes_in_cargo = (train.places_in_cargo + 7) // 8
+        bitmaps = [bytearray(bytes_in_cargo) for _ in range(train.cargo_num)]
+        for cargo, seat in obj.taken_seats():
+            if cargo <= train.cargo_num and seat <= train.places_in_cargo:
+                index = seat - 1
+                bitmaps[cargo - 1][index // 8] |= 0x80 >> index % 8
+        return [base64.b64encode(bitmap).decode() for bitmap in bitmaps]
+
+
+# Itinerary Serializers
+class ItineraryLegSerializer(serializers.Serializer):
+    journey = serializers.IntegerField()
+    source = serializers.IntegerField()
+    destination = serializers.IntegerField()
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+
+
+class ItinerarySerializer(serializers.Serializer):
+    departure_time = serializers.DateTimeField()
+    arrival_time = serializers.DateTimeField()
+    transfers = serializers.IntegerField()
+    legs = ItineraryLegSerializer(many=True)
+
+
+class ItineraryPlanSerializer(serializers.Serializer):
+    earliest_arrival = ItinerarySerializer(allow_null=True)
+    fewest_transfers = ItinerarySerializer(allow_null=True)
+
+
 # Ticket Serializers
+class BookingJourneyField(serializers.PrimaryKeyRelatedField):
+    """Journey field resolved from the journeys preloaded for an order."""
+
+    def to_internal_value(self, data):
+        journeys = self.context.get("journeys") or {}
+        try:
+            journey = journeys.get(int(data))
+        except (TypeError, ValueError):
+            journey = None
+        if journey is not None:
+            return journey
+        return super().to_internal_value(data)
+
+
 class TicketSerializer(serializers.ModelSerializer):
+    journey = BookingJourneyField(
+        queryset=Journey.objects.select_related("train")
+    )
+
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -264,6 +499,71 @@ class TicketSerializer(serializers.ModelSerializer):
             "seat",
             "journey",
         ]
+        # Seat collisions are checked for the whole order at once
+        # in railway.booking.book_tickets.
+        validators = []
+
+
+class SeatAllocationSerializer(serializers.Serializer):
+    """Let the server pick ``seats`` free seats on a journey."""
+    journey = BookingJourneyField(
+        queryset=Journey.objects.select_related("train")
+    )
+    seats = serializers.IntegerField(min_value=1)
+
+    def validate(self, attrs):
+        capacity = attrs["journey"].train.capacity
+        if attrs["seats"] > capacity:
+            raise ValidationError(
+                {"seats": f"Train capacity is only {capacity} seats."}
+            )
+        return attrs
+
+
+# Seat Hold Serializers
+class HeldSeatSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HeldSeat
+        fields = [
+            "cargo",
+            "seat",
+        ]
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    journey = serializers.PrimaryKeyRelatedField(
+        queryset=Journey.objects.select_related("train")
+    )
+    seats = HeldSeatSerializer(many=True, allow_empty=False)
+
+    class Meta:
+        model = SeatHold
+        fields = [
+            "id",
+            "journey",
+            "seats",
+            "created_at",
+            "expires_at",
+        ]
+        read_only_fields = ["created_at", "expires_at"]
+
+    def validate(self, attrs):
+        data = super(SeatHoldSerializer, self).validate(attrs=attrs)
+        for seat in attrs["seats"]:
+            Ticket.validate_ticket(
+                seat["cargo"],
+                seat["seat"],
+                attrs["journey"].train,
+                ValidationError
+            )
+        return data
+
+    def create(self, validated_data):
+        return create_hold(
+            validated_data["user"],
+            validated_data["journey"],
+            validated_data["seats"],
+        )
 
 
 # Order Serializers
@@ -274,22 +574,175 @@ class OrderSerializer(serializers.ModelSerializer):
         allow_empty=True,
         required=False
     )
+    allocations = SeatAllocationSerializer(
+        many=True,
+        write_only=True,
+        required=False,
+    )
+    holds = serializers.PrimaryKeyRelatedField(
+        many=True,
+        write_only=True,
+        required=False,
+        queryset=(
+            SeatHold.objects
+            .select_related("journey__train")
+            .prefetch_related("seats")
+        ),
+    )
 
     class Meta:
         model = Order
         fields = [
             "id",
-            "tickets"
+            "tickets",
+            "allocations",
+            "holds",
         ]
 
+    def validate_holds(self, holds):
+        user = self.context["request"].user
+        for hold in holds:
+            if hold.user_id != user.id:
+                raise ValidationError(f"Hold {hold.id} does not exist.")
+            if hold.is_expired:
+                raise ValidationError(f"Hold {hold.id} has expired.")
+        return holds
+
+    def to_internal_value(self, data):
+        journey_ids = set()
+        for field in ["tickets", "allocations"]:
+            items = data.get(field) if hasattr(data, "get") else None
+            if isinstance(items, list):
+                journey_ids.update(
+                    str(item.get("journey"))
+                    for item in items
+                    if isinstance(item, dict)
+                )
+        if journey_ids:
+            self.context["journeys"] = (
+                Journey.objects
+                .select_related("train")
+                .in_bulk([int(pk) for pk in journey_ids if pk.isdigit()])
+            )
+        return super().to_internal_value(data)
+
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets", [])
-            order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
-            return order
+        tickets_data = validated_data.pop("tickets", [])
+        allocations = validated_data.pop("allocations", [])
+        holds = validated_data.pop("holds", [])
+        return place_order(validated_data, tickets_data, holds, allocations)
 
 
-class OrderListSerializer(OrderSerializer):
+class OrderListSerializer(SparseFieldsetSerializerMixin, OrderSerializer):
     tickets = serializers.StringRelatedField(many=True, read_only=True)
+
+    class Meta(OrderSerializer.Meta):
+        field_queries = {
+            "tickets": FieldQuery(
+                prefetch_related=(
+                    "tickets__journey__route",
+                    "tickets__journey__train",
+                ),
+            ),
+        }
+        expandable = {
+            "tickets": Expansion(
+                TicketSerializer,
+                FieldQuery(prefetch_related=("tickets",)),
+                many=True,
+            ),
+        }
+
+
+# Lean list serializers (same output as the *ListSerializer they mirror)
+_datetime = serializers.DateTimeField().to_representation
+
+
+class TrainLeanListSerializer(LeanListSerializer):
+    values = {
+        "id": ("id",),
+        "name": ("name",),
+        "type": ("train_type__name",),
+        "cargo_num": ("cargo_num",),
+        "places_in_cargo": ("places_in_cargo",),
+        "capacity": ("cargo_num", "places_in_cargo"),
+        "image": ("image",),
+    }
+    image_storage = Train._meta.get_field("image").storage
+
+    def get_capacity(self, row):
+        return row["cargo_num"] * row["places_in_cargo"]
+
+    def get_image(self, row):
+        image = row["image"]
+        if not image:
+            return None
+        image = self.image_storage.url(image)
+        request = self.context.get("request")
+        if request is not None:
+            image = request.build_absolute_uri(image)
+        return image
+
+
+class RouteLeanListSerializer(LeanListSerializer):
+    values = {
+        "id": ("id",),
+        "name": ("name",),
+        "source": ("source__name",),
+        "destination": ("destination__name",),
+        "distance": ("distance",),
+    }
+
+
+class JourneyLeanListSerializer(LeanListSerializer):
+    values = {
+        "id": ("id",),
+        "route": ("route__name",),
+        "train": ("train__name",),
+        "train_type": ("train__train_type__name",),
+        "departure_time": ("departure_time",),
+        "arrival_time": ("arrival_time",),
+        "travel_time_pretty": ("departure_time", "arrival_time"),
+        "tickets_available": ("tickets_available",),
+        "crew": ("id",),
+    }
+
+    def prepare(self, rows):
+        self.crew = defaultdict(list)
+        if "crew" not in self.fields:
+            return
+        crew = (
+            Journey.crew.through.objects
+            .filter(journey_id__in=[row["id"] for row in rows])
+            .order_by("journey_id", "crew_id")
+            .values_list("journey_id", "crew__first_name", "crew__last_name")
+        )
+        for journey_id, first_name, last_name in crew:
+            self.crew[journey_id].append(f"{first_name} {last_name}")
+
+    def get_departure_time(self, row):
+        return _datetime(row["departure_time"])
+
+    def get_arrival_time(self, row):
+        return _datetime(row["arrival_time"])
+
+    def get_travel_time_pretty(self, row):
+        return pretty_travel_time(
+            row["arrival_time"] - row["departure_time"]
+        )
+
+    def get_crew(self, row):
+        return self.crew.get(row["id"], [])
+
+
+# Cache Serializers
+class CacheStatsSerializer(serializers.Serializer):
+    pid = serializers.IntegerField()
+    local_entries = serializers.IntegerField()
+    local_hits = serializers.IntegerField()
+    local_misses = serializers.IntegerField()
+    local_hit_rate = serializers.FloatField(allow_null=True)
+    shared_hits = serializers.IntegerField()
+    shared_misses = serializers.IntegerField()
+    shared_hit_rate = serializers.FloatField(allow_null=True)
+    invalidations = serializers.IntegerField()
@@ -0,0 +1,199 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from railway.cache import bump_version, evict_local_versions
+from railway.geo import station_index
+from railway.invalidation import bus
+from railway.models import (
+    Crew,
+    HeldSeat,
+    Journey,
+    Order,
+    Route,
+    SeatHold,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from railway.network import route_network
+from railway.search import station_autocomplete
+from railway.timetable import timetable
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_journey(sender, instance, **kwargs):
+    """Keep the journey a ticket belonged to before it is re-saved."""
+    instance._previous_journey_id = None
+    if instance.pk is not None:
+        instance._previous_journey_id = (
+            Ticket.objects
+            .filter(pk=instance.pk)
+            .values_list("journey_id", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def count_saved_ticket(sender, instance, created, **kwargs):
+    previous_journey_id = getattr(instance, "_previous_journey_id", None)
+    if created or previous_journey_id is None:
+        Journey.add_tickets_sold(instance.journey_id, 1)
+    elif previous_journey_id != instance.journey_id:
+        Journey.add_tickets_sold(previous_journey_id, -1)
+        Journey.add_tickets_sold(instance.journey_id, 1)
+
+
+@receiver(post_delete, sender=Ticket)
+def count_deleted_ticket(sender, instance, **kwargs):
+    Journey.add_tickets_sold(instance.journey_id, -1)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def free_deleted_user_seats(sender, instance, **kwargs):
+    """Free the seats held by a user before the cascade deletes them.
+
+    Deleting holds or held seats directly frees them in ``delete()``
+    (see SeatHoldQuerySet); a deleted journey has no counter to update.
+    """
+    HeldSeat.objects.filter(hold__user=instance).free_seats()
+
+
+@receiver(post_save, sender=Journey)
+def refresh_timetable_journey(sender, instance, **kwargs):
+    journey_id = instance.pk
+    transaction.on_commit(lambda: timetable.refresh_journeys([journey_id]))
+
+
+@receiver(post_delete, sender=Journey)
+def remove_timetable_journey(sender, instance, **kwargs):
+    journey_id = instance.pk
+    transaction.on_commit(lambda: timetable.remove_journeys([journey_id]))
+
+
+@receiver(post_save, sender=Route)
+def refresh_timetable_route(sender, instance, created, **kwargs):
+    if not created:
+        route_id = instance.pk
+        transaction.on_commit(lambda: timetable.refresh_routes([route_id]))
+
+
+@receiver(pre_save, sender=Route)
+def remember_route_edge(sender, instance, **kwargs):
+    """Keep the stations and distance a route had before it is re-saved."""
+    instance._previous_edge = None
+    if instance.pk is not None:
+        instance._previous_edge = (
+            Route.objects
+            .filter(pk=instance.pk)
+            .values_list("source_id", "destination_id", "distance")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Route)
+def update_route_network(sender, instance, **kwargs):
+    edge = (instance.source_id, instance.destination_id, instance.distance)
+    previous = getattr(instance, "_previous_edge", None)
+    if previous == edge:
+        return
+    if previous is None or (
+        previous[:2] == edge[:2] and edge[2] < previous[2]
+    ):
+        transaction.on_commit(lambda: route_network.add_route(*edge))
+    else:
+        route_network.schedule_rebuild()
+
+
+@receiver(post_delete, sender=Route)
+def remove_route_from_network(sender, instance, **kwargs):
+    route_network.schedule_rebuild()
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def invalidate_station_index(sender, **kwargs):
+    transaction.on_commit(station_index.invalidate)
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def invalidate_station_autocomplete(sender, **kwargs):
+    transaction.on_commit(station_autocomplete.invalidate)
+
+
+def invalidate_cached_responses(sender, instance, **kwargs):
+    bump_version(sender, instance.pk)
+
+
+def publish_invalidation(sender, instance, **kwargs):
+    bus.publish(sender, instance.pk)
+
+
+for model in (
+    Crew, TrainType, Train, Station, Route, Journey, Order, SeatHold
+):
+    post_save.connect(invalidate_cached_responses, sender=model)
+    post_delete.connect(invalidate_cached_responses, sender=model)
+    post_save.connect(publish_invalidation, sender=model)
+    post_delete.connect(publish_invalidation, sender=model)
+    bus.subscribe(
+        model, lambda pks, model=model: evict_local_versions(model, pks)
+    )
+
+
+# Changes published by other workers.
+
+
+def refresh_bus_journeys(pks):
+    if pks is None:
+        timetable.clear()
+    else:
+        timetable.refresh_journeys([int(pk) for pk in pks])
+
+
+def refresh_bus_routes(pks):
+    if pks is None:
+        timetable.clear()
+    else:
+        timetable.refresh_routes([int(pk) for pk in pks])
+
+
+def invalidate_bus_stations(pks):
+    station_index.invalidate()
+    station_autocomplete.invalidate()
+
+
+bus.subscribe(Journey, refresh_bus_journeys)
+bus.subscribe(Route, refresh_bus_routes)
+bus.subscribe(Station, invalidate_bus_stations)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def invalidate_ticket_responses(sender, instance, **kwargs):
+    bump_version(Ticket, instance.pk)
+    bump_version(Order, instance.order_id)
+
+
+@receiver(m2m_changed, sender=Journey.crew.through)
+def invalidate_journey_crew(sender, instance, action, pk_set, **kwargs):
+    if isinstance(instance, Journey):
+        journey_ids = [instance.pk] if action.startswith("post_") else []
+    elif action in ("post_add", "post_remove"):
+        journey_ids = list(pk_set)
+    elif action == "pre_clear":
+        journey_ids = list(instance.journeys.values_list("pk", flat=True))
+    else:
+        journey_ids = []
+    if journey_ids:
+        bump_version(Journey, *journey_ids)
+        bus.publish(Journey, *journey_ids)
@@ -0,0 +1,293 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.signals import request_started
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from railway.cache import version_key
+from railway.geo import station_index
+from railway import invalidation
+from railway.invalidation import InvalidationBus, bus, encode
+from railway.models import InvalidationEvent, Station
+from train_station.cache import SharedFileCache, TieredCache
+
+CACHE_STATS_URL = reverse("railway:cache-stats-list")
+
+SHARED_CACHE = {
+    "shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tiered-cache-tests",
+    }
+}
+
+
+def sample_tier(location, **options):
+    """A tiered cache with its own local tier, like another worker."""
+    defaults = {
+        "SHARED": "shared",
+        "LOCAL_PREFIXES": ("railway:",),
+        "LOCAL_TIMEOUT": 60,
+        "JOURNAL_INTERVAL": 0,
+    }
+    defaults.update(options)
+    return TieredCache(location, {"OPTIONS": defaults})
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        caches["shared"].clear()
+        self.first = sample_tier(f"{self.id()}:first")
+        self.second = sample_tier(f"{self.id()}:second")
+
+    def test_values_are_shared_between_workers(self):
+        self.first.set("railway:key", 1)
+
+        self.assertEqual(self.second.get("railway:key"), 1)
+        self.assertEqual(self.second.stats()["shared_hits"], 1)
+        self.assertEqual(self.second.get("railway:key"), 1)
+        self.assertEqual(self.second.stats()["local_hits"], 1)
+
+    def test_writes_invalidate_other_workers(self):
+        self.first.set("railway:key", 1)
+        self.second.get("railway:key")
+
+        self.first.set("railway:key", 2)
+        self.assertEqual(self.second.get("railway:key"), 2)
+
+        self.first.delete("railway:key")
+        self.assertIsNone(self.second.get("railway:key"))
+        self.assertEqual(self.second.stats()["invalidations"], 2)
+
+    def test_stale_values_are_served_until_the_journal_is_read(self):
+        second = sample_tier(f"{self.id()}:stale", JOURNAL_INTERVAL=60)
+        self.first.set("railway:key", 1)
+        second.get("railway:key")
+
+        self.first.set("railway:key", 2)
+        self.assertEqual(second.get("railway:key"), 1)
+
+        second.invalidate_local(["railway:key"])
+        self.assertEqual(second.get("railway:key"), 2)
+
+    def test_lost_journal_drops_local_tier(self):
+        self.first.set("railway:key", 1)
+        self.second.get("railway:key")
+
+        caches["shared"].clear()
+        caches["shared"].set("railway:key", 2)
+        self.assertEqual(self.second.get("railway:key"), 2)
+
+    def test_local_tier_is_bounded(self):
+        tier = sample_tier(f"{self.id()}:bounded", MAX_ENTRIES=2)
+        for number in range(3):
+            tier.set(f"railway:{number}", number)
+
+        self.assertEqual(tier.stats()["local_entries"], 2)
+        self.assertEqual(tier.get("railway:0"), 0)
+        self.assertEqual(tier.stats()["local_misses"], 1)
+
+    def test_other_keys_bypass_local_tier(self):
+        self.first.set("throttle_user_1", [1])
+
+        self.assertEqual(self.first.get("throttle_user_1"), [1])
+        stats = self.first.stats()
+        self.assertEqual(stats["local_entries"], 0)
+        self.assertEqual(stats["shared_hits"], 1)
+        self.assertIsNone(stats["local_hit_rate"])
+
+    def test_add_and_incr(self):
+        self.assertTrue(self.first.add("railway:counter", 1))
+        self.assertFalse(self.second.add("railway:counter", 5))
+        self.assertEqual(self.second.get("railway:counter"), 1)
+
+        self.assertEqual(self.first.incr("railway:counter"), 2)
+        self.assertEqual(self.second.get("railway:counter"), 2)
+
+
+class SharedFileCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = directory.name
+
+    def sample_cache(self):
+        """A cache on the same directory, like another worker's."""
+        return SharedFileCache(self.location, {})
+
+    def test_only_one_concurrent_add_wins(self):
+        workers = [self.sample_cache() for _ in range(8)]
+        for attempt in range(20):
+            key = f"slot:{attempt}"
+            with ThreadPoolExecutor(len(workers)) as executor:
+                added = list(executor.map(
+                    lambda worker: worker.add(key, id(worker)), workers
+                ))
+            self.assertEqual(added.count(True), 1)
+            winner = workers[added.index(True)]
+            self.assertEqual(workers[0].get(key), id(winner))
+
+    def test_add_replaces_expired_entry(self):
+        first, second = self.sample_cache(), self.sample_cache()
+        first.set("slot", 1, timeout=0.01)
+        time.sleep(0.05)
+
+        self.assertIsNone(second.get("slot"))
+        self.assertTrue(second.add("slot", 2))
+        self.assertFalse(first.add("slot", 3))
+        self.assertEqual(first.get("slot"), 2)
+
+    def test_tests_do_not_share_server_cache_directory(self):
+        self.assertNotEqual(
+            caches["shared"]._dir, os.path.abspath(settings.CACHE_DIR)
+        )
+
+
+class CacheStatsApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_admin_required(self):
+        user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(user)
+
+        response = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_stats_of_serving_worker(self):
+        admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="pass123"
+        )
+        self.client.force_authenticate(admin)
+
+        response = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("local_hit_rate", response.data)
+        self.assertIn("shared_hit_rate", response.data)
+
+
+class InvalidationBusTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.received = []
+        self.bus = InvalidationBus()
+        self.bus.subscribe(Station, self.received.append)
+
+    def test_events_of_other_workers_are_applied(self):
+        self.bus.dispatch("other railway.station 1,2")
+        self.bus.dispatch("other railway.station *")
+        self.bus.dispatch("other railway.route 3")
+
+        self.assertEqual(self.received, [["1", "2"], None])
+
+    def test_own_events_are_ignored(self):
+        self.bus.dispatch(encode(Station, [1]))
+
+        self.assertEqual(self.received, [])
+
+    def test_listener_starts_on_first_request(self):
+        self.addCleanup(
+            request_started.disconnect,
+            dispatch_uid="invalidation-bus-start",
+        )
+        with patch.object(self.bus, "start") as start:
+            self.bus.start_on_request()
+            start.assert_not_called()
+
+            self.client.get(CACHE_STATS_URL)
+
+        start.assert_called_once_with()
+
+    @skipUnless(hasattr(os, "fork"), "Needs os.fork().")
+    def test_forked_worker_gets_own_origin(self):
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.write(write_end, invalidation.ORIGIN.encode())
+            os._exit(0)
+        os.close(write_end)
+        os.waitpid(pid, 0)
+        with os.fdopen(read_end) as child:
+            child_origin = child.read()
+
+        self.assertTrue(child_origin)
+        self.assertNotEqual(child_origin, invalidation.ORIGIN)
+
+    def test_oversized_event_covers_all_rows(self):
+        payload = encode(Station, range(10_000))
+
+        self.assertTrue(payload.endswith("railway.station *"))
+
+    def test_station_change_of_other_worker_refreshes_index(self):
+        station_index.invalidate()
+        self.assertEqual(station_index.nearest(48.7, 21.2, 10), [])
+        # Without on_commit callbacks only the bus refreshes the index.
+        station = Station.objects.create(
+            name="Kosice", latitude=48.7, longitude=21.2
+        )
+        self.assertEqual(station_index.nearest(48.7, 21.2, 10), [])
+
+        bus.dispatch(f"other railway.station {station.pk}")
+        self.assertEqual(
+            [row["id"] for row in station_index.nearest(48.7, 21.2, 10)],
+            [station.pk],
+        )
+
+    def test_version_stamps_are_evicted_from_local_tier(self):
+        key = version_key(Station, 1)
+        cache.set(key, 1)
+        caches["shared"].set(key, 2)
+        self.assertEqual(cache.get(key), 1)
+
+        bus.dispatch("other railway.station 1")
+        self.assertEqual(cache.get(key), 2)
+
+    def test_table_events_without_notify(self):
+        if connection.vendor == "postgresql":
+            self.skipTest("PostgreSQL publishes events with NOTIFY.")
+        station = Station.objects.create(
+            name="Kosice", latitude=48.7, longitude=21.2
+        )
+        event = InvalidationEvent.objects.last()
+        self.assertTrue(
+            event.payload.endswith(f"railway.station {station.pk}")
+        )
+
+        other = InvalidationEvent.objects.create(
+            payload=f"other railway.station {station.pk}"
+        )
+        self.assertEqual(
+            self.bus.read_events(event.id - 1, set()), other.id
+        )
+        self.assertEqual(self.received, [[str(station.pk)]])
+
+    def test_table_events_committed_late_are_read_once(self):
+        seen = set()
+        last_id = self.bus.read_events(0, seen)
+        # An id allocated before the next event, whose transaction
+        # commits only after that event was read.
+        late_id = InvalidationEvent.objects.create(payload="late").id
+        InvalidationEvent.objects.filter(id=late_id).delete()
+        InvalidationEvent.objects.create(payload="other railway.station 2")
+        last_id = self.bus.read_events(last_id, seen)
+
+        InvalidationEvent.objects.create(
+            id=late_id, payload="other railway.station 1"
+        )
+        self.bus.read_events(last_id, seen)
+        self.bus.read_events(last_id, seen)
+
+        self.assertEqual(self.received, [["2"], ["1"]])
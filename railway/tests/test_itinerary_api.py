@@ -0,0 +1,255 @@
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from railway.models import Journey, Route, Station, Train, TrainType
+from railway.timetable import timetable
+
+ITINERARY_URL = reverse("railway:itinerary-list")
+
+
+def sample_station(name="Station"):
+    return Station.objects.create(name=name, latitude=48.7, longitude=21.2)
+
+
+def sample_route(source, destination):
+    return Route.objects.create(
+        name=f"{source.name} - {destination.name}",
+        source=source,
+        destination=destination,
+        distance=100,
+    )
+
+
+def sample_train(name="Train"):
+    train_type = TrainType.objects.create(name=f"{name} type")
+    return Train.objects.create(
+        name=name, cargo_num=5, places_in_cargo=20, train_type=train_type
+    )
+
+
+class UnauthenticatedItineraryApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        response = self.client.get(ITINERARY_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ItineraryApiTests(TestCase):
+    def setUp(self):
+        timetable.clear()
+        self.addCleanup(timetable.clear)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.day = timezone.make_aware(
+            datetime.combine(
+                timezone.localdate() + timedelta(days=1), time.min
+            )
+        )
+        self.train = sample_train()
+        self.a = sample_station("A")
+        self.b = sample_station("B")
+        self.c = sample_station("C")
+        self.d = sample_station("D")
+        self.ab = sample_route(self.a, self.b)
+        self.bc = sample_route(self.b, self.c)
+        self.ac = sample_route(self.a, self.c)
+
+        self.a_b = self.journey(self.ab, "08:00", "09:00")
+        self.b_c_tight = self.journey(self.bc, "09:05", "10:00")
+        self.b_c = self.journey(self.bc, "09:20", "10:10")
+        self.a_c_direct = self.journey(self.ac, "08:30", "12:00")
+
+    def at(self, clock):
+        hours, minutes = map(int, clock.split(":"))
+        return self.day + timedelta(hours=hours, minutes=minutes)
+
+    def journey(self, route, departure, arrival):
+        return Journey.objects.create(
+            route=route,
+            train=self.train,
+            departure_time=self.at(departure),
+            arrival_time=self.at(arrival),
+        )
+
+    def plan(self, source, destination, **params):
+        return self.client.get(
+            ITINERARY_URL,
+            {
+                "source": source.id,
+                "destination": destination.id,
+                "departure_after": self.day.isoformat(),
+                **params,
+            },
+        )
+
+    @staticmethod
+    def journeys(itinerary):
+        return [leg["journey"] for leg in itinerary["legs"]]
+
+    def test_earliest_arrival_respects_min_transfer(self):
+        response = self.plan(self.a, self.c)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        earliest = response.data["earliest_arrival"]
+        self.assertEqual(self.journeys(earliest), [self.a_b.id, self.b_c.id])
+        self.assertEqual(earliest["transfers"], 1)
+        self.assertEqual(
+            earliest["legs"][1]["source"], self.b.id
+        )
+
+    def test_min_transfer_parameter(self):
+        response = self.plan(self.a, self.c, min_transfer=0)
+
+        self.assertEqual(
+            self.journeys(response.data["earliest_arrival"]),
+            [self.a_b.id, self.b_c_tight.id],
+        )
+
+    def test_fewest_transfers(self):
+        response = self.plan(self.a, self.c)
+
+        fewest = response.data["fewest_transfers"]
+        self.assertEqual(self.journeys(fewest), [self.a_c_direct.id])
+        self.assertEqual(fewest["transfers"], 0)
+
+    def test_departure_after_skips_earlier_journeys(self):
+        response = self.plan(
+            self.a, self.c, departure_after=self.at("08:15").isoformat()
+        )
+
+        self.assertEqual(
+            self.journeys(response.data["earliest_arrival"]),
+            [self.a_c_direct.id],
+        )
+
+    def test_unreachable_destination(self):
+        response = self.plan(self.a, self.d)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data["earliest_arrival"])
+        self.assertIsNone(response.data["fewest_transfers"])
+
+    def test_index_is_refreshed_on_journey_changes(self):
+        self.plan(self.a, self.c)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fast = self.journey(self.ac, "08:10", "09:30")
+        response = self.plan(self.a, self.c)
+        self.assertEqual(
+            self.journeys(response.data["earliest_arrival"]), [fast.id]
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            fast.delete()
+        response = self.plan(self.a, self.c)
+        self.assertEqual(
+            self.journeys(response.data["earliest_arrival"]),
+            [self.a_b.id, self.b_c.id],
+        )
+
+    def test_index_is_refreshed_on_route_changes(self):
+        self.plan(self.a, self.c)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ac.destination = self.d
+            self.ac.save()
+
+        response = self.plan(self.a, self.c)
+        self.assertEqual(
+            self.journeys(response.data["fewest_transfers"]),
+            [self.a_b.id, self.b_c.id],
+        )
+        response = self.plan(self.a, self.d)
+        self.assertEqual(
+            self.journeys(response.data["earliest_arrival"]),
+            [self.a_c_direct.id],
+        )
+
+    def test_invalid_parameters(self):
+        response = self.client.get(ITINERARY_URL, {"source": self.a.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.plan(self.a, self.c, departure_after="tomorrow")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+# Not wrapped in a test transaction: on-commit callbacks run when each
+# write commits, as they do in requests.
+class RouteChangeCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        timetable.clear()
+        self.addCleanup(timetable.clear)
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.admin)
+
+        self.day = timezone.make_aware(
+            datetime.combine(
+                timezone.localdate() + timedelta(days=1), time.min
+            )
+        )
+        self.a = sample_station("A")
+        self.b = sample_station("B")
+        self.c = sample_station("C")
+        self.route = sample_route(self.a, self.b)
+        self.journey = Journey.objects.create(
+            route=self.route,
+            train=sample_train(),
+            departure_time=self.day + timedelta(hours=8),
+            arrival_time=self.day + timedelta(hours=10),
+        )
+
+    def test_changed_endpoints_reach_search_and_itineraries(self):
+        self.client.get(
+            ITINERARY_URL,
+            {"source": self.a.id, "destination": self.b.id},
+        )
+
+        response = self.client.patch(
+            reverse("railway:route-detail", args=[self.route.id]),
+            {"destination": self.c.id},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(
+            reverse("railway:journey-search"),
+            {
+                "source": self.a.id,
+                "destination": self.c.id,
+                "date": self.day.date().isoformat(),
+            },
+        )
+        self.assertEqual(
+            [journey["id"] for journey in response.data], [self.journey.id]
+        )
+        response = self.client.get(
+            ITINERARY_URL,
+            {
+                "source": self.a.id,
+                "destination": self.c.id,
+                "departure_after": self.day.isoformat(),
+            },
+        )
+        self.assertEqual(
+            [
+                leg["journey"]
+                for leg in response.data["earliest_arrival"]["legs"]
+            ],
+            [self.journey.id],
+        )
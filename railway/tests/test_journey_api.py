@@ -1,13 +1,37 @@
-from datetime import datetime, timedelta
+import base64
+import csv
+import json
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.db.models import F, Count
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
-from railway.models import Journey, Route, Train, TrainType, Station, Crew
+from railway.cache import get_or_fill, version_key
+from railway.export import CONTENT_TYPES
+from railway.models import (
+    Journey,
+    Route,
+    Train,
+    TrainType,
+    Station,
+    Crew,
+    Order,
+    Ticket,
+)
+from railway.renderers import ORJSONRenderer
 from railway.serializers import JourneyListSerializer, JourneyDetailSerializer
 
 JOURNEY_URL = reverse("railway:journey-list")
@@ -174,6 +198,50 @@ class AuthenticatedJourneyApiTests(TestCase):
         self.assertEqual(len(res.data["results"]), 1)
         self.assertEqual(res.data["results"][0]["id"], journey_in_range.id)
 
+    def test_departure_before_includes_whole_day(self):
+        train = sample_train(train_type=self.train_type)
+        day_start = timezone.make_aware(datetime(2025, 7, 1))
+        late_journey = sample_journey(
+            train=train,
+            departure_time=day_start + timedelta(hours=23, minutes=59),
+            arrival_time=day_start + timedelta(days=1, hours=2),
+        )
+        sample_journey(
+            train=train,
+            departure_time=day_start + timedelta(days=1),
+            arrival_time=day_start + timedelta(days=1, hours=2),
+        )
+
+        res = self.client.get(JOURNEY_URL, {
+            "departure_after": "2025-07-01",
+            "departure_before": "2025-07-01",
+        })
+
+        self.assertEqual(
+            [journey["id"] for journey in res.data["results"]],
+            [late_journey.id],
+        )
+
+    @override_settings(TIME_ZONE="Europe/Kyiv")
+    def test_date_filters_use_configured_time_zone(self):
+        train = sample_train(train_type=self.train_type)
+        # 22:30 UTC on July 1st is already July 2nd in Kyiv (UTC+3).
+        journey = sample_journey(
+            train=train,
+            departure_time=datetime(2025, 7, 1, 22, 30, tzinfo=dt_timezone.utc),
+            arrival_time=datetime(2025, 7, 2, 2, 0, tzinfo=dt_timezone.utc),
+        )
+
+        res = self.client.get(JOURNEY_URL, {"departure_before": "2025-07-01"})
+        self.assertEqual(res.data["results"], [])
+
+        res = self.client.get(JOURNEY_URL, {"departure_after": "2025-07-02"})
+        self.assertEqual(res.data["results"][0]["id"], journey.id)
+
+    def test_invalid_date_filter_rejected(self):
+        res = self.client.get(JOURNEY_URL, {"departure_after": "01.07.2025"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_retrieve_journey_detail(self):
         train = sample_train(train_type=self.train_type)
         journey = sample_journey(train=train)
@@ -244,3 +312,801 @@ class AdminJourneyApiTests(TestCase):
 
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class JourneyTicketsSoldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_login(self.user)
+        self.journey = sample_journey()
+        self.order = Order.objects.create(user=self.user)
+
+    def get_tickets_available(self):
+        res = self.client.get(JOURNEY_URL)
+        return res.data["results"][0]["tickets_available"]
+
+    def test_tickets_available_counts_sold_tickets(self):
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+        Ticket.objects.create(
+            cargo=1, seat=2, journey=self.journey, order=self.order
+        )
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 2)
+        self.assertEqual(
+            self.get_tickets_available(), self.journey.train.capacity - 2
+        )
+
+    def test_ticket_deletion_releases_seat(self):
+        ticket = Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+        Ticket.objects.create(
+            cargo=1, seat=2, journey=self.journey, order=self.order
+        )
+        ticket.delete()
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 1)
+
+        self.order.delete()
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 0)
+
+    def test_train_capacity_change_updates_tickets_available(self):
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+        train = self.journey.train
+        train.cargo_num = 2
+        train.save()
+
+        self.assertEqual(self.get_tickets_available(), train.capacity - 1)
+
+    def test_rebuild_seat_counters_command(self):
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+        Journey.objects.update(tickets_sold=42)
+
+        call_command("rebuild_seat_counters", stdout=StringIO())
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 1)
+
+
+class JourneySeatMapTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_login(self.user)
+        self.journey = sample_journey()
+        self.order = Order.objects.create(user=self.user)
+
+    def test_seat_map_marks_taken_seats(self):
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+        Ticket.objects.create(
+            cargo=3, seat=20, journey=self.journey, order=self.order
+        )
+
+        res = self.client.get(
+            reverse("railway:journey-seats", args=[self.journey.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["cargo_num"], 5)
+        self.assertEqual(res.data["places_in_cargo"], 20)
+        bitmaps = [base64.b64decode(cargo) for cargo in res.data["taken"]]
+        self.assertEqual(len(bitmaps), 5)
+        self.assertEqual(bitmaps[0], bytes([0b10000000, 0, 0]))
+        self.assertEqual(bitmaps[1], bytes(3))
+        self.assertEqual(bitmaps[2], bytes([0, 0, 0b00010000]))
+
+
+class JourneyPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_login(self.user)
+        train = sample_train()
+        route = sample_route()
+        now = timezone.now()
+        self.journeys = [
+            sample_journey(
+                route=route,
+                train=train,
+                departure_time=now + timedelta(days=days),
+                arrival_time=now + timedelta(days=days, hours=2),
+            )
+            for days in [3, 1, 1, 1, 2]
+        ]
+
+    def test_pages_follow_departure_time_and_id(self):
+        expected = [
+            journey.id
+            for journey in sorted(
+                self.journeys,
+                key=lambda journey: (journey.departure_time, journey.id),
+            )
+        ]
+
+        pages = []
+        res = self.client.get(JOURNEY_URL, {"limit": 2})
+        while True:
+            self.assertNotIn("count", res.data)
+            pages.append([journey["id"] for journey in res.data["results"]])
+            if res.data["next"] is None:
+                break
+            res = self.client.get(res.data["next"])
+
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
+
+        res = self.client.get(res.data["previous"])
+        self.assertEqual(
+            [journey["id"] for journey in res.data["results"]],
+            expected[2:4],
+        )
+
+    def test_invalid_cursor_rejected(self):
+        res = self.client.get(JOURNEY_URL, {"cursor": "bad"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class JourneyStationSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_login(self.user)
+        self.train = sample_train()
+        self.kyiv = sample_station(name="Kyiv")
+        self.lviv = sample_station(name="Lviv")
+        self.route = Route.objects.create(
+            name="Kyiv-Lviv",
+            source=self.kyiv,
+            destination=self.lviv,
+            distance=540,
+        )
+        self.back_route = Route.objects.create(
+            name="Lviv-Kyiv",
+            source=self.lviv,
+            destination=self.kyiv,
+            distance=540,
+        )
+        self.day = timezone.make_aware(datetime(2025, 7, 1))
+
+    def create_journey(self, route, hours):
+        return sample_journey(
+            route=route,
+            train=self.train,
+            departure_time=self.day + timedelta(hours=hours),
+            arrival_time=self.day + timedelta(hours=hours + 5),
+        )
+
+    def search(self, **params):
+        return self.client.get(
+            reverse("railway:journey-search"),
+            {
+                "source": self.kyiv.id,
+                "destination": self.lviv.id,
+                "date": "2025-07-01",
+                **params,
+            },
+        )
+
+    def test_search_returns_available_journeys_of_the_day(self):
+        evening = self.create_journey(self.route, 18)
+        morning = self.create_journey(self.route, 7)
+        self.create_journey(self.route, 30)
+        self.create_journey(self.back_route, 9)
+        sold_out = self.create_journey(self.route, 12)
+        Journey.objects.filter(id=sold_out.id).update(
+            tickets_sold=self.train.capacity
+        )
+
+        res = self.search()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [journey["id"] for journey in res.data],
+            [morning.id, evening.id],
+        )
+        self.assertEqual(
+            res.data[0]["tickets_available"], self.train.capacity
+        )
+
+    def test_search_requires_stations_and_date(self):
+        self.assertEqual(
+            self.search(source="").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.assertEqual(
+            self.search(date="").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class JourneyConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+        train = sample_train()
+        self.journey = sample_journey(train=train)
+        self.other_journey = sample_journey(train=train)
+        self.order = Order.objects.create(user=self.user)
+
+    def test_validators_are_sent(self):
+        response = self.client.get(detail_url(self.journey.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["ETag"])
+        self.assertTrue(response["Last-Modified"])
+
+    def test_unchanged_journey_is_not_modified(self):
+        etag = self.client.get(detail_url(self.journey.id))["ETag"]
+
+        response = self.client.get(
+            detail_url(self.journey.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_not_modified_journey_is_not_loaded(self):
+        etag = self.client.get(detail_url(self.journey.id))["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                detail_url(self.journey.id), HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_invalid_journey_id_is_not_found(self):
+        response = self.client.get(detail_url("abc"))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_missing_journey_is_not_found(self):
+        last_modified = self.client.get(JOURNEY_URL)["Last-Modified"]
+        missing_id = self.other_journey.id + 1
+
+        response = self.client.get(
+            detail_url(missing_id), HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIsNone(cache.get(version_key(Journey, missing_id)))
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(JOURNEY_URL)["Last-Modified"]
+
+        response = self.client.get(
+            JOURNEY_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_ticket_sale_changes_journey_and_list(self):
+        detail_etag = self.client.get(detail_url(self.journey.id))["ETag"]
+        list_etag = self.client.get(JOURNEY_URL)["ETag"]
+
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+
+        response = self.client.get(
+            detail_url(self.journey.id), HTTP_IF_NONE_MATCH=detail_etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["tickets"], ["Cargo 1, Seat 1"])
+        response = self.client.get(JOURNEY_URL, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_other_journey_changes_keep_detail_etag(self):
+        etag = self.client.get(detail_url(self.journey.id))["ETag"]
+
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.other_journey, order=self.order
+        )
+
+        response = self.client.get(
+            detail_url(self.journey.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_related_changes_invalidate_detail(self):
+        etag = self.client.get(detail_url(self.journey.id))["ETag"]
+
+        self.journey.crew.add(sample_crew())
+
+        response = self.client.get(
+            detail_url(self.journey.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response["ETag"]
+        route = self.journey.route
+        route.name = "Renamed"
+        route.save()
+
+        response = self.client.get(
+            detail_url(self.journey.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_counter_rebuild_invalidates_detail(self):
+        etag = self.client.get(detail_url(self.journey.id))["ETag"]
+
+        call_command("rebuild_seat_counters", stdout=StringIO())
+
+        response = self.client.get(
+            detail_url(self.journey.id), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class JourneySearchCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey(
+            route=sample_route(name="Kyiv - Lviv"),
+            departure_time=datetime(2025, 6, 29, 8, 0),
+            arrival_time=datetime(2025, 6, 29, 14, 0),
+        )
+        self.order = Order.objects.create(user=self.user)
+
+    def test_equivalent_searches_share_cached_result(self):
+        response = self.client.get(
+            JOURNEY_URL, {"route": "KYIV", "departure_after": "2025-06-29"}
+        )
+        self.assertEqual(len(response.data["results"]), 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                JOURNEY_URL,
+                {"departure_after": "2025-6-29", "route": "kyiv", "train": ""},
+            )
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_different_filters_are_cached_separately(self):
+        self.client.get(JOURNEY_URL, {"departure_after": "2025-06-29"})
+
+        response = self.client.get(
+            JOURNEY_URL, {"departure_after": "2025-06-30"}
+        )
+        self.assertEqual(response.data["results"], [])
+
+    def test_ticket_sale_invalidates_search(self):
+        params = {"route": "kyiv", "departure_after": "2025-06-29"}
+        response = self.client.get(JOURNEY_URL, params)
+        available = response.data["results"][0]["tickets_available"]
+
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+
+        response = self.client.get(JOURNEY_URL, params)
+        self.assertEqual(
+            response.data["results"][0]["tickets_available"], available - 1
+        )
+
+    def test_journey_change_invalidates_station_search(self):
+        params = {
+            "source": self.journey.route.source_id,
+            "destination": self.journey.route.destination_id,
+            "date": "2025-06-29",
+        }
+        url = reverse("railway:journey-search")
+        self.assertEqual(len(self.client.get(url, params).data), 1)
+
+        self.journey.departure_time = datetime(2025, 6, 30, 8, 0)
+        self.journey.arrival_time = datetime(2025, 6, 30, 14, 0)
+        self.journey.save()
+
+        self.assertEqual(self.client.get(url, params).data, [])
+
+    def test_invalid_filter_is_not_cached(self):
+        response = self.client.get(JOURNEY_URL, {"departure_after": "x"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class GetOrFillTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_concurrent_misses_are_computed_once(self):
+        calls = []
+        release = threading.Event()
+        results = []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "value"
+
+        def fill():
+            results.append(get_or_fill("railway:test", compute, 60))
+
+        threads = [threading.Thread(target=fill) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 5)
+
+    def test_uncacheable_result_is_not_stored(self):
+        self.assertIsNone(get_or_fill("railway:test", lambda: None, 60))
+        self.assertEqual(get_or_fill("railway:test", lambda: 1, 60), 1)
+
+    def test_waits_for_fill_lock_of_another_process(self):
+        cache.add("filling:railway:test", 1)
+        fill = threading.Timer(0.1, cache.set, ["railway:test", "value"])
+        fill.start()
+
+        self.assertEqual(
+            get_or_fill("railway:test", lambda: "recomputed", 60), "value"
+        )
+        fill.join()
+
+    @override_settings(CACHE_FILL_WAIT=0)
+    def test_computes_itself_when_lock_holder_does_not_deliver(self):
+        cache.add("filling:railway:test", 1)
+
+        self.assertEqual(
+            get_or_fill("railway:test", lambda: "recomputed", 60),
+            "recomputed",
+        )
+
+
+class JourneyExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+        train = sample_train()
+        self.first = sample_journey(
+            train=train,
+            route=sample_route(name="Kyiv - Lviv"),
+            departure_time=datetime(2025, 6, 29, 8, 0),
+            arrival_time=datetime(2025, 6, 29, 14, 0),
+        )
+        self.second = sample_journey(
+            train=train,
+            route=sample_route(name="Lviv - Odesa"),
+            departure_time=datetime(2025, 6, 30, 8, 0),
+            arrival_time=datetime(2025, 6, 30, 20, 0),
+        )
+
+    def export(self, fmt, headers=None, **params):
+        response = self.client.get(
+            reverse("railway:journey-export", kwargs={"fmt": fmt}),
+            params,
+            headers=headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_export_accepts_its_media_type(self):
+        for fmt, content_type in CONTENT_TYPES.items():
+            response, _ = self.export(fmt, headers={"Accept": content_type})
+            self.assertEqual(response["Content-Type"], content_type)
+
+    def test_ndjson_export(self):
+        response, content = self.export("ndjson")
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [row["id"] for row in rows], [self.first.id, self.second.id]
+        )
+        self.assertEqual(rows[0]["route"], "Kyiv - Lviv")
+        self.assertEqual(rows[0]["source"], "Source")
+        self.assertEqual(
+            rows[0]["tickets_available"], self.first.train.capacity
+        )
+
+    def test_csv_export_uses_list_filters(self):
+        response, content = self.export(
+            "csv", route="odesa", departure_after="2025-06-30"
+        )
+
+        self.assertIn(
+            'filename="journeys.csv"', response["Content-Disposition"]
+        )
+        header, *rows = csv.reader(content.splitlines())
+        self.assertEqual(header[:3], ["id", "route", "train"])
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0][0], str(self.second.id))
+        self.assertTrue(rows[0][5].startswith("2025-06-30T08:00:00"))
+
+    def test_unknown_format_not_found(self):
+        response = self.client.get(JOURNEY_URL + "export/xml/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class JourneyLeanListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.route = route = sample_route(name="Kyiv - Lviv")
+        train = sample_train()
+        crew = [sample_crew(name=name) for name in ("Zoe", "Adam", "Ivan")]
+        sample_journey(
+            route=route,
+            train=train,
+            crew=[crew[2], crew[0]],
+            departure_time=datetime(2025, 6, 29, 8, 0),
+            arrival_time=datetime(2025, 6, 30, 9, 30),
+        )
+        sample_journey(
+            route=route,
+            train=train,
+            departure_time=datetime(2025, 6, 29, 18, 0),
+            arrival_time=datetime(2025, 6, 29, 18, 45),
+        )
+
+    def get_both(self, url, params=None):
+        responses = []
+        for lean in (False, True):
+            cache.clear()
+            with override_settings(LEAN_LIST_SERIALIZATION=lean):
+                responses.append(self.client.get(url, params))
+        return responses
+
+    def test_list_matches_model_serializer(self):
+        regular, lean = self.get_both(JOURNEY_URL)
+
+        self.assertEqual(lean.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(lean.data["results"]), 2)
+        self.assertEqual(lean.json(), regular.json())
+
+    def test_search_matches_model_serializer(self):
+        route = self.route
+        regular, lean = self.get_both(
+            reverse("railway:journey-search"),
+            {
+                "source": route.source_id,
+                "destination": route.destination_id,
+                "date": "2025-06-29",
+            },
+        )
+
+        self.assertEqual(len(lean.data), 2)
+        self.assertEqual(lean.json(), regular.json())
+
+
+class JourneyJsonRenderingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey(
+            departure_time=datetime(2025, 6, 29, 8, 0),
+            arrival_time=datetime(2025, 6, 29, 10, 30),
+        )
+
+    def test_detail_renders_like_drf_json_renderer(self):
+        response = self.client.get(detail_url(self.journey.id))
+
+        self.assertEqual(response["Content-Type"], "application/json")
+        content = json.loads(response.content)
+        self.assertEqual(content["travel_time"], "9000.0")
+        self.assertEqual(
+            content, json.loads(JSONRenderer().render(response.data))
+        )
+
+    def test_values_without_json_type(self):
+        data = {
+            "at": datetime(2025, 6, 29, 8, 0, tzinfo=dt_timezone.utc),
+            "travel_time": timedelta(hours=1, minutes=30),
+            "price": Decimal("12.50"),
+            "line": "a\u2028b",
+        }
+
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)),
+            {
+                "at": "2025-06-29T08:00:00Z",
+                "travel_time": "5400.0",
+                "price": 12.5,
+                "line": "a\u2028b",
+            },
+        )
+        self.assertNotIn(b"\xe2\x80\xa8", ORJSONRenderer().render(data))
+
+
+class JourneyCompactFormatTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+        train = sample_train(name="Intercity")
+        route = sample_route(name="Kyiv - Lviv")
+        crew = sample_crew()
+        for hour in (8, 12, 16):
+            sample_journey(
+                route=route,
+                train=train,
+                crew=[crew],
+                departure_time=datetime(2025, 6, 29, hour, 0),
+                arrival_time=datetime(2025, 6, 29, hour + 2, 0),
+            )
+
+    @staticmethod
+    def decode(content) -> list:
+        dictionaries = content["dictionaries"]
+        return [
+            {
+                column: (
+                    dictionaries[column][value]
+                    if column in dictionaries and value is not None
+                    else value
+                )
+                for column, value in zip(content["columns"], row)
+            }
+            for row in content["rows"]
+        ]
+
+    def test_format_query_parameter(self):
+        regular = self.client.get(JOURNEY_URL).json()
+        response = self.client.get(JOURNEY_URL, {"format": "compact"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response["Content-Type"], "application/vnd.railway.compact+json"
+        )
+        content = response.json()
+        self.assertNotIn("results", content)
+        self.assertEqual(content["next"], regular["next"])
+        self.assertEqual(content["dictionaries"]["route"], ["Kyiv - Lviv"])
+        self.assertEqual(content["dictionaries"]["train"], ["Intercity"])
+        self.assertEqual(content["dictionaries"]["train_type"], ["Express"])
+        self.assertNotIn("departure_time", content["dictionaries"])
+        self.assertEqual(self.decode(content), regular["results"])
+
+    def test_accept_header(self):
+        regular = self.client.get(JOURNEY_URL).json()
+        response = self.client.get(
+            JOURNEY_URL, HTTP_ACCEPT="application/vnd.railway.compact+json"
+        )
+
+        self.assertEqual(self.decode(response.json()), regular["results"])
+
+    def test_other_responses_stay_plain_json(self):
+        journey = Journey.objects.first()
+        response = self.client.get(
+            detail_url(journey.id), {"format": "compact"}
+        )
+        self.assertEqual(response.json()["id"], journey.id)
+
+        response = self.client.get(
+            JOURNEY_URL, {"format": "compact", "departure_after": "x"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("detail", response.json())
+
+    def test_cached_data_is_shared_between_formats(self):
+        self.client.get(JOURNEY_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(JOURNEY_URL, {"format": "compact"})
+        self.assertEqual(len(response.json()["rows"]), 3)
+
+
+class JourneySparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.route = sample_route(name="Kyiv - Lviv")
+        self.crew = sample_crew(name="Ivan")
+        self.journey = sample_journey(
+            route=self.route,
+            crew=[self.crew],
+            departure_time=datetime(2025, 6, 29, 8, 0),
+            arrival_time=datetime(2025, 6, 29, 10, 0),
+        )
+
+    def get_list(self, params, lean=True):
+        cache.clear()
+        with override_settings(LEAN_LIST_SERIALIZATION=lean):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(JOURNEY_URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sql = " ".join(query["sql"] for query in queries.captured_queries)
+        return response.json()["results"], sql
+
+    def test_fields_limit_output_and_queries(self):
+        params = {"fields": "id,route,departure_time,tickets_available"}
+        for lean in (True, False):
+            results, sql = self.get_list(params, lean=lean)
+
+            self.assertEqual(
+                list(results[0]),
+                ["id", "route", "departure_time", "tickets_available"],
+            )
+            self.assertEqual(results[0]["route"], "Kyiv - Lviv")
+            self.assertEqual(results[0]["tickets_available"], 100)
+            self.assertNotIn("railway_traintype", sql)
+            self.assertNotIn("railway_crew", sql)
+            self.assertNotIn("arrival_time", sql)
+
+    def test_lean_and_regular_serializers_agree(self):
+        params = {"fields": "crew,travel_time_pretty,train_type"}
+        lean, _ = self.get_list(params, lean=True)
+        regular, _ = self.get_list(params, lean=False)
+
+        self.assertEqual(lean, regular)
+        self.assertEqual(lean[0]["crew"], ["Ivan Doe"])
+
+    def test_expand_nests_related_objects(self):
+        results, _ = self.get_list({"fields": "id", "expand": "route,crew"})
+
+        self.assertEqual(list(results[0]), ["id", "route", "crew"])
+        self.assertEqual(results[0]["route"]["name"], "Kyiv - Lviv")
+        self.assertEqual(results[0]["route"]["source"], "Source")
+        self.assertEqual(
+            results[0]["crew"],
+            [{"id": self.crew.id, "full_name": "Ivan Doe"}],
+        )
+
+    def test_unknown_names_are_rejected(self):
+        for params in ({"fields": "id,price"}, {"expand": "departure_time"}):
+            response = self.client.get(JOURNEY_URL, params)
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+    def test_name_order_does_not_split_the_cache(self):
+        self.client.get(JOURNEY_URL, {"fields": "id,route"})
+
+        with self.assertNumQueries(0):
+            response = self.client.get(JOURNEY_URL, {"fields": "route,id"})
+        self.assertEqual(list(response.data["results"][0]), ["id", "route"])
+
+    def test_search_with_fields(self):
+        response = self.client.get(
+            reverse("railway:journey-search"),
+            {
+                "source": self.route.source_id,
+                "destination": self.route.destination_id,
+                "date": "2025-06-29",
+                "fields": "id",
+            },
+        )
+
+        self.assertEqual(response.json(), [{"id": self.journey.id}])
@@ -1,7 +1,14 @@
+import csv
+import json
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, IntegrityError, OperationalError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -12,8 +19,10 @@ from railway.models import (
     Train,
     Route,
     Crew,
-    Journey
+    Journey,
+    Ticket
 )
+from railway.export import CONTENT_TYPES
 from railway.serializers import OrderListSerializer
 
 
@@ -124,6 +133,23 @@ class AuthenticatedOrderApiTests(TestCase):
         self.assertEqual(len(response.data["results"]), 2)
         self.assertEqual(response.data["results"], serializer.data)
 
+    def test_list_orders_paginated_by_cursor(self):
+        orders = [sample_order(self.user) for _ in range(3)]
+
+        response = self.client.get(ORDER_URL, {"limit": 2})
+        self.assertNotIn("count", response.data)
+        self.assertEqual(
+            [order["id"] for order in response.data["results"]],
+            [orders[0].id, orders[1].id],
+        )
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [order["id"] for order in response.data["results"]],
+            [orders[2].id],
+        )
+        self.assertIsNone(response.data["next"])
+
     def test_create_order(self):
         payload = {
             "tickets" : []
@@ -134,6 +160,144 @@ class AuthenticatedOrderApiTests(TestCase):
         order = Order.objects.get(id=response.data["id"])
         self.assertEqual(order.user, self.user)
 
+    def book(self, seats, journey=None):
+        journey = journey or self.journey
+        payload = {
+            "tickets": [
+                {"journey": journey.id, "cargo": cargo, "seat": seat}
+                for cargo, seat in seats
+            ]
+        }
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def test_create_order_with_tickets(self):
+        other_journey = sample_journey(train=self.train)
+        payload = {
+            "tickets": [
+                {"journey": self.journey.id, "cargo": 1, "seat": 1},
+                {"journey": self.journey.id, "cargo": 1, "seat": 2},
+                {"journey": other_journey.id, "cargo": 2, "seat": 1},
+            ]
+        }
+        response = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["tickets"]), 3)
+        self.journey.refresh_from_db()
+        other_journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 2)
+        self.assertEqual(other_journey.tickets_sold, 1)
+
+    def test_create_order_query_count_does_not_grow_with_tickets(self):
+        with CaptureQueriesContext(connection) as small_order:
+            self.book([(1, seat) for seat in range(1, 3)])
+        with CaptureQueriesContext(connection) as large_order:
+            self.book([(2, seat) for seat in range(1, 21)])
+
+        self.assertEqual(Ticket.objects.count(), 22)
+        self.assertEqual(
+            len(small_order.captured_queries),
+            len(large_order.captured_queries),
+        )
+
+    def test_create_order_with_taken_seat_conflicts(self):
+        self.book([(1, 1)])
+        response = self.book([(1, 2), (1, 1)])
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            response.data["seats"],
+            [{"journey": self.journey.id, "cargo": 1, "seat": 1}],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.assertEqual(Order.objects.count(), 1)
+
+    @patch("railway.booking.book_tickets")
+    def test_create_order_retries_on_integrity_error(self, book_tickets):
+        book_tickets.side_effect = [IntegrityError, None]
+        response = self.book([(1, 1)])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(book_tickets.call_count, 2)
+        self.assertEqual(Order.objects.count(), 1)
+
+    @patch("railway.booking.book_tickets")
+    def test_create_order_conflicts_after_max_attempts(self, book_tickets):
+        book_tickets.side_effect = OperationalError
+        response = self.book([(1, 1)])
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            book_tickets.call_count, settings.BOOKING_MAX_ATTEMPTS
+        )
+        self.assertFalse(Order.objects.exists())
+
+    def test_create_order_with_repeated_seat_rejected(self):
+        response = self.book([(1, 1), (1, 1)])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_create_order_with_seat_out_of_range_rejected(self):
+        response = self.book([(1, self.train.places_in_cargo + 1)])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("seat", response.data["tickets"][0])
+
+    def allocate(self, seats):
+        payload = {
+            "allocations": [{"journey": self.journey.id, "seats": seats}]
+        }
+        return self.client.post(ORDER_URL, payload, format="json")
+
+    def test_allocation_picks_adjacent_seats_in_one_cargo(self):
+        # Cargo 1 keeps a gap of two seats, cargo 2 is empty.
+        self.book(
+            [(1, seat) for seat in range(1, 21) if seat not in (5, 6)]
+        )
+
+        response = self.allocate(2)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(t["cargo"], t["seat"]) for t in response.data["tickets"]],
+            [(1, 5), (1, 6)],
+        )
+
+    def test_allocation_falls_back_to_fewest_cargos(self):
+        for cargo in range(1, 6):
+            free = {1: 3, 2: 1, 3: 2, 4: 1, 5: 1}[cargo]
+            self.book([(cargo, seat) for seat in range(free + 1, 21)])
+
+        response = self.allocate(5)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            {t["cargo"] for t in response.data["tickets"]}, {1, 3}
+        )
+
+    def test_allocation_without_enough_free_seats_conflicts(self):
+        self.book([(1, seat) for seat in range(1, 21)])
+
+        response = self.allocate(self.train.capacity - 19)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 20)
+
+    def test_allocation_skips_seats_requested_in_same_order(self):
+        payload = {
+            "tickets": [{"journey": self.journey.id, "cargo": 1, "seat": 1}],
+            "allocations": [{"journey": self.journey.id, "seats": 3}],
+        }
+        response = self.client.post(ORDER_URL, payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(t["cargo"], t["seat"]) for t in response.data["tickets"]],
+            [(1, 1), (1, 2), (1, 3), (1, 4)],
+        )
+
     def test_retrieve_order_detail(self):
         order = sample_order(self.user)
         url = detail_url(order.id)
@@ -181,3 +345,203 @@ class AdminOrderApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Order.objects.filter(id=order.id).exists())
+
+
+class OrderConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com", password="pass123"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@test.com", password="other123"
+        )
+        self.journey = sample_journey()
+        self.order = sample_order(self.user)
+
+    def test_etag_varies_by_user(self):
+        self.client.force_authenticate(self.user)
+        etag = self.client.get(ORDER_URL)["ETag"]
+
+        self.client.force_authenticate(self.other_user)
+        response = self.client.get(ORDER_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+
+    def test_booking_changes_order_list(self):
+        self.client.force_authenticate(self.user)
+        etag = self.client.get(ORDER_URL)["ETag"]
+
+        self.client.post(
+            ORDER_URL,
+            {"tickets": [{"cargo": 1, "seat": 1, "journey": self.journey.id}]},
+            format="json",
+        )
+
+        response = self.client.get(ORDER_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        etag = response["ETag"]
+
+        response = self.client.get(ORDER_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_orders_of_other_users_are_not_found(self):
+        self.client.force_authenticate(self.other_user)
+        last_modified = self.client.get(ORDER_URL)["Last-Modified"]
+
+        response = self.client.get(
+            reverse("railway:order-detail", args=[self.order.id]),
+            HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@test.com", password="pass123"
+        )
+        self.journey = sample_journey()
+        self.order = sample_order(self.user)
+        Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+        Ticket.objects.create(
+            cargo=1, seat=2, journey=self.journey, order=self.order
+        )
+        other_order = sample_order(self.other_user)
+        Ticket.objects.create(
+            cargo=1, seat=3, journey=self.journey, order=other_order
+        )
+
+    def export(self, url_name, fmt, headers=None):
+        response = self.client.get(
+            reverse(f"railway:{url_name}", kwargs={"fmt": fmt}),
+            headers=headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode()
+
+    def test_orders_export_is_limited_to_own_orders(self):
+        self.client.force_authenticate(self.user)
+
+        rows = [
+            json.loads(line)
+            for line in self.export("order-export", "ndjson").splitlines()
+        ]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["id"], self.order.id)
+        self.assertEqual(rows[0]["user"], self.user.email)
+        self.assertEqual(rows[0]["tickets"], 2)
+
+    def test_tickets_export(self):
+        self.client.force_authenticate(self.user)
+
+        header, *rows = csv.reader(
+            self.export("order-tickets-export", "csv").splitlines()
+        )
+        self.assertEqual(header[:3], ["id", "order", "ordered_at"])
+        self.assertEqual(
+            [(row[-2], row[-1]) for row in rows], [("1", "1"), ("1", "2")]
+        )
+
+    def test_admin_exports_all_orders(self):
+        admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="pass123"
+        )
+        self.client.force_authenticate(admin)
+
+        content = self.export("order-tickets-export", "ndjson")
+        self.assertEqual(len(content.splitlines()), 3)
+
+    def test_export_accepts_its_media_type(self):
+        self.client.force_authenticate(self.user)
+
+        for url_name in ("order-export", "order-tickets-export"):
+            for fmt, content_type in CONTENT_TYPES.items():
+                content = self.export(
+                    url_name, fmt, headers={"Accept": content_type}
+                )
+                self.assertTrue(content)
+
+    def test_export_requires_authentication(self):
+        response = self.client.get(
+            reverse("railway:order-export", kwargs={"fmt": "csv"})
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class OrderJsonParsingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+
+    def test_bulk_ticket_body_is_parsed(self):
+        body = json.dumps({
+            "tickets": [
+                {"journey": self.journey.id, "cargo": 1, "seat": seat}
+                for seat in range(1, 11)
+            ]
+        })
+        response = self.client.post(
+            ORDER_URL, body, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["tickets"]), 10)
+
+    def test_malformed_body_is_bad_request(self):
+        for body in ('{"tickets": [', '{"tickets": NaN}'):
+            response = self.client.post(
+                ORDER_URL, body, content_type="application/json"
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST
+            )
+            self.assertIn("JSON parse error", response.data["detail"])
+
+
+class OrderSparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+        self.order = sample_order(self.user)
+        self.ticket = Ticket.objects.create(
+            cargo=1, seat=1, journey=self.journey, order=self.order
+        )
+
+    def test_fields_skip_tickets(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(ORDER_URL, {"fields": "id"})
+
+        self.assertEqual(response.data["results"], [{"id": self.order.id}])
+        for query in queries.captured_queries:
+            self.assertNotIn("railway_ticket", query["sql"])
+
+    def test_expand_tickets(self):
+        response = self.client.get(ORDER_URL, {"expand": "tickets"})
+
+        self.assertEqual(
+            response.data["results"][0]["tickets"],
+            [{
+                "id": self.ticket.id,
+                "cargo": 1,
+                "seat": 1,
+                "journey": self.journey.id,
+            }],
+        )
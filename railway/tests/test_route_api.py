@@ -1,16 +1,25 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from railway.models import Route, Station
+from railway.network import route_network
 from railway.serializers import (
     RouteListSerializer,
     RouteDetailSerializer
 )
 
 ROUTE_URL = reverse("railway:route-list")
+SHORTEST_URL = reverse("railway:route-shortest")
 
 
 def sample_station(**params):
@@ -138,9 +147,214 @@ class AdminRouteApiTests(TestCase):
         self.assertEqual(route.destination, destination)
         self.assertEqual(route.distance, payload["distance"])
 
+    def test_negative_distance_rejected(self):
+        payload = {
+            "name": "Backwards",
+            "source": sample_station(name="A").id,
+            "destination": sample_station(name="B").id,
+            "distance": -1,
+        }
+        response = self.client.post(ROUTE_URL, payload)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("distance", response.data)
+
     def test_delete_route_allowed(self):
         route = sample_route()
         url = detail_url(route.id)
 
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class ShortestRouteApiTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        network_settings = override_settings(
+            ROUTE_NETWORK_FILE=str(Path(directory.name) / "network.npy")
+        )
+        network_settings.enable()
+        self.addCleanup(network_settings.disable)
+
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com", password="testpass"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.a = sample_station(name="A")
+        self.b = sample_station(name="B")
+        self.c = sample_station(name="C")
+        self.d = sample_station(name="D")
+        sample_route(source=self.a, destination=self.b, distance=100)
+        self.b_c = sample_route(source=self.b, destination=self.c, distance=50)
+        self.a_c = sample_route(
+            source=self.a, destination=self.c, distance=200
+        )
+        sample_route(source=self.c, destination=self.d, distance=10)
+        route_network.rebuild()
+
+    def shortest(self, source, destination):
+        response = self.client.get(
+            SHORTEST_URL, {"from": source.id, "to": destination.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_shortest_path_through_other_stations(self):
+        data = self.shortest(self.a, self.d)
+
+        self.assertEqual(data["distance"], 160)
+        self.assertEqual(
+            data["path"], [self.a.id, self.b.id, self.c.id, self.d.id]
+        )
+
+    def test_routes_are_one_way(self):
+        data = self.shortest(self.d, self.a)
+
+        self.assertIsNone(data["distance"])
+        self.assertEqual(data["path"], [])
+
+    def test_new_route_is_applied_incrementally(self):
+        self.shortest(self.a, self.d)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            e = sample_station(name="E")
+            sample_route(source=self.a, destination=e, distance=5)
+            sample_route(source=e, destination=self.d, distance=5)
+
+        data = self.shortest(self.a, self.d)
+        self.assertEqual(data["distance"], 10)
+        self.assertEqual(data["path"], [self.a.id, e.id, self.d.id])
+
+    def test_shorter_distance_is_applied(self):
+        self.shortest(self.a, self.c)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.a_c.distance = 120
+            self.a_c.save()
+
+        data = self.shortest(self.a, self.c)
+        self.assertEqual(data["distance"], 120)
+        self.assertEqual(data["path"], [self.a.id, self.c.id])
+
+    def test_deleted_route_marks_network_stale(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.b_c.delete()
+
+        self.assertTrue(route_network.is_stale())
+        data = self.shortest(self.a, self.c)
+        self.assertEqual(data["distance"], 150)
+
+        call_command("build_route_network", stdout=StringIO())
+
+        self.assertFalse(route_network.is_stale())
+        data = self.shortest(self.a, self.c)
+        self.assertEqual(data["distance"], 200)
+        self.assertEqual(data["path"], [self.a.id, self.c.id])
+
+    def test_build_command_interval_rebuilds_stale_network(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.b_c.delete()
+
+        with patch(
+            "railway.management.commands.build_route_network.time.sleep",
+            side_effect=KeyboardInterrupt,
+        ) as sleep, self.assertRaises(KeyboardInterrupt):
+            call_command(
+                "build_route_network", interval=10, stdout=StringIO()
+            )
+
+        sleep.assert_called_once_with(10)
+        self.assertEqual(self.shortest(self.a, self.c)["distance"], 200)
+
+    def test_missing_network_is_unavailable(self):
+        route_network.path.unlink()
+
+        response = self.client.get(
+            SHORTEST_URL, {"from": self.a.id, "to": self.c.id}
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    def test_incremental_updates_match_rebuild(self):
+        self.shortest(self.a, self.d)
+        stations = [self.a, self.b, self.c, self.d]
+        with self.captureOnCommitCallbacks(execute=True):
+            for source, destination, distance in [
+                (self.d, self.a, 30),
+                (self.b, self.d, 55),
+                (self.c, self.b, 5),
+                (self.d, self.c, 1),
+            ]:
+                sample_route(
+                    source=source, destination=destination, distance=distance
+                )
+        incremental = {
+            (source.id, destination.id): route_network.shortest(
+                source.id, destination.id
+            )[0]
+            for source in stations
+            for destination in stations
+        }
+
+        route_network.rebuild()
+
+        for (source, destination), distance in incremental.items():
+            self.assertEqual(
+                route_network.shortest(source, destination)[0], distance
+            )
+
+    def test_invalid_parameters(self):
+        response = self.client.get(SHORTEST_URL, {"from": self.a.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RouteLeanListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+        sample_route(name="Route 1")
+        sample_route(name="Route 2", distance=250)
+
+    def test_list_matches_model_serializer(self):
+        responses = []
+        for lean in (False, True):
+            cache.clear()
+            with override_settings(LEAN_LIST_SERIALIZATION=lean):
+                responses.append(self.client.get(ROUTE_URL))
+        regular, lean = responses
+
+        self.assertEqual(lean.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(lean.data["results"]), 2)
+        self.assertEqual(lean.json(), regular.json())
+
+
+class RouteSparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+        self.route = sample_route(name="Route 1")
+
+    def test_expand_stations(self):
+        response = self.client.get(
+            ROUTE_URL, {"fields": "id", "expand": "source,destination"}
+        )
+
+        route = response.data["results"][0]
+        self.assertEqual(list(route), ["id", "source", "destination"])
+        self.assertEqual(route["source"]["name"], "Source Station")
+        self.assertEqual(route["destination"]["latitude"], 48.7194)
+
+    def test_unknown_field(self):
+        response = self.client.get(ROUTE_URL, {"fields": "id,price"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
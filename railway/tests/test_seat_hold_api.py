@@ -0,0 +1,286 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from railway.booking import release_holds
+from railway.models import (
+    Station,
+    TrainType,
+    Train,
+    Route,
+    Journey,
+    Ticket,
+    SeatHold,
+    HeldSeat,
+)
+
+SEAT_HOLD_URL = reverse("railway:seathold-list")
+ORDER_URL = reverse("railway:order-list")
+
+
+def detail_url(hold_id):
+    return reverse("railway:seathold-detail", args=[hold_id])
+
+
+def sample_journey():
+    train_type = TrainType.objects.create(name="Express")
+    train = Train.objects.create(
+        name="Train", cargo_num=5, places_in_cargo=20, train_type=train_type
+    )
+    source = Station.objects.create(
+        name="Source", latitude=48.7, longitude=21.2
+    )
+    destination = Station.objects.create(
+        name="Destination", latitude=48.7, longitude=21.2
+    )
+    route = Route.objects.create(
+        name="Route", source=source, destination=destination, distance=100
+    )
+    return Journey.objects.create(
+        route=route,
+        train=train,
+        departure_time=datetime.now(),
+        arrival_time=datetime.now() + timedelta(hours=2),
+    )
+
+
+class UnauthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(SEAT_HOLD_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticatedSeatHoldApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="user@test.com", password="pass123"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            email="other@test.com", password="pass123"
+        )
+        self.client.force_authenticate(self.user)
+        self.journey = sample_journey()
+
+    def hold(self, seats, user=None):
+        self.client.force_authenticate(user or self.user)
+        res = self.client.post(
+            SEAT_HOLD_URL,
+            {
+                "journey": self.journey.id,
+                "seats": [
+                    {"cargo": cargo, "seat": seat} for cargo, seat in seats
+                ],
+            },
+            format="json",
+        )
+        self.client.force_authenticate(self.user)
+        return res
+
+    def expire_holds(self):
+        SeatHold.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+    def test_create_hold(self):
+        res = self.hold([(1, 1), (1, 2)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["seats"]), 2)
+        hold = SeatHold.objects.get(id=res.data["id"])
+        self.assertEqual(hold.user, self.user)
+        self.assertGreater(hold.expires_at, timezone.now())
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_held, 2)
+
+    def test_held_seats_reduce_tickets_available(self):
+        self.hold([(1, 1), (1, 2)])
+
+        res = self.client.get(reverse("railway:journey-list"))
+
+        self.assertEqual(
+            res.data["results"][0]["tickets_available"],
+            self.journey.train.capacity - 2,
+        )
+
+    def test_held_seats_marked_in_seat_map(self):
+        self.hold([(2, 8)])
+
+        res = self.client.get(
+            reverse("railway:journey-seats", args=[self.journey.id])
+        )
+
+        self.assertEqual(res.data["taken"][1], "AQAA")
+
+    def test_hold_seat_out_of_range_rejected(self):
+        res = self.hold([(6, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_hold_on_held_seat_conflicts(self):
+        self.hold([(1, 1)], user=self.other_user)
+
+        res = self.hold([(1, 1), (1, 2)])
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(HeldSeat.objects.count(), 1)
+
+    def test_order_on_seat_held_by_other_user_conflicts(self):
+        self.hold([(1, 1)], user=self.other_user)
+
+        res = self.client.post(
+            ORDER_URL,
+            {"tickets": [{"journey": self.journey.id, "cargo": 1, "seat": 1}]},
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_order_converts_hold_into_tickets(self):
+        hold_id = self.hold([(1, 1), (1, 2)]).data["id"]
+
+        res = self.client.post(
+            ORDER_URL,
+            {
+                "holds": [hold_id],
+                "tickets": [
+                    {"journey": self.journey.id, "cargo": 2, "seat": 1}
+                ],
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 3)
+        self.assertFalse(SeatHold.objects.exists())
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.tickets_sold, 3)
+        self.assertEqual(self.journey.seats_held, 0)
+
+    def test_order_with_hold_of_other_user_rejected(self):
+        hold_id = self.hold([(1, 1)], user=self.other_user).data["id"]
+
+        res = self.client.post(
+            ORDER_URL, {"holds": [hold_id]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(SeatHold.objects.filter(id=hold_id).exists())
+
+    def test_order_with_expired_hold_rejected(self):
+        hold_id = self.hold([(1, 1)]).data["id"]
+        self.expire_holds()
+
+        res = self.client.post(
+            ORDER_URL, {"holds": [hold_id]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_expired_hold_does_not_block_seat(self):
+        self.hold([(1, 1)], user=self.other_user)
+        self.expire_holds()
+
+        res = self.hold([(1, 1)])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.count(), 1)
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_held, 1)
+
+    def test_user_sees_only_own_holds(self):
+        self.hold([(1, 1)])
+        self.hold([(1, 2)], user=self.other_user)
+
+        res = self.client.get(SEAT_HOLD_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_cancel_hold_releases_seats(self):
+        hold_id = self.hold([(1, 1), (1, 2)]).data["id"]
+
+        res = self.client.delete(detail_url(hold_id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(HeldSeat.objects.exists())
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_held, 0)
+
+    def test_expire_seat_holds_command(self):
+        self.hold([(1, 1)])
+        self.hold([(1, 2)])
+        self.hold([(1, 3)], user=self.other_user)
+        SeatHold.objects.exclude(user=self.other_user).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        call_command("expire_seat_holds", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(SeatHold.objects.get().user, self.other_user)
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_held, 1)
+
+    def test_expire_seat_holds_command_interval(self):
+        self.hold([(1, 1)])
+        SeatHold.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        with patch(
+            "railway.management.commands.expire_seat_holds.time.sleep",
+            side_effect=KeyboardInterrupt,
+        ) as sleep, self.assertRaises(KeyboardInterrupt):
+            call_command("expire_seat_holds", interval=30, stdout=StringIO())
+
+        sleep.assert_called_once_with(30)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_deleting_hold_releases_seats(self):
+        self.hold([(1, 1), (1, 2)])
+        self.hold([(1, 3)], user=self.other_user)
+
+        self.other_user.delete()
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_held, 2)
+
+        SeatHold.objects.all().delete()
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_held, 0)
+
+    def test_releasing_holds_frees_seats_per_journey(self):
+        for cargo in range(1, 5):
+            self.hold([(cargo, seat) for seat in range(1, 21)])
+
+        # Seats are counted and deleted in bulk, whatever their number;
+        # each deleted hold still publishes its invalidation event.
+        with self.assertNumQueries(10):
+            release_holds(SeatHold.objects.values("pk"))
+
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_held, 0)
+        self.assertFalse(HeldSeat.objects.exists())
+
+    def test_deleting_held_seat_releases_it(self):
+        self.hold([(1, 1), (1, 2)])
+
+        HeldSeat.objects.get(seat=1).delete()
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_held, 1)
+
+        SeatHold.objects.get().delete()
+        self.journey.refresh_from_db()
+        self.assertEqual(self.journey.seats_held, 0)
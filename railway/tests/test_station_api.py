@@ -1,17 +1,29 @@
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 
 from rest_framework.test import APIClient
 
-from railway.models import Station
+from railway.geo import station_index
+from railway.models import Journey, Route, Station, Train, TrainType
+from railway.search import search_by_name, station_autocomplete
 from railway.serializers import (
     StationListSerializer,
     StationDetailSerializer
 )
 
 STATION_URL = reverse("railway:station-list")
+NEAREST_URL = reverse("railway:station-nearest")
+WITHIN_URL = reverse("railway:station-within")
+AUTOCOMPLETE_URL = reverse("railway:station-autocomplete")
 
 
 def sample_station(**params):
@@ -29,6 +41,14 @@ def detail_url(station_id):
     return reverse("railway:station-detail", args=[station_id])
 
 
+def departures_url(station_id):
+    return reverse("railway:station-departures", args=[station_id])
+
+
+def arrivals_url(station_id):
+    return reverse("railway:station-arrivals", args=[station_id])
+
+
 class UnauthenticatedStationApiTests(TestCase):
 
     def setUp(self):
@@ -125,3 +145,443 @@ class AdminStationApiTests(TestCase):
         response = self.client.delete(url)
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+
+class StationBoardTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.kyiv = sample_station(name="Kyiv")
+        self.lviv = sample_station(name="Lviv")
+        self.odesa = sample_station(name="Odesa")
+        self.train = Train.objects.create(
+            name="Intercity",
+            cargo_num=5,
+            places_in_cargo=20,
+            train_type=TrainType.objects.create(name="Express"),
+        )
+        self.kyiv_lviv = Route.objects.create(
+            name="Kyiv - Lviv",
+            source=self.kyiv,
+            destination=self.lviv,
+            distance=540,
+        )
+        self.now = timezone.now()
+
+    def journey(self, route, hours):
+        departure_time = self.now + timedelta(hours=hours)
+        return Journey.objects.create(
+            route=route,
+            train=self.train,
+            departure_time=departure_time,
+            arrival_time=departure_time + timedelta(hours=5),
+        )
+
+    def test_journey_copies_route_stations(self):
+        journey = self.journey(self.kyiv_lviv, 1)
+
+        self.assertEqual(journey.source_station, self.kyiv)
+        self.assertEqual(journey.destination_station, self.lviv)
+
+    def test_route_change_updates_journey_stations(self):
+        journey = self.journey(self.kyiv_lviv, 1)
+
+        self.kyiv_lviv.destination = self.odesa
+        self.kyiv_lviv.save()
+
+        journey.refresh_from_db()
+        self.assertEqual(journey.destination_station, self.odesa)
+
+    def test_departures_board(self):
+        later = self.journey(self.kyiv_lviv, 3)
+        sooner = self.journey(self.kyiv_lviv, 1)
+        self.journey(self.kyiv_lviv, -1)
+
+        response = self.client.get(departures_url(self.kyiv.id))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["id"] for row in response.data], [sooner.id, later.id]
+        )
+        self.assertEqual(response.data[0]["train"], "Intercity")
+        self.assertEqual(response.data[0]["destination"], "Lviv")
+        self.assertIn("max-age=", response["Cache-Control"])
+
+    def test_arrivals_board(self):
+        journey = self.journey(self.kyiv_lviv, 1)
+
+        response = self.client.get(arrivals_url(self.lviv.id))
+        self.assertEqual(
+            [row["id"] for row in response.data], [journey.id]
+        )
+        self.assertEqual(response.data[0]["source"], "Kyiv")
+
+        response = self.client.get(arrivals_url(self.kyiv.id))
+        self.assertEqual(response.data, [])
+
+    def test_board_limit(self):
+        for hours in range(1, 4):
+            self.journey(self.kyiv_lviv, hours)
+
+        response = self.client.get(
+            departures_url(self.kyiv.id), {"limit": 2}
+        )
+        self.assertEqual(len(response.data), 2)
+
+        response = self.client.get(
+            departures_url(self.kyiv.id), {"limit": 0}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_board_of_unknown_station(self):
+        response = self.client.get(departures_url(0))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class StationSpatialLookupTests(TestCase):
+    def setUp(self):
+        station_index.invalidate()
+        self.addCleanup(station_index.invalidate)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.kyiv = sample_station(
+            name="Kyiv", latitude=50.4501, longitude=30.5234
+        )
+        self.lviv = sample_station(
+            name="Lviv", latitude=49.8397, longitude=24.0297
+        )
+        self.odesa = sample_station(
+            name="Odesa", latitude=46.4825, longitude=30.7233
+        )
+        self.vladivostok = sample_station(
+            name="Vladivostok", latitude=43.1155, longitude=131.8855
+        )
+        self.anchorage = sample_station(
+            name="Anchorage", latitude=61.2181, longitude=-149.9003
+        )
+
+    def test_nearest_stations(self):
+        response = self.client.get(
+            NEAREST_URL, {"lat": 50.0, "lon": 30.0, "limit": 3}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["id"] for station in response.data],
+            [self.kyiv.id, self.odesa.id, self.lviv.id],
+        )
+        self.assertAlmostEqual(response.data[0]["distance"], 61.6, delta=1)
+
+    def test_nearest_within_radius(self):
+        response = self.client.get(
+            NEAREST_URL, {"lat": 49.84, "lon": 24.03, "radius": 100}
+        )
+
+        self.assertEqual(
+            [station["id"] for station in response.data], [self.lviv.id]
+        )
+
+    def test_nearest_far_from_any_station(self):
+        response = self.client.get(
+            NEAREST_URL, {"lat": -45.0, "lon": 170.0, "limit": 1}
+        )
+
+        self.assertEqual(
+            [station["id"] for station in response.data],
+            [self.vladivostok.id],
+        )
+
+    def test_index_is_rebuilt_when_stations_change(self):
+        self.client.get(NEAREST_URL, {"lat": 50.0, "lon": 30.0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bila = sample_station(
+                name="Bila Tserkva", latitude=49.8, longitude=30.1
+            )
+        response = self.client.get(
+            NEAREST_URL, {"lat": 49.8, "lon": 30.1, "limit": 1}
+        )
+
+        self.assertEqual(response.data[0]["id"], bila.id)
+
+    def test_within_bounding_box(self):
+        response = self.client.get(WITHIN_URL, {"bbox": "46,24,51,31"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["id"] for station in response.data],
+            [self.kyiv.id, self.lviv.id, self.odesa.id],
+        )
+
+    def test_within_across_antimeridian(self):
+        response = self.client.get(WITHIN_URL, {"bbox": "40,130,70,-140"})
+
+        self.assertEqual(
+            [station["id"] for station in response.data],
+            [self.vladivostok.id, self.anchorage.id],
+        )
+
+    def test_invalidation_during_build_is_not_lost(self):
+        build = station_index._build
+
+        def build_and_invalidate():
+            data = build()
+            station_index.invalidate()
+            return data
+
+        with patch.object(
+            station_index, "_build", side_effect=build_and_invalidate
+        ):
+            self.client.get(NEAREST_URL, {"lat": 50.0, "lon": 30.0})
+        brovary = sample_station(
+            name="Brovary", latitude=50.5114, longitude=30.7903
+        )
+
+        response = self.client.get(
+            NEAREST_URL, {"lat": 50.5, "lon": 30.8, "limit": 1}
+        )
+        self.assertEqual(
+            [station["id"] for station in response.data], [brovary.id]
+        )
+
+    def test_invalid_coordinates(self):
+        response = self.client.get(NEAREST_URL, {"lat": 91, "lon": 30})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(WITHIN_URL, {"bbox": "46,24,51"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StationAutocompleteTests(TestCase):
+    def setUp(self):
+        station_autocomplete.invalidate()
+        self.addCleanup(station_autocomplete.invalidate)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.user)
+
+        self.kyiv = sample_station(name="Kyiv-Pasazhyrskyi")
+        self.kyivska = sample_station(name="Kyivska")
+        self.darnytsia = sample_station(name="Kyiv Darnytsia")
+        self.lviv = sample_station(name="Lviv")
+        self.krakow = sample_station(name="Kraków Główny")
+
+    def complete(self, prefix, **params):
+        response = self.client.get(AUTOCOMPLETE_URL, {"q": prefix, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [station["id"] for station in response.data]
+
+    def test_prefix_matches(self):
+        self.assertEqual(
+            self.complete("KYIV"),
+            [self.darnytsia.id, self.kyiv.id, self.kyivska.id],
+        )
+        self.assertEqual(self.complete("kyiv p"), [self.kyiv.id])
+
+    def test_inner_word_matches_come_after_name_matches(self):
+        lviv_darnytsia = sample_station(name="Darnytsia Depot")
+
+        self.assertEqual(
+            self.complete("darn"), [lviv_darnytsia.id, self.darnytsia.id]
+        )
+
+    def test_accents_are_ignored(self):
+        self.assertEqual(self.complete("krakow glow"), [self.krakow.id])
+
+    def test_limit(self):
+        self.assertEqual(len(self.complete("k", limit=2)), 2)
+
+    def test_no_query(self):
+        self.assertEqual(self.complete(""), [])
+
+    def test_index_is_invalidated_when_stations_change(self):
+        self.complete("lv")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lviv.name = "Lviv Holovnyi"
+            self.lviv.save()
+            odesa = sample_station(name="Odesa")
+
+        self.assertEqual(self.complete("holov"), [self.lviv.id])
+        self.assertEqual(self.complete("ode"), [odesa.id])
+
+    def test_invalidation_during_build_is_not_lost(self):
+        build = station_autocomplete._build
+
+        def build_and_invalidate():
+            index = build()
+            station_autocomplete.invalidate()
+            return index
+
+        with patch.object(
+            station_autocomplete, "_build", side_effect=build_and_invalidate
+        ):
+            self.complete("lv")
+        odesa = sample_station(name="Odesa")
+
+        self.assertEqual(self.complete("ode"), [odesa.id])
+
+    def test_autocomplete_does_not_query_the_database(self):
+        self.complete("ky")
+
+        with self.assertNumQueries(0):
+            station_autocomplete.complete("ky", 10)
+
+
+class StationResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            email="admin@test.test",
+            password="test_password"
+        )
+        self.client.force_authenticate(self.admin)
+        self.station = sample_station(name="Kyiv")
+
+    def test_admin_edit_is_visible_immediately(self):
+        self.client.get(STATION_URL)
+        self.client.get(detail_url(self.station.id))
+
+        self.client.patch(detail_url(self.station.id), {"name": "Kyiv-Pas"})
+        self.client.post(
+            STATION_URL, {"name": "Lviv", "latitude": 49.8, "longitude": 24}
+        )
+
+        response = self.client.get(STATION_URL)
+        self.assertEqual(
+            [station["name"] for station in response.data["results"]],
+            ["Kyiv-Pas", "Lviv"],
+        )
+        response = self.client.get(detail_url(self.station.id))
+        self.assertEqual(response.data["name"], "Kyiv-Pas")
+
+    def test_route_change_invalidates_station_detail(self):
+        self.client.get(detail_url(self.station.id))
+
+        Route.objects.create(
+            name="Kyiv - Lviv",
+            source=self.station,
+            destination=sample_station(name="Lviv"),
+            distance=540,
+        )
+
+        response = self.client.get(detail_url(self.station.id))
+        self.assertEqual(response.data["routes_from"], ["Kyiv - Lviv"])
+
+    def test_deleted_station_is_gone(self):
+        self.client.get(STATION_URL)
+
+        self.client.delete(detail_url(self.station.id))
+
+        response = self.client.get(STATION_URL)
+        self.assertEqual(response.data["results"], [])
+
+
+class NameSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.test", password="test_password"
+        )
+        self.client.force_login(self.user)
+        self.kyiv = sample_station(name="Kyiv")
+        self.lviv = sample_station(name="Lviv")
+        self.lvivska = sample_station(name="Lvivska")
+        self.route = Route.objects.create(
+            name="Kyiv - Lviv",
+            source=self.kyiv,
+            destination=self.lviv,
+            distance=540,
+        )
+        Route.objects.create(
+            name="Lviv - Lvivska",
+            source=self.lviv,
+            destination=self.lvivska,
+            distance=5,
+        )
+        train_type = TrainType.objects.create(name="Express")
+        self.train = Train.objects.create(
+            name="Intercity+", cargo_num=5, places_in_cargo=20,
+            train_type=train_type,
+        )
+        Train.objects.create(
+            name="Regional", cargo_num=5, places_in_cargo=20,
+            train_type=train_type,
+        )
+
+    def test_station_name_filter(self):
+        response = self.client.get(STATION_URL, {"name": "lviv"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            {station["name"] for station in response.data["results"]},
+            {"Lviv", "Lvivska"},
+        )
+
+    def test_route_and_train_names_are_matched_case_insensitively(self):
+        self.assertEqual(
+            list(search_by_name(Route.objects.all(), "KYIV")), [self.route]
+        )
+        self.assertEqual(
+            list(search_by_name(Train.objects.all(), "city")), [self.train]
+        )
+
+    def test_unmatched_name_returns_nothing(self):
+        self.assertFalse(search_by_name(Station.objects.all(), "Odesa"))
+
+
+@skipUnless(
+    connection.vendor == "postgresql", "Trigram search needs PostgreSQL."
+)
+class TrigramNameSearchTests(NameSearchTests):
+    def test_typos_are_matched(self):
+        self.assertEqual(
+            list(search_by_name(Station.objects.all(), "Kyev")), [self.kyiv]
+        )
+
+    def test_rank_orders_by_similarity(self):
+        sample_station(name="Lvov")
+
+        stations = search_by_name(Station.objects.all(), "Lviv", rank=True)
+
+        self.assertEqual(
+            [station.name for station in stations][:2], ["Lviv", "Lvivska"]
+        )
+
+    def test_station_list_is_ranked(self):
+        response = self.client.get(STATION_URL, {"name": "Lvivska"})
+
+        self.assertEqual(
+            response.data["results"][0]["name"], "Lvivska"
+        )
+
+    def test_trigram_indexes_exist(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT indexname FROM pg_indexes "
+                "WHERE indexname LIKE 'railway_%%_name_trgm_idx'"
+            )
+            indexes = {row[0] for row in cursor.fetchall()}
+        self.assertEqual(
+            indexes,
+            {
+                "railway_station_name_trgm_idx",
+                "railway_route_name_trgm_idx",
+                "railway_train_name_trgm_idx",
+            },
+        )
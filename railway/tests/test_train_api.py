@@ -3,7 +3,10 @@ import tempfile
 
 from PIL import Image
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
@@ -262,3 +265,134 @@ class TrainImageUploadTests(TestCase):
         response = self.client.get(TRAIN_URL)
 
         self.assertIn("image", response.data["results"][0].keys())
+
+
+class TrainResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.train_type = sample_train_type(name="Express")
+        self.train = sample_train(train_type=self.train_type)
+
+    def test_cached_list_skips_the_database(self):
+        first = self.client.get(TRAIN_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(TRAIN_URL)
+        self.assertEqual(second.data, first.data)
+
+    def test_query_params_are_part_of_the_key(self):
+        other_type = sample_train_type(name="Regional")
+        self.client.get(TRAIN_URL, {"train_type": self.train_type.id})
+
+        response = self.client.get(TRAIN_URL, {"train_type": other_type.id})
+        self.assertEqual(response.data["results"], [])
+
+    def test_related_model_change_invalidates(self):
+        self.client.get(TRAIN_URL)
+
+        self.train_type.name = "Night"
+        self.train_type.save()
+
+        response = self.client.get(TRAIN_URL)
+        self.assertEqual(response.data["results"][0]["type"], "Night")
+
+    def test_train_change_invalidates_detail(self):
+        self.client.get(detail_url(self.train.id))
+
+        self.train.name = "Renamed"
+        self.train.save()
+
+        response = self.client.get(detail_url(self.train.id))
+        self.assertEqual(response.data["name"], "Renamed")
+
+
+class TrainLeanListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpass"
+        )
+        self.client.force_authenticate(self.user)
+        train_type = sample_train_type(name="Express")
+        sample_train(name="With image", train_type=train_type)
+        sample_train(name="Without image", train_type=train_type)
+        Train.objects.filter(name="With image").update(
+            image="uploads/trains/train.jpg"
+        )
+
+    def test_list_matches_model_serializer(self):
+        responses = []
+        for lean in (False, True):
+            cache.clear()
+            with override_settings(LEAN_LIST_SERIALIZATION=lean):
+                responses.append(self.client.get(TRAIN_URL))
+        regular, lean = responses
+
+        self.assertEqual(lean.status_code, status.HTTP_200_OK)
+        self.assertTrue(any(row["image"] for row in lean.data["results"]))
+        self.assertEqual(lean.json(), regular.json())
+
+
+class TrainCompactFormatTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpass"
+        )
+        self.client.force_authenticate(self.user)
+        train_type = sample_train_type(name="Express")
+        sample_train(name="Train 1", train_type=train_type)
+        sample_train(name="Train 2", train_type=train_type)
+
+    def test_list_is_columnar(self):
+        response = self.client.get(TRAIN_URL, {"format": "compact"})
+        content = response.json()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(content["dictionaries"], {"type": ["Express"]})
+        names = [
+            row[content["columns"].index("name")] for row in content["rows"]
+        ]
+        self.assertEqual(sorted(names), ["Train 1", "Train 2"])
+
+
+class TrainSparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="testpass"
+        )
+        self.client.force_authenticate(self.user)
+        self.train_type = sample_train_type(name="Express")
+        sample_train(name="Train 1", train_type=self.train_type)
+
+    def test_fields_skip_train_type_join(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(TRAIN_URL, {"fields": "id,capacity"})
+
+        self.assertEqual(
+            list(response.data["results"][0]), ["id", "capacity"]
+        )
+        self.assertEqual(response.data["results"][0]["capacity"], 100)
+        for query in queries.captured_queries:
+            self.assertNotIn("railway_traintype", query["sql"])
+
+    def test_expand_type(self):
+        response = self.client.get(
+            TRAIN_URL, {"fields": "name", "expand": "type"}
+        )
+
+        self.assertEqual(
+            response.data["results"],
+            [{
+                "name": "Train 1",
+                "type": {"id": self.train_type.id, "name": "Express"},
+            }],
+        )
@@ -0,0 +1,261 @@
+import threading
+from bisect import bisect_left, insort
+from collections import namedtuple
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+from railway.models import Journey
+
+# One timetable connection per journey, ordered by departure.
+# Times are POSIX timestamps so the scans compare plain floats.
+Connection = namedtuple(
+    "Connection",
+    ["departure", "arrival", "source", "destination", "journey"],
+)
+
+Leg = namedtuple(
+    "Leg",
+    ["journey", "source", "destination", "departure_time", "arrival_time"],
+)
+
+
+@dataclass
+class Itinerary:
+    legs: list[Leg]
+
+    @property
+    def departure_time(self) -> datetime:
+        return self.legs[0].departure_time
+
+    @property
+    def arrival_time(self) -> datetime:
+        return self.legs[-1].arrival_time
+
+    @property
+    def transfers(self) -> int:
+        return len(self.legs) - 1
+
+    @classmethod
+    def from_connections(cls, connections) -> "Itinerary":
+        return cls([
+            Leg(
+                journey=connection.journey,
+                source=connection.source,
+                destination=connection.destination,
+                departure_time=_to_datetime(connection.departure),
+                arrival_time=_to_datetime(connection.arrival),
+            )
+            for connection in connections
+        ])
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, dt_timezone.utc)
+
+
+class TimetableIndex:
+    """In-memory, incrementally refreshed index of journey connections.
+
+    The index is loaded from the database on first use with one query
+    and afterwards kept current by ``refresh_journeys``,
+    ``remove_journeys`` and ``refresh_routes``, which the model signals
+    call once a write is committed.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connections = []
+            self._by_journey = {}
+            self._built = False
+
+    @staticmethod
+    def _rows(journeys):
+        return journeys.values_list(
+            "id",
+            "departure_time",
+            "arrival_time",
+            "source_station_id",
+            "destination_station_id",
+        )
+
+    def _add(self, row) -> None:
+        journey_id, departure_time, arrival_time, source, destination = row
+        connection = Connection(
+            departure_time.timestamp(),
+            arrival_time.timestamp(),
+            source,
+            destination,
+            journey_id,
+        )
+        insort(self._connections, connection)
+        self._by_journey[journey_id] = connection
+
+    def _remove(self, journey_id: int) -> None:
+        connection = self._by_journey.pop(journey_id, None)
+        if connection is not None:
+            del self._connections[
+                bisect_left(self._connections, connection)
+            ]
+
+    def _ensure_built(self) -> None:
+        if self._built:
+            return
+        rows = self._rows(
+            Journey.objects.filter(arrival_time__gte=timezone.now())
+        )
+        self._connections = []
+        self._by_journey = {}
+        for row in rows:
+            connection = Connection(
+                row[1].timestamp(), row[2].timestamp(), row[3], row[4], row[0]
+            )
+            self._connections.append(connection)
+            self._by_journey[row[0]] = connection
+        self._connections.sort()
+        self._built = True
+
+    def refresh_journeys(self, journey_ids) -> None:
+        with self._lock:
+            if not self._built:
+                return
+            journey_ids = list(journey_ids)
+            for journey_id in journey_ids:
+                self._remove(journey_id)
+            for row in self._rows(Journey.objects.filter(id__in=journey_ids)):
+                self._add(row)
+
+    def remove_journeys(self, journey_ids) -> None:
+        with self._lock:
+            for journey_id in journey_ids:
+                self._remove(journey_id)
+
+    def refresh_routes(self, route_ids) -> None:
+        with self._lock:
+            if not self._built:
+                return
+            self.refresh_journeys(
+                Journey.objects
+                .filter(route_id__in=route_ids)
+                .values_list("id", flat=True)
+            )
+
+    def _window(self, depart_after: datetime, window: timedelta) -> list:
+        start = bisect_left(self._connections, (depart_after.timestamp(),))
+        end = bisect_left(
+            self._connections, ((depart_after + window).timestamp(),)
+        )
+        return self._connections[start:end]
+
+    def plan(
+        self,
+        source: int,
+        destination: int,
+        depart_after: datetime,
+        min_transfer: timedelta,
+        max_legs: int,
+        window: timedelta,
+    ) -> tuple:
+        """Return the earliest-arrival and the fewest-transfer itineraries.
+
+        Both are connection scans over the departures inside ``window``:
+        a single pass for the earliest arrival, and one pass per number
+        of legs (RAPTOR-style rounds) for the fewest transfers. Changing
+        trains requires ``min_transfer`` between arrival and departure.
+        Either itinerary is ``None`` when the destination is unreachable.
+        """
+        if source == destination:
+            return None, None
+        with self._lock:
+            self._ensure_built()
+            connections = self._window(depart_after, window)
+        start = depart_after.timestamp()
+        transfer = min_transfer.total_seconds()
+
+        earliest = self._earliest_arrival(
+            connections, source, destination, start, transfer
+        )
+        fewest = self._fewest_transfers(
+            connections, source, destination, start, transfer, max_legs
+        )
+        return earliest, fewest
+
+    @staticmethod
+    def _ready_time(station, label_time, source, transfer) -> float:
+        return label_time if station == source else label_time + transfer
+
+    def _earliest_arrival(
+        self, connections, source, destination, start, transfer
+    ):
+        arrival = {source: start}
+        via = {}
+        best = float("inf")
+        for connection in connections:
+            if connection.departure >= best:
+                break
+            reached = arrival.get(connection.source)
+            if reached is None or connection.departure < self._ready_time(
+                connection.source, reached, source, transfer
+            ):
+                continue
+            if connection.arrival < arrival.get(
+                connection.destination, float("inf")
+            ):
+                arrival[connection.destination] = connection.arrival
+                via[connection.destination] = connection
+                if connection.destination == destination:
+                    best = connection.arrival
+
+        if destination not in via:
+            return None
+        legs = []
+        station = destination
+        while station != source:
+            legs.append(via[station])
+            station = via[station].source
+        return Itinerary.from_connections(reversed(legs))
+
+    def _fewest_transfers(
+        self, connections, source, destination, start, transfer, max_legs
+    ):
+        # labels[k][station] = (arrival time, connection) using <= k legs.
+        labels = [{source: (start, None)}]
+        for _ in range(max_legs):
+            previous = labels[-1]
+            current = dict(previous)
+            for connection in connections:
+                reached = previous.get(connection.source)
+                if reached is None or connection.departure < (
+                    self._ready_time(
+                        connection.source, reached[0], source, transfer
+                    )
+                ):
+                    continue
+                best = current.get(connection.destination)
+                if best is None or connection.arrival < best[0]:
+                    current[connection.destination] = (
+                        connection.arrival, connection
+                    )
+            labels.append(current)
+
+            if destination in current:
+                legs = []
+                station = destination
+                for round_labels in reversed(labels):
+                    if station == source:
+                        break
+                    connection = round_labels[station][1]
+                    legs.append(connection)
+                    station = connection.source
+                return Itinerary.from_connections(reversed(legs))
+            if current == previous:
+                break
+        return None
+
+
+timetable = TimetableIndex()
@@ -8,7 +8,10 @@ from railway.views import (
     StationViewSet,
     RouteViewSet,
     JourneyViewSet,
+    ItineraryViewSet,
     OrderViewSet,
+    SeatHoldViewSet,
+    CacheStatsViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -18,7 +21,10 @@ router.register("trains", TrainViewSet)
 router.register("stations", StationViewSet)
 router.register("routes", RouteViewSet)
 router.register("journeys", JourneyViewSet)
+router.register("itineraries", ItineraryViewSet, basename="itinerary")
 router.register("orders", OrderViewSet)
+router.register("seat_holds", SeatHoldViewSet)
+router.register("cache_stats", CacheStatsViewSet, basename="cache-stats")
 
 urlpatterns = [path("", include(router.urls))]
 
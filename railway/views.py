@@ -1,19 +1,39 @@
-from datetime import datetime
+import math
+from datetime import datetime, time, timedelta
 
-from django.db.models import Count, F
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Prefetch
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
     OpenApiExample
 )
-from rest_framework import status
+from rest_framework import mixins, status
 from rest_framework.decorators import action
-from rest_framework.exceptions import ParseError
+from rest_framework.exceptions import NotFound, ParseError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
+from railway.booking import cancel_hold
+from railway.cache import CachedResponseMixin, ConditionalGetMixin
+from railway.export import (
+    CONTENT_TYPES,
+    ExportContentNegotiation,
+    export_response,
+)
+from railway.fieldsets import SparseFieldsetMixin, sparse_fieldset_parameters
+from railway.geo import station_index
+from railway.lean import LeanListMixin
+from railway.network import route_network
+from railway.pagination import JourneyPagination, OrderPagination
+from railway.search import search_by_name, station_autocomplete
+from railway.timetable import timetable
 from railway.models import (
     Crew,
     TrainType,
@@ -22,32 +42,76 @@ from railway.models import (
     Route,
     Journey,
     Order,
+    SeatHold,
+    Ticket,
 )
 from railway.serializers import (
+    CREW_PREFETCH,
     CrewSerializer,
     CrewListSerializer,
     TrainTypeSerializer,
     TrainSerializer,
     TrainListSerializer,
+    TrainLeanListSerializer,
     TrainDetailSerializer,
     TrainImageSerializer,
     StationSerializer,
     StationListSerializer,
     StationDetailSerializer,
+    StationDistanceSerializer,
     RouteSerializer,
     RouteListSerializer,
+    RouteLeanListSerializer,
     RouteDetailSerializer,
+    ShortestRouteSerializer,
     JourneySerializer,
     JourneyListSerializer,
+    JourneyLeanListSerializer,
     JourneyDetailSerializer,
+    JourneyBoardSerializer,
+    JourneySeatMapSerializer,
+    ItineraryPlanSerializer,
     OrderSerializer,
-    OrderListSerializer
+    OrderListSerializer,
+    SeatHoldSerializer,
+    CacheStatsSerializer,
 )
 
+EXPORT_URL_PATH = r"export/(?P<fmt>ndjson|csv)"
+
+EXPORT_SCHEMA = {
+    "parameters": [
+        OpenApiParameter(
+            name="fmt",
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.PATH,
+            enum=list(CONTENT_TYPES),
+            description="Export format: one JSON object per line, or CSV.",
+        ),
+    ],
+    "responses": {
+        (200, content_type): OpenApiTypes.STR
+        for content_type in CONTENT_TYPES.values()
+    },
+}
+
+
+def _params_to_station_id(query_string: str, param: str) -> int:
+    """Convert a station id query parameter to an integer."""
+    try:
+        return int(query_string)
+    except (TypeError, ValueError):
+        raise ParseError(
+            f"{param} query parameter must be a station id. exm:(1)"
+        )
 
-class CrewViewSet(ModelViewSet):
+
+class CrewViewSet(
+    ConditionalGetMixin, CachedResponseMixin, ModelViewSet
+):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
+    version_models = (Crew,)
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -55,14 +119,25 @@ class CrewViewSet(ModelViewSet):
         return CrewSerializer
 
 
-class TrainTypeViewSet(ModelViewSet):
+class TrainTypeViewSet(
+    ConditionalGetMixin, CachedResponseMixin, ModelViewSet
+):
     queryset = TrainType.objects.all()
     serializer_class = TrainTypeSerializer
+    version_models = (TrainType,)
 
 
-class TrainViewSet(ModelViewSet):
-    queryset = Train.objects.all()
+class TrainViewSet(
+    SparseFieldsetMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    LeanListMixin,
+    ModelViewSet,
+):
+    queryset = Train.objects.order_by("id")
     serializer_class = TrainSerializer
+    lean_serializer_class = TrainLeanListSerializer
+    version_models = (Train, TrainType)
 
     @staticmethod
     def _params_to_ints(query_string: str) -> list[int]:
@@ -83,7 +158,9 @@ class TrainViewSet(ModelViewSet):
             train_type = self._params_to_ints(train_type)
             queryset = queryset.filter(train_type_id__in=train_type)
 
-        if self.action in ["list", "retrieve"]:
+        if self.action in self.sparse_actions:
+            queryset = self.get_sparse_queryset(queryset)
+        elif self.action == "retrieve":
             queryset = queryset.select_related("train_type")
         return queryset
 
@@ -143,6 +220,7 @@ class TrainViewSet(ModelViewSet):
                     )
                 ],
             ),
+            *sparse_fieldset_parameters(TrainListSerializer),
         ],
         responses={200: TrainListSerializer},
         description=(
@@ -154,27 +232,301 @@ class TrainViewSet(ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class StationViewSet(ModelViewSet):
+class StationViewSet(
+    ConditionalGetMixin, CachedResponseMixin, ModelViewSet
+):
     queryset = Station.objects.all()
     serializer_class = StationSerializer
+    version_models = (Station, Route)
 
     def get_queryset(self):
         queryset = self.queryset
         name = self.request.query_params.get("name")
         if name:
-            queryset = Station.objects.filter(name__icontains=name)
+            queryset = search_by_name(queryset, name, rank=True)
 
-        if self.action in ["list", "retrieve"]:
+        if self.action == "retrieve":
             queryset = queryset.prefetch_related("routes_from", "routes_to")
         return queryset
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ["list", "autocomplete"]:
             return StationListSerializer
         if self.action == "retrieve":
             return StationDetailSerializer
+        if self.action in ["departures", "arrivals"]:
+            return JourneyBoardSerializer
+        if self.action == "nearest":
+            return StationDistanceSerializer
         return self.serializer_class
 
+    @staticmethod
+    def _params_to_limit(
+        query_string: str | None, default: int, maximum: int
+    ) -> int:
+        if not query_string:
+            return default
+        try:
+            limit = int(query_string)
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= maximum:
+            raise ParseError(
+                "limit query parameter must be a number between 1 and "
+                f"{maximum}. exm:({default})"
+            )
+        return limit
+
+    @staticmethod
+    def _params_to_coordinate(
+        query_string: str | None, param: str, bound: int
+    ) -> float:
+        try:
+            value = float(query_string)
+        except (TypeError, ValueError):
+            value = math.nan
+        if not -bound <= value <= bound:
+            raise ParseError(
+                f"{param} query parameter must be a number between "
+                f"-{bound} and {bound}. exm:(49.84)"
+            )
+        return value
+
+    def _board(self, station_field: str, time_field: str) -> Response:
+        """Next journeys leaving or reaching a station, soonest first.
+
+        Reads the denormalized station columns of Journey, so the board
+        is an index-only range scan of one (station, time, id) index,
+        with the displayed columns included in the index.
+        """
+        station = self.get_object()
+        limit = self._params_to_limit(
+            self.request.query_params.get("limit"),
+            settings.STATION_BOARD_DEFAULT_LIMIT,
+            settings.STATION_BOARD_MAX_LIMIT,
+        )
+        journeys = (
+            Journey.objects
+            .filter(**{
+                station_field: station,
+                f"{time_field}__gte": timezone.now(),
+            })
+            .select_related("train", "source_station", "destination_station")
+            .only(
+                "departure_time",
+                "arrival_time",
+                "train__name",
+                "source_station__name",
+                "destination_station__name",
+            )
+            .order_by(time_field, "id")[:limit]
+        )
+        serializer = self.get_serializer(journeys, many=True)
+        response = Response(serializer.data, status=status.HTTP_200_OK)
+        patch_cache_control(response, max_age=settings.STATION_BOARD_MAX_AGE)
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Number of departures to show (default 20).",
+            ),
+        ],
+        description="Next journeys departing from the station.",
+        responses={200: JourneyBoardSerializer(many=True)},
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="departures",
+    )
+    def departures(self, request, pk=None):
+        return self._board("source_station", "departure_time")
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Number of arrivals to show (default 20).",
+            ),
+        ],
+        description="Next journeys arriving at the station.",
+        responses={200: JourneyBoardSerializer(many=True)},
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="arrivals",
+    )
+    def arrivals(self, request, pk=None):
+        return self._board("destination_station", "arrival_time")
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="q",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description=(
+                    "Typed prefix of the station name or of a word in it "
+                    "(case- and accent-insensitive)."
+                ),
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Number of suggestions to return (default 10).",
+            ),
+        ],
+        description=(
+            "Station name suggestions for typeahead, served from an "
+            "in-memory prefix index."
+        ),
+        responses={200: StationListSerializer(many=True)},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="autocomplete",
+    )
+    def autocomplete(self, request):
+        limit = self._params_to_limit(
+            request.query_params.get("limit"),
+            settings.STATION_LOOKUP_DEFAULT_LIMIT,
+            settings.STATION_LOOKUP_MAX_LIMIT,
+        )
+        stations = station_autocomplete.complete(
+            request.query_params.get("q", ""), limit
+        )
+        serializer = self.get_serializer(stations, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="lat",
+                type=OpenApiTypes.FLOAT,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="Latitude of the point.",
+            ),
+            OpenApiParameter(
+                name="lon",
+                type=OpenApiTypes.FLOAT,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="Longitude of the point.",
+            ),
+            OpenApiParameter(
+                name="radius",
+                type=OpenApiTypes.FLOAT,
+                location=OpenApiParameter.QUERY,
+                description="Only stations within this distance (km).",
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Number of stations to return (default 10).",
+            ),
+        ],
+        description=(
+            "Stations closest to a point, nearest first, "
+            "with their great-circle distance in km."
+        ),
+        responses={200: StationDistanceSerializer(many=True)},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="nearest",
+    )
+    def nearest(self, request):
+        params = request.query_params
+        lat = self._params_to_coordinate(params.get("lat"), "lat", 90)
+        lon = self._params_to_coordinate(params.get("lon"), "lon", 180)
+        radius = params.get("radius")
+        if radius:
+            try:
+                radius = float(radius)
+            except ValueError:
+                raise ParseError(
+                    "radius query parameter must be a distance in km. "
+                    "exm:(25)"
+                )
+        limit = self._params_to_limit(
+            params.get("limit"),
+            settings.STATION_LOOKUP_DEFAULT_LIMIT,
+            settings.STATION_LOOKUP_MAX_LIMIT,
+        )
+        stations = station_index.nearest(
+            lat, lon, limit, radius=radius or None
+        )
+        serializer = self.get_serializer(stations, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="bbox",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description=(
+                    "Bounding box as `south,west,north,east` in degrees. "
+                    "West greater than east crosses the antimeridian. "
+                    "Example: `49.5,23.5,50,24.5`"
+                ),
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description="Number of stations to return (default 10).",
+            ),
+        ],
+        description="Stations inside a bounding box, ordered by id.",
+        responses={200: StationSerializer(many=True)},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="within",
+    )
+    def within(self, request):
+        params = request.query_params
+        bbox = (params.get("bbox") or "").split(",")
+        if len(bbox) != 4:
+            raise ParseError(
+                "bbox query parameter must be south,west,north,east. "
+                "exm:(49.5,23.5,50,24.5)"
+            )
+        south, north = (
+            self._params_to_coordinate(bbox[index], "bbox", 90)
+            for index in (0, 2)
+        )
+        west, east = (
+            self._params_to_coordinate(bbox[index], "bbox", 180)
+            for index in (1, 3)
+        )
+        if south > north:
+            raise ParseError("bbox south must not be greater than north.")
+        limit = self._params_to_limit(
+            params.get("limit"),
+            settings.STATION_LOOKUP_DEFAULT_LIMIT,
+            settings.STATION_LOOKUP_MAX_LIMIT,
+        )
+        stations = station_index.within(south, west, north, east, limit)
+        serializer = self.get_serializer(stations, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -182,8 +534,9 @@ class StationViewSet(ModelViewSet):
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
                 description=(
-                    "Filter stations by name "
-                    "(case-insensitive, partial match allowed)."
+                    "Filter stations by name (case-insensitive, partial "
+                    "match allowed, typo-tolerant on PostgreSQL; results "
+                    "are ranked by similarity)."
                 ),
             ),
         ],
@@ -197,13 +550,23 @@ class StationViewSet(ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class RouteViewSet(ModelViewSet):
-    queryset = Route.objects.all()
+class RouteViewSet(
+    SparseFieldsetMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    LeanListMixin,
+    ModelViewSet,
+):
+    queryset = Route.objects.order_by("id")
     serializer_class = RouteSerializer
+    lean_serializer_class = RouteLeanListSerializer
+    version_models = (Route, Station)
 
     def get_queryset(self):
         queryset = self.queryset
-        if self.action in ["list", "retrieve"]:
+        if self.action in self.sparse_actions:
+            queryset = self.get_sparse_queryset(queryset)
+        elif self.action == "retrieve":
             queryset = queryset.select_related("source", "destination")
         return queryset
 
@@ -212,69 +575,158 @@ class RouteViewSet(ModelViewSet):
             return RouteListSerializer
         if self.action == "retrieve":
             return RouteDetailSerializer
+        if self.action == "shortest":
+            return ShortestRouteSerializer
         return self.serializer_class
 
+    @extend_schema(
+        parameters=sparse_fieldset_parameters(RouteListSerializer),
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="from",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="ID of the departure station.",
+            ),
+            OpenApiParameter(
+                name="to",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="ID of the arrival station.",
+            ),
+        ],
+        description=(
+            "Shortest rail distance between two stations over the route "
+            "network and the stations on the way. `distance` is null "
+            "when the stations are not connected."
+        ),
+        responses={200: ShortestRouteSerializer},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="shortest",
+    )
+    def shortest(self, request):
+        params = request.query_params
+        source = _params_to_station_id(params.get("from"), "from")
+        destination = _params_to_station_id(params.get("to"), "to")
+        distance, path = route_network.shortest(source, destination)
+        serializer = self.get_serializer({
+            "source": source,
+            "destination": destination,
+            "distance": distance,
+            "path": path,
+        })
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
-class JourneyViewSet(ModelViewSet):
+class JourneyViewSet(
+    SparseFieldsetMixin,
+    ConditionalGetMixin,
+    CachedResponseMixin,
+    LeanListMixin,
+    ModelViewSet,
+):
     queryset = Journey.objects.all()
     serializer_class = JourneySerializer
+    lean_serializer_class = JourneyLeanListSerializer
+    version_models = (Journey, Route, Station, Train, TrainType, Crew)
+    pagination_class = JourneyPagination
+    sparse_actions = ("list", "search")
 
-    def get_queryset(self):
-        queryset = self.queryset
-        route = self.request.query_params.get("route")
-        train = self.request.query_params.get("train")
-        departure_after = self.request.query_params.get("departure_after")
-        departure_before = self.request.query_params.get("departure_before")
-        arrival_after = self.request.query_params.get("arrival_after")
-        arrival_before = self.request.query_params.get("arrival_before")
+    @staticmethod
+    def _params_to_day_start(
+        query_string: str, param: str, days: int = 0
+    ) -> datetime:
+        """Start of the given day (plus `days`) in the current time zone."""
+        try:
+            day = datetime.strptime(query_string, "%Y-%m-%d").date()
+        except ValueError:
+            raise ParseError(
+                f"{param} query parameter must be a date "
+                "in YYYY-MM-DD format. exm:(2025-06-29)"
+            )
+        return timezone.make_aware(
+            datetime.combine(day + timedelta(days=days), time.min)
+        )
 
-        if route:
-            queryset = queryset.filter(route__name__icontains=route)
+    @classmethod
+    def filter_by_params(cls, queryset, query_params):
+        """Apply the journey search query parameters to a queryset.
 
-        if train:
-            queryset = queryset.filter(train__name__icontains=train)
+        Date filters are turned into half-open ranges on the raw
+        timestamp columns (`>= start of day`, `< start of next day`)
+        so that the departure_time/arrival_time indexes can serve them.
+        """
+        route = query_params.get("route")
+        train = query_params.get("train")
 
-        if departure_after:
-            departure_after = (
-                datetime
-                .strptime(departure_after, "%Y-%m-%d").date()
-            )
-            queryset = (
-                queryset
-                .filter(departure_time__date__gte=departure_after)
+        if route:
+            queryset = queryset.filter(
+                route__in=search_by_name(Route.objects.all(), route)
             )
 
-        if departure_before:
-            departure_before = (
-                datetime
-                .strptime(departure_before, "%Y-%m-%d").date()
-            )
-            queryset = (
-                queryset
-                .filter(departure_time__date__lte=departure_before)
+        if train:
+            queryset = queryset.filter(
+                train__in=search_by_name(Train.objects.all(), train)
             )
 
-        if arrival_after:
-            arrival_after = (
-                datetime
-                .strptime(arrival_after, "%Y-%m-%d").date()
-            )
-            queryset = (
-                queryset
-                .filter(arrival_time__date__gte=arrival_after)
-            )
+        for param, lookup, days in [
+            ("departure_after", "departure_time__gte", 0),
+            ("departure_before", "departure_time__lt", 1),
+            ("arrival_after", "arrival_time__gte", 0),
+            ("arrival_before", "arrival_time__lt", 1),
+        ]:
+            value = query_params.get(param)
+            if value:
+                queryset = queryset.filter(**{
+                    lookup: cls._params_to_day_start(value, param, days)
+                })
+        return queryset
 
-        if arrival_before:
-            arrival_before = (
-                datetime
-                .strptime(arrival_before, "%Y-%m-%d").date()
-            )
-            queryset = (
-                queryset
-                .filter(arrival_time__date__lte=arrival_before)
-            )
+    def get_cache_params(self, request) -> list:
+        """Search parameters normalized so that equivalent searches share
+        a cached result: names compare case-insensitively, dates and
+        station ids are parsed. Blank filters are ignored, as by
+        `filter_by_params`.
+        """
+        params = []
+        for key, value in super().get_cache_params(request):
+            if value == "":
+                continue
+            if key in ("route", "train"):
+                value = value.lower()
+            elif key in (
+                "departure_after",
+                "departure_before",
+                "arrival_after",
+                "arrival_before",
+            ) or (key == "date" and self.action == "search"):
+                value = self._params_to_day_start(value, key).isoformat()
+            elif key in ("source", "destination") and self.action == "search":
+                value = str(_params_to_station_id(value, key))
+            params.append((key, value))
+        return sorted(params)
 
-        if self.action in ["list", "retrieve"]:
+    def get_cache_timeout(self) -> int:
+        return settings.JOURNEY_SEARCH_CACHE_TIMEOUT
+
+    def get_queryset(self):
+        queryset = self.filter_by_params(
+            self.queryset, self.request.query_params
+        )
+
+        if self.action in self.sparse_actions:
+            queryset = self.get_sparse_queryset(queryset)
+        if self.action == "retrieve":
             queryset = (
                 queryset
                 .select_related(
@@ -282,23 +734,146 @@ class JourneyViewSet(ModelViewSet):
                     "route__destination",
                     "train__train_type",
                 )
-                .prefetch_related("crew", "tickets")
-                .annotate(
-                    tickets_available=(
-                        F("train__cargo_num") * F("train__places_in_cargo")
-                        - Count("tickets")
-                    )
-                )
+                .prefetch_related(CREW_PREFETCH, "tickets")
             )
-        return queryset.distinct()
+        if self.action == "seats":
+            queryset = queryset.select_related("train")
+        return queryset
 
     def get_serializer_class(self):
-        if self.action == "list":
+        if self.action in ["list", "search"]:
             return JourneyListSerializer
         if self.action == "retrieve":
             return JourneyDetailSerializer
+        if self.action == "seats":
+            return JourneySeatMapSerializer
         return self.serializer_class
 
+    @extend_schema(
+        responses={200: JourneySeatMapSerializer},
+        description=(
+            "Compact seat map of a journey. `taken` holds one base64 "
+            "bitmap per cargo; bit `seat - 1` (most significant bit of "
+            "the first byte first) is set when the seat is taken."
+        ),
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="seats",
+    )
+    def seats(self, request, pk=None):
+        journey = self.get_object()
+        serializer = self.get_serializer(journey)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="source",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="ID of the departure station.",
+            ),
+            OpenApiParameter(
+                name="destination",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="ID of the arrival station.",
+            ),
+            OpenApiParameter(
+                name="date",
+                type=OpenApiTypes.DATE,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="Departure date.",
+            ),
+            *sparse_fieldset_parameters(JourneyListSerializer),
+        ],
+        description=(
+            "Journeys from one station to another departing on the given "
+            "date that still have seats available, by departure time."
+        ),
+        responses={200: JourneyListSerializer(many=True)},
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path="search",
+    )
+    def search(self, request):
+        return self._cached_response(self._search, request)
+
+    def _search(self, request):
+        params = request.query_params
+        source = _params_to_station_id(params.get("source"), "source")
+        destination = _params_to_station_id(
+            params.get("destination"), "destination"
+        )
+        date = params.get("date")
+        if not date:
+            raise ParseError("date query parameter is required.")
+
+        queryset = self.get_queryset()
+        if "tickets_available" not in queryset.query.annotations:
+            queryset = queryset.alias(
+                tickets_available=Journey.tickets_available_expression()
+            )
+        queryset = queryset.filter(
+            source_station_id=source,
+            destination_station_id=destination,
+            departure_time__gte=self._params_to_day_start(date, "date"),
+            departure_time__lt=self._params_to_day_start(date, "date", 1),
+            tickets_available__gt=0,
+        )
+        if self.use_lean_serializer():
+            serializer = self.get_lean_serializer(
+                self.get_lean_queryset(queryset)
+            )
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        description=(
+            "Stream every journey matching the list filters (route, "
+            "train, departure/arrival dates) as NDJSON or CSV, by "
+            "departure time."
+        ),
+        **EXPORT_SCHEMA,
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path=EXPORT_URL_PATH,
+        content_negotiation_class=ExportContentNegotiation,
+    )
+    def export(self, request, fmt=None):
+        queryset = (
+            self.get_queryset()
+            .annotate(
+                tickets_available=Journey.tickets_available_expression()
+            )
+            .order_by("departure_time", "id")
+        )
+        return export_response(
+            queryset,
+            {
+                "id": "id",
+                "route": "route__name",
+                "train": "train__name",
+                "source": "source_station__name",
+                "destination": "destination_station__name",
+                "departure_time": "departure_time",
+                "arrival_time": "arrival_time",
+                "tickets_available": "tickets_available",
+            },
+            fmt,
+            "journeys",
+        )
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -307,7 +882,7 @@ class JourneyViewSet(ModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description=(
                     "Filter journeys by route name "
-                    "(case-insensitive, partial match)."
+                    "(case-insensitive, partial or fuzzy match)."
                 ),
             ),
             OpenApiParameter(
@@ -316,7 +891,7 @@ class JourneyViewSet(ModelViewSet):
                 location=OpenApiParameter.QUERY,
                 description=(
                     "Filter journeys by train name "
-                    "(case-insensitive, partial match)."
+                    "(case-insensitive, partial or fuzzy match)."
                 ),
             ),
             OpenApiParameter(
@@ -351,6 +926,7 @@ class JourneyViewSet(ModelViewSet):
                     "Filter journeys that arrive before this date (inclusive)."
                 ),
             ),
+            *sparse_fieldset_parameters(JourneyListSerializer),
         ],
         description=(
             "List all journeys, "
@@ -362,9 +938,124 @@ class JourneyViewSet(ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class OrderViewSet(ModelViewSet):
+class ItineraryViewSet(GenericViewSet):
+    """Connections between two stations, possibly changing trains.
+
+    Itineraries are planned over the in-memory timetable index in
+    ``railway.timetable`` so a request does not load journeys from the
+    database.
+    """
+    serializer_class = ItineraryPlanSerializer
+
+    @staticmethod
+    def _params_to_datetime(query_string: str, param: str) -> datetime:
+        value = parse_datetime(query_string)
+        if value is None:
+            day = parse_date(query_string)
+            if day is None:
+                raise ParseError(
+                    f"{param} query parameter must be a date or datetime "
+                    "in ISO 8601 format. exm:(2025-06-29T08:00)"
+                )
+            value = datetime.combine(day, time.min)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return value
+
+    @staticmethod
+    def _params_to_minutes(query_string: str, param: str) -> timedelta:
+        try:
+            minutes = int(query_string)
+        except ValueError:
+            minutes = -1
+        if minutes < 0:
+            raise ParseError(
+                f"{param} query parameter must be a number of minutes. "
+                "exm:(15)"
+            )
+        return timedelta(minutes=minutes)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="source",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="ID of the departure station.",
+            ),
+            OpenApiParameter(
+                name="destination",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="ID of the arrival station.",
+            ),
+            OpenApiParameter(
+                name="departure_after",
+                type=OpenApiTypes.DATETIME,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "Earliest departure (date or datetime), defaults to now."
+                ),
+            ),
+            OpenApiParameter(
+                name="min_transfer",
+                type=OpenApiTypes.INT,
+                location=OpenApiParameter.QUERY,
+                description=(
+                    "Minimum minutes between trains when changing; "
+                    "defaults to ITINERARY_MIN_TRANSFER."
+                ),
+            ),
+        ],
+        description=(
+            "Earliest-arrival and fewest-transfer itineraries from one "
+            "station to another. An itinerary is null when the "
+            "destination cannot be reached within the search window."
+        ),
+        responses={200: ItineraryPlanSerializer},
+    )
+    def list(self, request):
+        params = request.query_params
+        source = _params_to_station_id(params.get("source"), "source")
+        destination = _params_to_station_id(
+            params.get("destination"), "destination"
+        )
+        departure_after = params.get("departure_after")
+        departure_after = (
+            self._params_to_datetime(departure_after, "departure_after")
+            if departure_after
+            else timezone.now()
+        )
+        min_transfer = params.get("min_transfer")
+        min_transfer = (
+            self._params_to_minutes(min_transfer, "min_transfer")
+            if min_transfer
+            else settings.ITINERARY_MIN_TRANSFER
+        )
+
+        earliest_arrival, fewest_transfers = timetable.plan(
+            source,
+            destination,
+            departure_after,
+            min_transfer=min_transfer,
+            max_legs=settings.ITINERARY_MAX_LEGS,
+            window=settings.ITINERARY_SEARCH_WINDOW,
+        )
+        serializer = self.get_serializer({
+            "earliest_arrival": earliest_arrival,
+            "fewest_transfers": fewest_transfers,
+        })
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class OrderViewSet(SparseFieldsetMixin, ConditionalGetMixin, ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    version_models = (Order, Ticket, Journey, Route, Train)
+    vary_on_user = True
+    pagination_class = OrderPagination
 
     def get_permissions(self):
         if self.action == "destroy":
@@ -380,7 +1071,9 @@ class OrderViewSet(ModelViewSet):
         queryset = self.queryset
         if not self.request.user.is_staff:
             queryset = queryset.filter(user=self.request.user)
-        if self.action in ["list", "retrieve"]:
+        if self.action in self.sparse_actions:
+            queryset = self.get_sparse_queryset(queryset)
+        elif self.action == "retrieve":
             queryset = queryset.prefetch_related(
                 "tickets__journey__route",
                 "tickets__journey__train",
@@ -389,3 +1082,124 @@ class OrderViewSet(ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @extend_schema(
+        parameters=sparse_fieldset_parameters(OrderListSerializer),
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        description=(
+            "Stream the orders of the current user (all orders for "
+            "admins) as NDJSON or CSV, oldest first."
+        ),
+        **EXPORT_SCHEMA,
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path=EXPORT_URL_PATH,
+        content_negotiation_class=ExportContentNegotiation,
+    )
+    def export(self, request, fmt=None):
+        queryset = (
+            self.get_queryset()
+            .annotate(tickets_count=Count("tickets"))
+            .order_by("created_at", "id")
+        )
+        return export_response(
+            queryset,
+            {
+                "id": "id",
+                "created_at": "created_at",
+                "user": "user__email",
+                "tickets": "tickets_count",
+            },
+            fmt,
+            "orders",
+        )
+
+    @extend_schema(
+        description=(
+            "Stream the tickets of the current user's orders (all "
+            "tickets for admins) as NDJSON or CSV."
+        ),
+        **EXPORT_SCHEMA,
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        url_path=rf"tickets/{EXPORT_URL_PATH}",
+        url_name="tickets-export",
+        content_negotiation_class=ExportContentNegotiation,
+    )
+    def tickets_export(self, request, fmt=None):
+        queryset = (
+            Ticket.objects
+            .filter(order__in=self.get_queryset())
+            .order_by("order_id", "id")
+        )
+        return export_response(
+            queryset,
+            {
+                "id": "id",
+                "order": "order_id",
+                "ordered_at": "order__created_at",
+                "user": "order__user__email",
+                "journey": "journey_id",
+                "route": "journey__route__name",
+                "departure_time": "journey__departure_time",
+                "cargo": "cargo",
+                "seat": "seat",
+            },
+            fmt,
+            "tickets",
+        )
+
+
+class SeatHoldViewSet(
+    ConditionalGetMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.DestroyModelMixin,
+    GenericViewSet,
+):
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    version_models = (SeatHold,)
+    vary_on_user = True
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        queryset = self.queryset
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        if self.action in ["list", "retrieve"]:
+            queryset = queryset.prefetch_related("seats")
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    def perform_destroy(self, instance):
+        cancel_hold(instance)
+
+
+class CacheStatsViewSet(GenericViewSet):
+    """Hit and miss counters of the cache tiers of the serving worker."""
+    serializer_class = CacheStatsSerializer
+    permission_classes = (IsAdminUser,)
+
+    @extend_schema(
+        description=(
+            "Per-tier hit/miss counters and hit rates of the worker "
+            "process that serves the request (admin only)."
+        ),
+    )
+    def list(self, request):
+        if not hasattr(cache, "stats"):
+            raise NotFound("The configured cache does not keep statistics.")
+        serializer = self.get_serializer(cache.stats())
+        return Response(serializer.data, status=status.HTTP_200_OK)
@@ -14,3 +14,11 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "train_station.settings")
 
 application = get_asgi_application()
+
+# Apply cache invalidations published by the other workers. The
+# listener thread is started by each worker on its first request, not
+# here: servers may import this module before forking the workers
+# (gunicorn --preload), and threads do not survive a fork.
+from railway.invalidation import bus  # noqa: E402
+
+bus.start_on_request()
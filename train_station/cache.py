@@ -0,0 +1,402 @@
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files import locks
+
+# Shared-cache key of the last invalidation journal position; entries
+# are stored under "<JOURNAL_KEY>:<position>".
+JOURNAL_KEY = "tiered:journal"
+
+# Journal positions read past the stored head, which writers update
+# after adding their entry.
+_JOURNAL_PROBE = 16
+
+_MISSING = object()
+
+# Lock files serializing SharedFileCache.add, chosen by key hash.
+_ADD_LOCKS = 64
+
+# Local tiers by LOCATION. Django creates a backend instance per
+# thread, while the local tier is shared by all threads of a process.
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class SharedFileCache(FileBasedCache):
+    """FileBasedCache whose ``add`` is atomic across processes.
+
+    Django's ``add`` is ``has_key`` followed by ``set``, so two workers
+    can both add the same key. Here the check and the write run under
+    an exclusive ``flock`` on one of ``_ADD_LOCKS`` lock files in the
+    cache directory, so exactly one of them wins. ``add`` is what the
+    invalidation journal, the fill lock and the version stamps rely on.
+
+    Reads do not delete expired files: a reader could otherwise remove
+    the entry another process has just added in place of the expired
+    one. Expired files are replaced by writes or culled.
+    """
+    lock_suffix = ".lock"
+
+    def _lock_file(self, key, version):
+        name = os.path.basename(self._key_to_file(key, version))
+        stripe = int(name[:8], 16) % _ADD_LOCKS
+        return os.path.join(self._dir, f"add-{stripe}{self.lock_suffix}")
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._createdir()
+        with open(self._lock_file(key, version), "ab") as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                if self.has_key(key, version):
+                    return False
+                self.set(key, value, timeout, version)
+                return True
+            finally:
+                locks.unlock(lock)
+
+    def get(self, key, default=None, version=None):
+        fname = self._key_to_file(key, version)
+        try:
+            with open(fname, "rb") as f:
+                if not self._is_expired(f):
+                    return pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            pass
+        return default
+
+    def _is_expired(self, f):
+        try:
+            expires = pickle.load(f)
+        except EOFError:
+            return True
+        return expires is not None and expires < time.time()
+
+
+class _LocalTier:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.journal_position = None
+        self.next_sync = 0.0
+        self.counters = dict.fromkeys(
+            [
+                "local_hits",
+                "local_misses",
+                "shared_hits",
+                "shared_misses",
+                "invalidations",
+            ],
+            0,
+        )
+
+
+class TieredCache(BaseCache):
+    """Size-bounded per-process LRU in front of a shared cache backend.
+
+    Keys starting with one of ``LOCAL_PREFIXES`` are also kept in a
+    local LRU of at most ``MAX_ENTRIES`` values, each for at most
+    ``LOCAL_TIMEOUT`` seconds; all other keys only live in the ``SHARED``
+    cache alias. Writes go to both tiers, so a process always reads its
+    own writes.
+
+    Other processes learn about a write through an invalidation journal
+    kept in the shared cache: every ``set``/``delete``/``incr`` of a
+    local key appends the written keys to it, and each process replays
+    new journal entries at most every ``JOURNAL_INTERVAL`` seconds,
+    evicting them from its local tier. When entries were lost (expired,
+    culled or the shared cache was cleared) the whole local tier is
+    dropped. ``invalidate_local`` applies invalidation messages received
+    by other means.
+
+    Hit and miss counters of both tiers are returned by ``stats``.
+
+    OPTIONS:
+        SHARED: alias of the shared cache (default "shared").
+        LOCAL_PREFIXES: keys kept in the local tier (default all).
+        LOCAL_TIMEOUT: seconds a value stays local (default 5).
+        MAX_ENTRIES: size of the local LRU (default 300).
+        JOURNAL_INTERVAL: seconds between journal reads (default 1).
+        JOURNAL_TIMEOUT: lifetime of journal entries (default 300).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._shared_alias = options.get("SHARED", "shared")
+        self._local_prefixes = tuple(options.get("LOCAL_PREFIXES", ("",)))
+        self._local_timeout = options.get("LOCAL_TIMEOUT", 5)
+        self._journal_interval = options.get("JOURNAL_INTERVAL", 1)
+        self._journal_timeout = options.get("JOURNAL_TIMEOUT", 300)
+        with _tiers_lock:
+            self._tier = _tiers.setdefault(location, _LocalTier())
+
+    @property
+    def _shared(self) -> BaseCache:
+        return caches[self._shared_alias]
+
+    def _is_local(self, key: str) -> bool:
+        return key.startswith(self._local_prefixes)
+
+    def _count(self, counter: str, amount: int = 1) -> None:
+        with self._tier.lock:
+            self._tier.counters[counter] += amount
+
+    # Local tier
+
+    def _local_get(self, local_key: str):
+        tier = self._tier
+        with tier.lock:
+            entry = tier.entries.get(local_key)
+            if entry is None:
+                return _MISSING
+            expires, pickled = entry
+            if expires <= time.monotonic():
+                del tier.entries[local_key]
+                return _MISSING
+            tier.entries.move_to_end(local_key)
+        return pickle.loads(pickled)
+
+    def _local_set(self, local_key: str, value, timeout) -> None:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            timeout = self._local_timeout
+        else:
+            timeout = min(timeout, self._local_timeout)
+        tier = self._tier
+        if timeout <= 0:
+            self._local_delete([local_key])
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with tier.lock:
+            tier.entries[local_key] = (time.monotonic() + timeout, pickled)
+            tier.entries.move_to_end(local_key)
+            while len(tier.entries) > self._max_entries:
+                tier.entries.popitem(last=False)
+
+    def _local_delete(self, local_keys) -> None:
+        tier = self._tier
+        with tier.lock:
+            for local_key in local_keys:
+                tier.entries.pop(local_key, None)
+
+    def clear_local(self) -> None:
+        """Drop the local tier of this process."""
+        with self._tier.lock:
+            self._tier.entries.clear()
+
+    def invalidate_local(self, keys, version=None) -> None:
+        """Evict ``keys`` from the local tier of this process only."""
+        self._local_delete(
+            self.make_and_validate_key(key, version=version) for key in keys
+        )
+
+    # Invalidation journal
+
+    def _publish(self, local_keys) -> None:
+        """Append written keys to the journal read by other processes.
+
+        ``add`` reserves the next free position. Concurrent writers only
+        get distinct positions when the shared backend's ``add`` is
+        atomic, like SharedFileCache's (Django's FileBasedCache is not).
+        """
+        if not local_keys:
+            return
+        shared = self._shared
+        position = (shared.get(JOURNAL_KEY) or 0) + 1
+        while not shared.add(
+            f"{JOURNAL_KEY}:{position}", local_keys, self._journal_timeout
+        ):
+            position += 1
+        shared.set(JOURNAL_KEY, position, None)
+
+    def _sync(self) -> None:
+        """Replay journal entries written since the last read."""
+        tier = self._tier
+        now = time.monotonic()
+        if now < tier.next_sync or not tier.sync_lock.acquire(False):
+            return
+        try:
+            tier.next_sync = now + self._journal_interval
+            shared = self._shared
+            head = shared.get(JOURNAL_KEY) or 0
+            seen = tier.journal_position
+            if seen is None or head < seen:
+                # First read, or the shared cache lost the journal.
+                if seen is not None:
+                    self.clear_local()
+                tier.journal_position = head
+                return
+            if head == seen and not shared.has_key(
+                f"{JOURNAL_KEY}:{seen + 1}"
+            ):
+                return
+            if head - seen > self._max_entries:
+                self.clear_local()
+                tier.journal_position = head
+                return
+            positions = range(seen + 1, head + _JOURNAL_PROBE + 1)
+            journal = shared.get_many(
+                [f"{JOURNAL_KEY}:{position}" for position in positions]
+            )
+            evicted = []
+            for position in positions:
+                local_keys = journal.get(f"{JOURNAL_KEY}:{position}")
+                if local_keys is None:
+                    break
+                evicted.extend(local_keys)
+                seen = position
+            if seen < head:
+                # Entries up to the head expired before they were read.
+                self.clear_local()
+                seen = head
+            else:
+                self._local_delete(evicted)
+                self._count("invalidations", len(evicted))
+            tier.journal_position = seen
+        finally:
+            tier.sync_lock.release()
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        shared = self._shared
+        if not self._is_local(key):
+            value = shared.get(key, _MISSING, version=version)
+            if value is _MISSING:
+                self._count("shared_misses")
+                return default
+            self._count("shared_hits")
+            return value
+
+        self._sync()
+        value = self._local_get(local_key)
+        if value is not _MISSING:
+            self._count("local_hits")
+            return value
+        self._count("local_misses")
+        value = shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._count("shared_misses")
+            return default
+        self._count("shared_hits")
+        self._local_set(local_key, value, DEFAULT_TIMEOUT)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        remote = []
+        self._sync()
+        for key in keys:
+            local_key = self.make_and_validate_key(key, version=version)
+            value = (
+                self._local_get(local_key) if self._is_local(key) else _MISSING
+            )
+            if value is _MISSING:
+                if self._is_local(key):
+                    self._count("local_misses")
+                remote.append(key)
+            else:
+                self._count("local_hits")
+                found[key] = value
+        if remote:
+            shared_found = self._shared.get_many(remote, version=version)
+            self._count("shared_hits", len(shared_found))
+            self._count("shared_misses", len(remote) - len(shared_found))
+            for key, value in shared_found.items():
+                if self._is_local(key):
+                    self._local_set(
+                        self.make_and_validate_key(key, version=version),
+                        value,
+                        DEFAULT_TIMEOUT,
+                    )
+            found.update(shared_found)
+        return found
+
+    def has_key(self, key, version=None):
+        return self.get(key, _MISSING, version=version) is not _MISSING
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._shared.set(key, value, timeout, version=version)
+        if self._is_local(key):
+            local_key = self.make_and_validate_key(key, version=version)
+            self._local_set(local_key, value, timeout)
+            self._publish([local_key])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self._shared.set_many(data, timeout, version=version)
+        local_keys = []
+        for key, value in data.items():
+            if self._is_local(key) and key not in failed:
+                local_key = self.make_and_validate_key(key, version=version)
+                self._local_set(local_key, value, timeout)
+                local_keys.append(local_key)
+        self._publish(local_keys)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Only the shared cache can tell whether the key exists. Not
+        # journaled: the key was missing there, so any local copy is one
+        # its process keeps for at most LOCAL_TIMEOUT.
+        added = self._shared.add(key, value, timeout, version=version)
+        if added and self._is_local(key):
+            self._local_delete(
+                [self.make_and_validate_key(key, version=version)]
+            )
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._shared.touch(key, timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self._shared.incr(key, delta, version=version)
+        if self._is_local(key):
+            local_key = self.make_and_validate_key(key, version=version)
+            self._local_set(local_key, value, DEFAULT_TIMEOUT)
+            self._publish([local_key])
+        return value
+
+    def delete(self, key, version=None):
+        deleted = self._shared.delete(key, version=version)
+        if self._is_local(key):
+            local_key = self.make_and_validate_key(key, version=version)
+            self._local_delete([local_key])
+            self._publish([local_key])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self._shared.delete_many(keys, version=version)
+        local_keys = [
+            self.make_and_validate_key(key, version=version)
+            for key in keys
+            if self._is_local(key)
+        ]
+        self._local_delete(local_keys)
+        self._publish(local_keys)
+
+    def clear(self):
+        self._shared.clear()
+        self.clear_local()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and hit rates of both tiers in this process."""
+        with self._tier.lock:
+            counters = dict(self._tier.counters)
+            entries = len(self._tier.entries)
+        stats = {"pid": os.getpid(), "local_entries": entries, **counters}
+        for tier in ("local", "shared"):
+            hits, misses = counters[f"{tier}_hits"], counters[f"{tier}_misses"]
+            stats[f"{tier}_hit_rate"] = (
+                round(hits / (hits + misses), 4) if hits + misses else None
+            )
+        return stats
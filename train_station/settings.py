@@ -42,6 +42,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "debug_toolbar",
     "rest_framework",
     "drf_spectacular",
@@ -91,6 +92,12 @@ DATABASES = {
         "PASSWORD": os.environ["POSTGRES_PASSWORD"],
         "HOST": os.environ["POSTGRES_HOST"],
         "PORT": os.environ["POSTGRES_PORT"],
+        "OPTIONS": {
+            # Word similarity from which UPPER(name) %> term matches in
+            # the name searches (see railway/search.py); pg_trgm's
+            # default of 0.6 misses one-letter typos in short names.
+            "options": "-c pg_trgm.word_similarity_threshold=0.3",
+        },
     }
 }
 
@@ -149,12 +156,22 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "user.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": [
         "railway.permissions.IsAdminOrIfAuthenticatedReadOnly",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "railway.renderers.ORJSONRenderer",
+        "railway.renderers.CompactJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "railway.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.AnonRateThrottle",
@@ -163,6 +180,147 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {"anon": "100/day", "user": "300/day"},
 }
 
+# Cache
+# A per-process LRU of the hot railway and user keys in front of a file
+# cache shared by all workers of the host (see train_station/cache.py).
+# Every process writing models must use the same CACHE_DIR, or its
+# version stamps never reach the others (docker-compose mounts the
+# my_cache volume in each service).
+
+CACHE_DIR = os.getenv("CACHE_DIR", "/files/cache")
+
+CACHES = {
+    "default": {
+        "BACKEND": "train_station.cache.TieredCache",
+        "LOCATION": "default",
+        "OPTIONS": {
+            "SHARED": "shared",
+            "LOCAL_PREFIXES": (
+                "railway:version:",
+                "railway:response:",
+                "user:",
+            ),
+            "LOCAL_TIMEOUT": 5,
+            "MAX_ENTRIES": 5000,
+            "JOURNAL_INTERVAL": 1,
+        },
+    },
+    "shared": {
+        "BACKEND": "train_station.cache.SharedFileCache",
+        "LOCATION": CACHE_DIR,
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    },
+}
+
+# Tests run with the shared cache and the route network in a temporary
+# directory (see train_station/test_runner.py).
+
+TEST_RUNNER = "train_station.test_runner.TestRunner"
+
+# Invalidation bus
+# Channel the railway signals NOTIFY about changed rows, how often
+# (seconds) workers poll for events when the database has no
+# LISTEN/NOTIFY, how long such table events are kept, and for how long
+# polls read them again in case their transaction committed late
+# (see railway/invalidation.py).
+
+INVALIDATION_CHANNEL = "railway_invalidation"
+
+INVALIDATION_POLL_INTERVAL = 1
+
+INVALIDATION_EVENT_TTL = timedelta(minutes=5)
+
+INVALIDATION_EVENT_LOOKBACK = timedelta(minutes=1)
+
+# Lifetime (seconds) of users cached by JWT authentication; saving,
+# deleting or bulk-updating a user drops its entry.
+
+USER_CACHE_TIMEOUT = 5 * 60
+
+# List serialization
+# Build train, route and journey list pages from values() rows with the
+# lean serializers in railway/serializers.py instead of ModelSerializers.
+
+LEAN_LIST_SERIALIZATION = True
+
+# Response cache
+# Lifetime (seconds) of cached reference responses (crews, train types,
+# trains, stations, routes); writes invalidate them earlier.
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+# Lifetime (seconds) of cached journey searches; journey and ticket
+# writes invalidate them earlier.
+
+JOURNEY_SEARCH_CACHE_TIMEOUT = 5 * 60
+
+# How long (seconds) a worker computing a missing cache entry holds the
+# lock other workers wait on, and how long they wait before computing
+# the entry themselves.
+
+CACHE_FILL_LOCK_TIMEOUT = 10
+
+CACHE_FILL_WAIT = 5
+
+# Booking
+# Attempts made to place an order when concurrent bookings collide,
+# and the upper bound (seconds) of the random pause between attempts.
+
+BOOKING_MAX_ATTEMPTS = 3
+
+BOOKING_RETRY_BACKOFF = 0.05
+
+# How long seats reserved through /api/railway/seat_holds/ stay held
+# before the expire_seat_holds command releases them (docker-compose
+# runs it every minute in the seat_holds service).
+
+SEAT_HOLD_TTL = timedelta(minutes=10)
+
+# Itineraries
+# Shortest change of trains at a station, the most legs an itinerary
+# may have and how far after the requested time departures are scanned.
+
+ITINERARY_MIN_TRANSFER = timedelta(minutes=10)
+
+ITINERARY_MAX_LEGS = 4
+
+ITINERARY_SEARCH_WINDOW = timedelta(days=2)
+
+# Station boards
+# Rows shown on /api/railway/stations/{id}/departures/ and arrivals/,
+# and how long (seconds) clients may cache a board.
+
+STATION_BOARD_DEFAULT_LIMIT = 20
+
+STATION_BOARD_MAX_LIMIT = 100
+
+STATION_BOARD_MAX_AGE = 5
+
+# Station lookups
+# Default and maximum number of stations returned by
+# /api/railway/stations/nearest/, within/ and autocomplete/.
+
+STATION_LOOKUP_DEFAULT_LIMIT = 10
+
+STATION_LOOKUP_MAX_LIMIT = 100
+
+# Route network
+# Memory-mapped all-pairs shortest-distance matrix served by
+# /api/railway/routes/shortest/ (see railway/network.py). The
+# build_route_network command builds it and rebuilds it when routes are
+# deleted or made longer (docker-compose runs it in the route_network
+# service).
+
+ROUTE_NETWORK_FILE = os.getenv(
+    "ROUTE_NETWORK_FILE", "/files/network/route_network.npy"
+)
+
+# Exports
+# Rows fetched per round trip by the server-side cursor of the
+# /journeys/export/ and /orders/export/ streams.
+
+EXPORT_CHUNK_SIZE = 2000
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -0,0 +1,42 @@
+import copy
+import os
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner that keeps tests off the server's files.
+
+    The shared cache and the route network are moved to a temporary
+    directory for the whole run, so that tests never empty the cache or
+    replace the network of a server running against the same
+    ``CACHE_DIR`` and ``ROUTE_NETWORK_FILE``.
+    """
+
+    def get_test_settings(self, directory: str) -> dict:
+        caches = copy.deepcopy(settings.CACHES)
+        caches["shared"]["LOCATION"] = os.path.join(directory, "cache")
+        return {
+            "CACHES": caches,
+            "ROUTE_NETWORK_FILE": os.path.join(
+                directory, "network", "route_network.npy"
+            ),
+        }
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._directory = tempfile.TemporaryDirectory(
+            prefix="train-station-tests-"
+        )
+        self._test_settings = override_settings(
+            **self.get_test_settings(self._directory.name)
+        )
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        self._directory.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from user.cache import user_cache_key
+
+# User fields kept in the cache; the others (the password hash among
+# them) are deferred and loaded on access.
+USER_CACHE_FIELDS = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that caches the token's user between requests.
+
+    Every authenticated request used to load its user by primary key.
+    The ``USER_CACHE_FIELDS`` of users, and the password digest that
+    revoked tokens are checked against, are now cached for
+    ``USER_CACHE_TIMEOUT``. Saving, deleting or bulk-updating users
+    drops their entries. The active and revoked-token checks still run
+    against the cached user.
+    """
+
+    @staticmethod
+    def cache_entry(user) -> dict:
+        return {
+            "values": {
+                name: getattr(user, name) for name in USER_CACHE_FIELDS
+            },
+            "password": get_md5_hash_password(user.password),
+        }
+
+    @staticmethod
+    def user_from_cache_entry(entry: dict):
+        """The cached user, with the fields not cached left deferred."""
+        model = get_user_model()
+        names = [
+            field.attname
+            for field in model._meta.concrete_fields
+            if field.attname in entry["values"]
+        ]
+        return model.from_db(
+            DEFAULT_DB_ALIAS,
+            names,
+            [entry["values"][name] for name in names],
+        )
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        entry = None if user_id is None else cache.get(user_cache_key(user_id))
+        if entry is None:
+            user = super().get_user(validated_token)
+            cache.set(
+                user_cache_key(user_id),
+                self.cache_entry(user),
+                settings.USER_CACHE_TIMEOUT,
+            )
+            return user
+
+        user = self.user_from_cache_entry(entry)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != entry["password"]:
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed",
+            )
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Document CachedJWTAuthentication as the usual JWT bearer scheme."""
+    target_class = "user.authentication.CachedJWTAuthentication"
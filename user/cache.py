@@ -0,0 +1,14 @@
+from django.core.cache import cache
+from django.db import transaction
+
+
+def user_cache_key(user_id) -> str:
+    return f"user:authenticated:{user_id}"
+
+
+def forget_cached_users(user_ids) -> None:
+    """Drop cached users now and once the current transaction commits."""
+    keys = [user_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
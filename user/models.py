@@ -5,8 +5,23 @@ from django.contrib.auth.models import (
 from django.db import models
 from django.utils.translation import gettext as _
 
+from user.cache import forget_cached_users
 
-class UserManager(BaseUserManager):
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """Update the users and drop them from the authentication cache.
+
+        Bulk updates send no ``post_save``, so a deactivated user would
+        otherwise stay cached as active.
+        """
+        user_ids = list(self.values_list("pk", flat=True))
+        rows = super().update(**kwargs)
+        forget_cached_users(user_ids)
+        return rows
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """Define a model manager for User model with no username field."""
 
     use_in_migrations = True
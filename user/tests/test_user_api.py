@@ -1,9 +1,12 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from django.test import TestCase
 
+from user.cache import user_cache_key
+
 CREATE_USER_URL = reverse("user:create")
 MANAGE_USER_URL = reverse("user:manage")
 
@@ -84,3 +87,67 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.last_name, payload["last_name"])
         self.assertTrue(self.user.check_password(payload["password"]))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class JwtUserCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = sample_user(
+            email="test@example.com", password="testpass123"
+        )
+        self.client = APIClient()
+        response = self.client.post(
+            reverse("user:token_obtain_pair"),
+            {"email": "test@example.com", "password": "testpass123"},
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data['access']}"
+        )
+
+    def test_authenticated_user_is_cached(self):
+        self.client.get(MANAGE_USER_URL)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(MANAGE_USER_URL)
+        self.assertEqual(response.data["email"], self.user.email)
+
+    def test_user_changes_drop_cached_user(self):
+        self.client.get(MANAGE_USER_URL)
+
+        self.user.first_name = "Jane"
+        self.user.save()
+        response = self.client.get(MANAGE_USER_URL)
+        self.assertEqual(response.data["first_name"], "Jane")
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(MANAGE_USER_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_hash_is_not_cached(self):
+        self.client.get(MANAGE_USER_URL)
+
+        entry = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn(self.user.password, str(entry))
+        self.assertNotIn("password", entry["values"])
+
+    def test_bulk_update_drops_cached_user(self):
+        self.client.get(MANAGE_USER_URL)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            is_active=False
+        )
+        response = self.client.get(MANAGE_USER_URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_profile_update_with_cached_user(self):
+        self.client.get(MANAGE_USER_URL)
+
+        response = self.client.patch(
+            MANAGE_USER_URL, {"last_name": "Doe", "password": "newpass123"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_name, "Doe")
+        self.assertTrue(self.user.check_password("newpass123"))